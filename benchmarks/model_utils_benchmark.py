@@ -0,0 +1,65 @@
+"""
+Time of ModelUtils.convert_container_to_directory_model for large directories.
+
+The container is built from ResourceInfo messages in memory, no Reva instance is needed.
+With --compare the previous conversion, which scanned the whole container for every
+entry, is timed as well (it is quadratic, so it is skipped above 20k entries).
+
+    python benchmarks/model_utils_benchmark.py --entries 1000 10000 100000 --compare
+"""
+import argparse
+import time
+
+import cs3.storage.provider.v1beta1.resources_pb2 as resource_types
+
+from cs3api4lab.utils.model_utils import ModelUtils
+
+QUADRATIC_LIMIT = 20000
+
+
+def build_container(entries):
+    container = []
+    for i in range(entries):
+        info = resource_types.ResourceInfo(
+            type=resource_types.RESOURCE_TYPE_CONTAINER if i % 10 == 0 else resource_types.RESOURCE_TYPE_FILE,
+            path='/reva/einstein/data/entry_%d%s' % (i, '' if i % 10 == 0 else '.csv'),
+            size=i * 1024,
+            permission_set=resource_types.ResourcePermissions(initiate_file_upload=True, restore_file_version=True)
+        )
+        info.mtime.seconds = 1600000000 + i
+        container.append(info)
+    return container
+
+
+def convert_per_entry(path, container):
+    # the conversion as it was done before, every entry scanned the container again
+    for cs3_model in container:
+        ModelUtils.convert_container_to_base_model(cs3_model.path, container)
+
+
+def measure(function, *args):
+    time_start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - time_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--compare', action='store_true', help='time the per-entry conversion as well')
+    args = parser.parse_args()
+
+    for entries in args.entries:
+        container = build_container(entries)
+        elapsed = min(measure(ModelUtils.convert_container_to_directory_model, '/reva/einstein/data', container)
+                      for _ in range(args.repeat))
+        result = 'entries=%d elapsed_ms=%.1f per_entry_us=%.2f' % (entries, elapsed * 1000, elapsed / entries * 1e6)
+        if args.compare and entries <= QUADRATIC_LIMIT:
+            legacy = measure(convert_per_entry, '/reva/einstein/data', container)
+            result += ' per_entry_scan_ms=%.1f' % (legacy * 1000)
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-request construction overhead of the API objects used by the handlers.
+
+"before" builds the objects the way the handlers did on every request (a new ShareAPIFacade,
+Cs3FileApi, Cs3UserApi or Cs3PublicShareApi per property access), "after" takes them from the
+service registry built at extension load. Constructing the objects does not send any RPC,
+so no Reva instance is needed.
+
+    python benchmarks/service_construction_benchmark.py --requests 1000
+"""
+import argparse
+import time
+
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.cs3_public_share_api import Cs3PublicShareApi
+from cs3api4lab.api.cs3_user_api import Cs3UserApi
+from cs3api4lab.api.services import ServiceRegistry
+from cs3api4lab.api.share_api_facade import ShareAPIFacade
+
+PER_REQUEST = {
+    'share_facade': ShareAPIFacade,
+    'file_api': Cs3FileApi,
+    'user_api': Cs3UserApi,
+    'public_share_api': Cs3PublicShareApi,
+}
+
+
+def measure(function, requests):
+    time_start = time.perf_counter()
+    for _ in range(requests):
+        function()
+    return (time.perf_counter() - time_start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    log = LoggingConfigurable().log
+    time_start = time.perf_counter()
+    ServiceRegistry.get_services(log)
+    print('registry build_ms=%.2f' % ((time.perf_counter() - time_start) * 1000))
+
+    for name, api_class in PER_REQUEST.items():
+        before = measure(lambda: api_class(log), args.requests)
+        after = measure(lambda: getattr(ServiceRegistry.get_services(log), name), args.requests)
+        print('%s before_us=%.1f after_us=%.3f' % (name, before * 1e6, after * 1e6))
+
+
+if __name__ == '__main__':
+    main()
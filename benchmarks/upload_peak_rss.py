@@ -0,0 +1,69 @@
+"""
+Peak RSS of CS3APIsManager.save for large base64 file models.
+
+Every size is saved in a fresh subprocess, so that the high-water mark of one run
+does not hide the next one. The reported overhead is the peak RSS reached during
+the save minus the RSS after the payload (the base64 string JupyterLab sends) was built.
+Requires a running Reva instance configured in jupyter_cs3_config.json.
+
+    python benchmarks/upload_peak_rss.py --sizes 100M 1G 4G
+"""
+import argparse
+import base64
+import resource
+import subprocess
+import sys
+import time
+
+UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(size):
+    if size[-1].upper() in UNITS:
+        return int(float(size[:-1]) * UNITS[size[-1].upper()])
+    return int(size)
+
+
+def peak_rss_bytes():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_single(size, path):
+    from traitlets.config import LoggingConfigurable
+    from cs3api4lab.api.cs3apismanager import CS3APIsManager
+
+    log = LoggingConfigurable().log
+    manager = CS3APIsManager(None, log)
+
+    block = base64.b64encode(b'\0' * 3 * 1024 * 1024).decode('ascii')
+    content = block * (size // (3 * 1024 * 1024)) + base64.b64encode(b'\0' * (size % (3 * 1024 * 1024))).decode('ascii')
+    baseline = peak_rss_bytes()
+
+    time_start = time.time()
+    manager.save({'type': 'file', 'format': 'base64', 'content': content}, path)
+    elapsed = time.time() - time_start
+
+    overhead = peak_rss_bytes() - baseline
+    manager.delete_file(path)
+    print('size=%d overhead_mb=%.1f overhead_ratio=%.3f elapsed_s=%.1f' % (
+        size, overhead / UNITS['M'], overhead / size, elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['100M', '1G', '4G'])
+    parser.add_argument('--path', default='/upload_peak_rss_benchmark.bin')
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(parse_size(args.single), args.path)
+        return
+
+    for size in args.sizes:
+        subprocess.run([sys.executable, __file__, '--single', size, '--path', args.path], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,8 @@ from .handlers import setup_handlers
 from ._version import __version__
 
 from cs3api4lab.api.cs3apismanager import CS3APIsManager
+from cs3api4lab.api.async_cs3apismanager import AsyncCS3APIsManager
+from cs3api4lab.api.services import ServiceRegistry
 
 HERE = Path(__file__).parent.resolve()
 
@@ -30,7 +32,9 @@ def _load_jupyter_server_extension(server_app):
     """
 
     url_path = "cs3api4lab"
-    setup_handlers(server_app.web_app, url_path)
+    # the API objects are built once, at extension load, and shared by all the requests
+    services = ServiceRegistry.get_services(server_app.log)
+    setup_handlers(server_app.web_app, url_path, services)
     server_app.log.info(
         f"Registered cs3api4lab extension at URL path /{url_path}"
     )
@@ -0,0 +1,536 @@
+import asyncio
+import importlib
+import urllib
+import nbformat
+from concurrent.futures import ThreadPoolExecutor
+
+from jupyter_server.services.contents.checkpoints import AsyncCheckpoints
+from jupyter_server.services.contents.manager import AsyncContentsManager
+
+from tornado import web
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.utils.share_utils import ShareUtils
+from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.model_utils import ModelUtils
+from cs3api4lab.utils.request_context import RequestContext, request_scope
+from cs3api4lab.api.cs3checkpoints import AsyncCS3Checkpoints
+from cs3api4lab.api.services import ServiceRegistry
+from cs3api4lab.api.cs3apismanager_mixin import CS3APIsManagerMixin
+from cs3api4lab.exception.exceptions import ResourceNotFoundError, FileConflictError, GatewayUnavailableError
+from traitlets.config import HasTraits
+
+"""
+Asynchronous variant of CS3APIsManager, the contents requests are served on the tornado loop.
+
+The RPCs are awaited on grpc.aio channels, the HTTP transfers and the local spool files are handled
+in the default executor. The notebook notary keeps its signatures in SQLite, which doesn't allow
+multithreaded operations by default, so the notary is only used from one dedicated thread.
+"""
+class AsyncCS3APIsManager(CS3APIsManagerMixin, AsyncContentsManager):
+
+    def __init__(self, parent, log, **kwargs):
+        super().__init__(**kwargs)
+        HasTraits.__init__(self, **kwargs)
+        self.cs3_config = Cs3ConfigManager.get_config()
+        self.log = log
+        self.checkpoints = self._create_checkpoints_instance(log, self.cs3_config)
+        self._init_caches()
+        self._notary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cs3api4lab-notary')
+
+    @property
+    def file_api(self):
+        return ServiceRegistry.get_async_services(self.log).file_api
+
+    @property
+    def storage_api(self):
+        return ServiceRegistry.get_async_services(self.log).storage_api
+
+    @property
+    def lock_api(self):
+        return ServiceRegistry.get_async_services(self.log).lock_api
+
+    @property
+    def share_api(self):
+        return ServiceRegistry.get_async_services(self.log).share_api
+
+    def _create_checkpoints_instance(self, log, config):
+        checkpoints_class = AsyncCS3Checkpoints
+        if self.cs3_config.checkpoints_class:
+            module_name, class_name = self.cs3_config.checkpoints_class.rsplit('.', 1)
+            try:
+                module = importlib.import_module(module_name)
+                configured_class = getattr(module, class_name)
+                # the blocking checkpoints can't be used here, they are replaced with their async variant
+                if issubclass(configured_class, AsyncCheckpoints):
+                    checkpoints_class = configured_class
+            except (ImportError, AttributeError):
+                pass
+
+        return checkpoints_class(parent=self, log=log, config=config)
+
+    @request_scope
+    async def dir_exists(self, path):
+        path = FileUtils.normalize_path(path)
+        return await self._is_dir(path)
+
+    async def is_hidden(self, path):
+        return self._is_hidden_path(FileUtils.normalize_path(path))
+
+    @request_scope
+    async def file_exists(self, path=''):
+        path = FileUtils.normalize_path(path)
+        try:
+            file_info = await self.file_api.stat_info(path, self.cs3_config.endpoint)
+        except FileNotFoundError:
+            return False
+
+        return self._is_file_info(file_info)
+
+    @request_scope
+    async def get(self, path, content=True, type=None, format=None, require_hash=False):
+        """
+        Get a file, notebook or directory model.
+        With require_hash the models of files and notebooks carry the hash of their content.
+        """
+        path = FileUtils.normalize_path(path)
+        model = None
+
+        try:
+            if type:
+                if type == 'directory' and await self._is_dir(path):
+                    model = await self._dir_model(path, content=content)
+                elif type == 'file' and await self.file_exists(path):
+                    model = await self._file_model(path, content=content, format=format, require_hash=require_hash)
+                elif type == 'notebook' or (type is None and path.endswith('.ipynb')):
+                    try:
+                        model = await self._notebook_model(path, content=content, require_hash=require_hash)
+                    except Exception:
+                        self.log.info("Notebook does not exist %s", path)
+            else:
+                if path.endswith('.ipynb'):
+                    try:
+                        model = await self._notebook_model(path, content=content, require_hash=require_hash)
+                    except Exception:
+                        self.log.info("Notebook does not exist %s", path)
+                elif await self.file_exists(path):
+                    model = await self._file_model(path, content=content, format=format, require_hash=require_hash)
+                elif await self._is_dir(path):
+                    model = await self._dir_model(path, content=content)
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
+
+        if model:
+            return model
+
+        raise web.HTTPError(404, u'Resource %s does not exist' % path)
+
+    @request_scope
+    async def get_kernel_path(self, path, model=None):
+        """
+        Return the initial API path of a kernel associated with a given notebook,
+        translated to the local (fuse mounted) storage, see CS3APIsManager.get_kernel_path
+        """
+        return self._get_kernel_dir(path)
+
+    @request_scope
+    async def save(self, model, path):
+        """
+        Save a file or directory model to path.
+        Should return the saved model with no content.
+        """
+        path = FileUtils.check_and_transform_file_path(path)
+
+        if model.get('chunk') is not None:
+            return await self._save_chunk(model, path)
+
+        self._check_save_model(model)
+        self.log.debug("Saving %s", path)
+
+        try:
+            if model['type'] == 'notebook':
+                file_info = await self._save_notebook(path, model['content'], model['format'])
+
+            elif model['type'] == 'file':
+                file_info = await self._save_file(path, model['content'], model['format'])
+
+            elif model['type'] == 'directory':
+                await self._save_directory(path)
+
+            else:
+                raise web.HTTPError(400, "Unhandled contents type: %s" % model['type'])
+
+        except web.HTTPError:
+            raise
+
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
+
+        except Exception as e:
+            self.log.error(u'Error while saving file: %s %s', path, e, exc_info=True)
+            raise web.HTTPError(500, u'Unexpected error while saving file: %s %s' % (path, e))
+
+        self._forget_dir_models(path)
+        validation_message = None
+
+        if model['type'] == 'notebook':
+            await asyncio.get_running_loop().run_in_executor(None, self.validate_notebook_model, model)
+            validation_message = model.get('message', None)
+            model = self._saved_model(path, file_info, 'notebook')
+
+        elif model['type'] == 'file':
+            model = self._saved_model(path, file_info, 'file')
+        elif model['type'] == 'directory':
+            model = await self._dir_model(path, content=False)
+        if validation_message:
+            model['message'] = validation_message
+
+        return model
+
+    async def _save_chunk(self, model, path):
+        """
+        See CS3APIsManagerMixin._get_chunk_spool, the spool file is written in the default executor
+        """
+        spool = self._get_chunk_spool(model, path)
+        try:
+            content = self._get_content_stream(model['content'], model['format'])
+            await asyncio.get_running_loop().run_in_executor(None, self._write_spool, spool, content)
+
+            if model['chunk'] != -1:
+                return self._chunk_model(path, spool)
+
+            spool.seek(0)
+            file_info = await self.file_api.write_file(path, spool, self.cs3_config.endpoint, model['format'])
+        except web.HTTPError:
+            self._discard_upload_spools(path)
+            raise
+        except FileConflictError as e:
+            self._discard_upload_spools(path)
+            self.log.info(u'Conflict saving: %s %s', path, e)
+            raise web.HTTPError(409, u'File %s was changed by another writer' % path)
+        except GatewayUnavailableError as e:
+            self._discard_upload_spools(path)
+            raise self._get_unavailable_error(e)
+        except Exception as e:
+            self._discard_upload_spools(path)
+            self.log.error(u'Error while saving file: %s %s', path, e, exc_info=True)
+            raise web.HTTPError(500, u'Unexpected error while saving file: %s %s' % (path, e))
+
+        self._discard_upload_spools(path)
+        self._forget_dir_models(path)
+        return self._saved_model(path, file_info, 'file')
+
+    @request_scope
+    async def delete_file(self, path):
+        """Delete the file or directory at path."""
+        path = FileUtils.normalize_path(path)
+        try:
+            await self.file_api.remove(path, self.cs3_config.endpoint)
+
+        except FileNotFoundError as e:
+            self.log.error(u'File not found error: %s %s', path, e, exc_info=True)
+            raise web.HTTPError(404, u'No such file or directory: %s %s' % (path, e))
+
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
+
+        except Exception as e:
+            self.log.error(u'Unknown error delete file: %s %s', path, e, exc_info=True)
+            raise web.HTTPError(500, u'Unknown error delete file: %s %s' % (path, e))
+
+        self._forget_dir_models(path)
+
+    @request_scope
+    async def rename_file(self, old_path, new_path):
+        """Rename a file or directory."""
+
+        if new_path == old_path:
+            return
+
+        old_path = FileUtils.normalize_path(old_path)
+        new_path = FileUtils.normalize_path(new_path)
+
+        try:
+            await self.file_api.move(old_path, new_path, self.cs3_config.endpoint)
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
+        except Exception as e:
+            self.log.error(u'Error renaming file: %s %s', old_path, e)
+            raise web.HTTPError(500, u'Error renaming file: %s %s' % (old_path, e))
+
+        self._forget_dir_models(old_path, new_path)
+
+    @request_scope
+    async def new_untitled(self, path='', type='', ext=''):
+        """Create a new untitled file or directory, the candidate names are stated once each."""
+        return await super().new_untitled(path, type, ext)
+
+    @request_scope
+    async def copy(self, from_path, to_path=None):
+        """Copy an existing file, within one request context."""
+        return await super().copy(from_path, to_path)
+
+    @request_scope
+    async def new(self, model=None, path=''):
+
+        path = path.strip('/')
+        path = FileUtils.normalize_path(path)
+
+        return await self.save(self._fill_new_model(model, path), path)
+
+    async def _read_file(self, stat, file_format=None, chunks=None):
+        """
+        Reads the file content, chunks can be a download of the file that was already started
+        """
+        if chunks is None:
+            chunks = self.file_api.read_file(stat, self.cs3_config.endpoint)
+        content = b''.join([chunk async for chunk in chunks])
+
+        if file_format is None or file_format == "text":
+            try:
+                return content.decode('utf-8')
+            except UnicodeError as e:
+                if file_format == "text":
+                    raise web.HTTPError(
+                        400,
+                        "%s is not UTF-8 encoded" % stat['filepath'],
+                        reason="bad format",
+                    ) from e
+
+        return content
+
+    async def _stat_file(self, path):
+        file_info = await self.file_api.stat_info(path, self.cs3_config.endpoint)
+
+        if self._is_dev_home(file_info):
+            opaque_id = urllib.parse.unquote(file_info['inode']['opaque_id'])
+            storage_id = urllib.parse.unquote(file_info['inode']['storage_id'])
+            file_info = await self.file_api.stat_info(opaque_id, storage_id)
+
+        return file_info
+
+    async def _dir_model(self, path, content):
+        try:
+            etag = None
+            if content:
+                etag = (await self.file_api.stat_info(path, self.cs3_config.endpoint, cached=False))['etag']
+                cached_model = self._get_cached_dir_model(path, etag)
+                if cached_model is not None:
+                    return cached_model
+            cs3_container = await self.file_api.read_directory(path, self.cs3_config.endpoint)
+            model = ModelUtils.convert_container_to_directory_model(path, cs3_container, content)
+        except (ResourceNotFoundError, FileNotFoundError):
+            raise web.HTTPError(404, u'%s does not exist' % path)
+        except GatewayUnavailableError as e:
+            return self._get_stale_dir_model(path, content, e)
+        return self._remember_dir_model(path, etag, model)
+
+    async def _file_model(self, path, content, format, require_hash=False):
+        file_info = None
+        model = ModelUtils.create_empty_file_model(path)
+        try:
+            file_info = await self._stat_file(path)
+        except Exception:
+            self.log.info('File %s does not exists' % path)
+
+        file_content = None
+        if file_info:
+            model = self._stated_file_model(path, file_info, require_hash)
+            _, model['writable'], file_content = await self._open_file(file_info, content, format)
+        else:
+            model['writable'] = True
+
+        if content:
+            self._set_file_content(model, file_content, format)
+
+        return model
+
+    async def _notebook_model(self, path, content, require_hash=False):
+        file_info = await self._stat_file(path)
+
+        model = self._stated_file_model(path, file_info, require_hash)
+        model['type'] = 'notebook'
+        model['locked'], model['writable'], file_content = await self._open_file(file_info, content)
+        if content:
+            model['content'] = await self._run_notary(self._load_notebook, file_content, path)
+            model['format'] = 'json'
+            await asyncio.get_running_loop().run_in_executor(None, self.validate_notebook_model, model)
+
+        return model
+
+    async def _open_file(self, file_info, content=False, format=None):
+        """
+        Fetches what the model of a stated file needs, every fact once. The lock state, the received share
+        and (with content) the download are requested together, then the lock is acquired while the content
+        is downloaded. Returns the lock state of the file (locked by another user), whether it is writable
+        and the content. Without content, a file this server still holds the lock of is answered from the stat alone.
+        """
+        held_role = self._get_held_role(file_info, content)
+        if held_role is not None:
+            return False, self._get_writable(file_info, held_role[0], False), None
+
+        lookups = [self._get_lock_state(file_info), self._get_received_share(file_info)]
+        if content:
+            lookups.append(self.storage_api.init_file_download(file_info['filepath'], self.cs3_config.endpoint))
+        results = await asyncio.gather(*lookups)
+        lock, share = results[0], results[1]
+
+        locked = await self.lock_api.is_locked_by_other(lock)
+        file_content = None
+        if content:
+            chunks = self.file_api.download(results[2], file_info['size'])
+            if locked:
+                self.log.info("File %s locked, opening in read-only mode" % file_info['filepath'])
+                file_content = await self._read_file(file_info, format, chunks)
+            else:
+                _, file_content = await asyncio.gather(self._acquire_lock(file_info, lock),
+                                                       self._read_file(file_info, format, chunks))
+
+        role = ShareUtils.map_permissions_to_role(share.permissions.permissions) if share else None
+        self._remember_held_role(file_info, role, locked)
+        return locked, self._get_writable(file_info, role, locked), file_content
+
+    async def _get_lock_state(self, file_info):
+        key = self._get_file_key(file_info)
+        lock = RequestContext.get('lock', key)
+        if lock is RequestContext.NOT_SET:
+            lock = await self.lock_api.get_lock_state(file_info)
+            RequestContext.set('lock', key, lock)
+        return lock
+
+    async def _get_received_share(self, file_info):
+        key = self._get_file_key(file_info)
+        share = RequestContext.get('share', key)
+        if share is RequestContext.NOT_SET:
+            share = await self.share_api.get_share_received_by_stat(file_info)
+            RequestContext.set('share', key, share)
+        return share
+
+    async def _acquire_lock(self, file_info, lock):
+        try:
+            await self.lock_api.acquire_lock(file_info, lock)
+        except IOError:
+            self.log.info("File %s locked, opening in read-only mode" % file_info['filepath'])
+
+    def _load_notebook(self, file_content, path):
+        nb = nbformat.reads(file_content, as_version=4)
+        self.mark_trusted_cells(nb, path)
+        return nb
+
+    def _sign_notebook(self, content, path):
+        nb = nbformat.from_dict(content)
+        self.check_and_sign(nb, path)
+        return nbformat.writes(nb)
+
+    async def _run_notary(self, func, *args):
+        """
+        Runs the code that uses the notary (and its SQLite connection) on the notary thread
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._notary_executor, func, *args)
+
+    async def _is_dir(self, path):
+        if self._is_root(path):
+            return True
+
+        path = FileUtils.normalize_path(path)
+        return self._is_dir_stat(await self.storage_api.stat(path))
+
+    async def _save_file(self, path, content, format):
+        if format not in {'text', 'base64'}:
+            raise web.HTTPError(400, "Must specify format of file contents as 'text' or 'base64'", )
+
+        try:
+            return await self.file_api.write_file(path, self._get_content_stream(content, format),
+                                                  self.cs3_config.endpoint, format)
+
+        except FileConflictError as e:
+            self.log.info(u'Conflict saving: %s %s', path, e)
+            raise web.HTTPError(409, u'File %s was changed by another writer' % path)
+
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
+
+        except Exception as e:
+            self.log.error(u'Error saving: %s %s', path, e)
+            raise web.HTTPError(400, u'Error saving %s: %s' % (path, e))
+
+    async def _save_notebook(self, path, content, format):
+        nb_content = await self._run_notary(self._sign_notebook, content, path)
+        try:
+            return await self.file_api.write_file(path, nb_content, self.cs3_config.endpoint, format)
+
+        except FileConflictError as e:
+            self.log.info(u'Conflict saving: %s %s', path, e)
+            raise web.HTTPError(409, u'File %s was changed by another writer' % path)
+
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
+
+        except Exception as e:
+            self.log.error(u'Error saving: %s %s', path, e)
+            raise web.HTTPError(400, u'Error saving %s: %s' % (path, e))
+
+    async def _save_directory(self, path):
+
+        if await self.is_hidden(path) and not self.allow_hidden:
+            raise web.HTTPError(400, u'Cannot create hidden directory %s' % path)
+
+        if await self._is_dir(path):
+            raise web.HTTPError(400, u'Directory %s already exists' % path)
+
+        if await self.file_exists(path):
+            raise web.HTTPError(400, u'Not a directory %s' % path)
+
+        await self.file_api.create_directory(path, self.cs3_config.endpoint)
+
+    async def _is_editor(self, file_info):
+        '''
+        This determines if the user can write to the file or not
+        (check permissions of the file, share and check if the file is locked)
+        '''
+        if not file_info:
+            return True
+
+        _, writable, _ = await self._open_file(file_info)
+        return writable
+
+    #
+    # Notebook hack - disable checkpoint
+    #
+    @request_scope
+    async def delete(self, path):
+        path = path.strip('/')
+        if not path:
+            raise web.HTTPError(400, "Can't delete root")
+        await self.delete_file(path)
+
+    @request_scope
+    async def rename(self, old_path, new_path):
+        await self.rename_file(old_path, new_path)
+
+    @request_scope
+    async def create_clone_file(self, path):
+        path_normalized = FileUtils.normalize_path(path)
+        path_normalized = FileUtils.check_and_transform_file_path(path_normalized)
+
+        file_info = await self._stat_file(path_normalized)
+
+        clone_file = await self.lock_api.resolve_file_path(path)
+        clone_file_exists = await self.file_exists(clone_file)
+        clone_file_created = False
+        clone_file_path = ""
+        if not clone_file_exists:
+            try:
+                file_content = await self._read_file(file_info)
+                clone_file_path = self._get_clone_path(clone_file)
+
+                await self.file_api.write_file(clone_file_path, file_content, self.cs3_config.endpoint, None)
+                self._forget_dir_models(clone_file_path)
+
+                clone_file_created = True
+            except Exception:
+                self.log.info('Could not create a clone file from original %s', path)
+
+        return {
+            'conflict_file_path': clone_file_path,
+            'conflict_file_created': clone_file_created
+        }
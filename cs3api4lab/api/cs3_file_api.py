@@ -5,6 +5,7 @@ CS3 File API for the JupyterLab Extension
 
 Authors:
 """
+import asyncio
 import http
 import time
 import urllib.parse
@@ -16,13 +17,18 @@ import cs3.rpc.v1beta1.code_pb2 as cs3code
 import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
 from google.protobuf.json_format import MessageToDict
 
-from cs3api4lab.exception.exceptions import ResourceNotFoundError
+from cs3api4lab.exception.exceptions import ResourceNotFoundError, FileConflictError
+from cs3api4lab.common.strings import Checksum
 
 from cs3api4lab.utils.file_utils import FileUtils
-from cs3api4lab.api.storage_api import StorageApi
+from cs3api4lab.utils.content_stream import ContentStream
+from cs3api4lab.utils.cache import TTLCache
+from cs3api4lab.api.storage_api import StorageApi, AsyncStorageApi
+from cs3api4lab.api.range_downloader import RangeDownloader
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.auth.channel_connector import ChannelConnector
+from cs3api4lab.auth.async_channel_connector import AsyncChannelConnector
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 from cs3api4lab.locks.factory import LockApiFactory
 
@@ -32,8 +38,9 @@ class Cs3FileApi:
     auth = None
     config = None
     lock_api = None
+    checksum_algorithms = Checksum.ALGORITHMS
 
-    def __init__(self, log):
+    def __init__(self, log, storage_api=None, lock_api=None):
         self.log = log
         self.config = Cs3ConfigManager().get_config()
         self.auth = Auth.get_authenticator(config=self.config, log=self.log)
@@ -41,28 +48,35 @@ class Cs3FileApi:
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
         intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
-        self.storage_api = StorageApi(log)
-        self.lock_api = LockApiFactory.create(log, self.config)
+        self.storage_api = storage_api or StorageApi(log)
+        self.lock_api = lock_api or LockApiFactory.create(log, self.config, self.storage_api)
+        # stats returned by write_file for the files written under a lock, so the next save of the file
+        # only has to keep the lock instead of statting and locking it again
+        self.written_stats = TTLCache(self.config.stat_cache_size, self.config.locks_expiration_time)
 
     def mount_point(self):
         """
         This returns current mount point for the user
         """
-        request = cs3sp.GetHomeRequest()
-        response = self.cs3_api.GetHome(request)
+        return self._get_mount_point(self.cs3_api.GetHome(cs3sp.GetHomeRequest()))
+
+    @staticmethod
+    def _get_mount_point(response):
         return {
             "path": response.path
         }
 
-    def stat_info(self, file_path, endpoint='/'):
+    def stat_info(self, file_path, endpoint='/', cached=True):
         """
         Stat a file and returns (size, mtime) as well as other extended info using the given userid as access token.
         Note that endpoint here means the storage id. Note that fileid can be either a path (which MUST begin with /)
-        or an id (which MUST NOT start with a /).
+        or an id (which MUST NOT start with a /). With cached=False the stat cache is bypassed.
         """
         time_start = time.time()
-        stat = self.storage_api.stat(file_path, endpoint)
+        stat = self.storage_api.stat(file_path, endpoint, cached)
+        return self._get_stat_info(file_path, stat, time_start)
 
+    def _get_stat_info(self, file_path, stat, time_start):
         if stat.status.code == cs3code.CODE_NOT_FOUND:
             self.log.info('msg="Failed stat" fileid="%s" reason="%s"' % (file_path, stat.status.message))
             raise FileNotFoundError(stat.status.message + ", file " + file_path)
@@ -84,97 +98,265 @@ class Cs3FileApi:
             'idp': stat.info.owner.idp,
             'permissions': stat.info.permission_set,
             'arbitrary_metadata': MessageToDict(stat.info.arbitrary_metadata),
+            'checksum': MessageToDict(stat.info.checksum),
+            'etag': stat.info.etag,
         }
 
     def read_file(self, stat, endpoint=None):
         """
         Read a file using the given userid as access token.
         """
-        if stat:
-            # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
-            if self.config.dev_env and "/home/" in stat['filepath']:
-                opaque_id = urllib.parse.unquote(stat['inode']['opaque_id'])
-                storage_id = urllib.parse.unquote(stat['inode']['storage_id'])
-                stat = self.stat_info(opaque_id, storage_id)
+        self._check_read_stat(stat)
+        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
+        if self._is_dev_home(stat):
+            stat = self._stat_by_id(stat)
 
-            try:
-                self.lock_api.set_lock(stat)
-            except IOError:
-                self.log.info("File %s locked, opening in read-only mode" % stat['filepath'])
+        try:
+            self.lock_api.set_lock(stat)
+        except IOError:
+            self.log.info("File %s locked, opening in read-only mode" % stat['filepath'])
+
+        init_file_download = self.storage_api.init_file_download(stat['filepath'], endpoint)
+        yield from self.download(init_file_download, stat['size'])
 
-        else:
-            msg = "%s: %s" % (stat.status.code, stat.status.message)
-            self.log.error('msg="Error when stating file for read" reason="%s"' % msg)
+    def _check_read_stat(self, stat):
+        if not stat:
+            self.log.error('msg="Error when stating file for read" reason="empty stat"')
             raise IOError('Error when stating file')
 
-        init_file_download = self.storage_api.init_file_download(stat['filepath'], endpoint)
+    def _is_dev_home(self, stat):
+        return self.config.dev_env and "/home/" in stat['filepath']
+
+    def download(self, init_file_download, size):
+        """
+        Downloads the content of an initiated download, without the locking done by read_file
+        """
+        return self._download(init_file_download, size, self.storage_api)
+
+    def _download(self, init_file_download, size, storage_api):
+        if self.config.download_parallelism > 1 and size > self.config.download_range_size:
+            downloader = RangeDownloader(self.log, self.config, storage_api)
+            try:
+                yield from downloader.download(init_file_download, size)
+            except requests.exceptions.RequestException as e:
+                self.log.error('msg="Exception when downloading file from Reva" reason="%s"' % e)
+                raise IOError(e)
+            return
+
         try:
-            file_get = self.storage_api.download_content(init_file_download)
+            file_get = storage_api.download_content(init_file_download, stream=True)
         except requests.exceptions.RequestException as e:
             self.log.error('msg="Exception when downloading file from Reva" reason="%s"' % e)
             raise IOError(e)
 
-        size = len(file_get.content)
-        chunk_size = self.config.chunk_size
-        for i in range(0, size, chunk_size):
-            yield file_get.content[i:i + self.config.chunk_size]
+        # the body is streamed, so only one chunk at a time is kept in memory
+        try:
+            if file_get.status_code != http.HTTPStatus.OK:
+                self.log.error('msg="Error downloading file from Reva" code="%d" reason="%s"' % (
+                    file_get.status_code, file_get.reason))
+                raise IOError(file_get.reason)
+
+            for chunk in file_get.iter_content(chunk_size=self.config.chunk_size):
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            self.log.error('msg="Exception when downloading file from Reva" reason="%s"' % e)
+            raise IOError(e)
+        finally:
+            file_get.close()
 
     def write_file(self, file_path, content, endpoint=None, format=None):
         """
         Write a file using the given userid as access token. The entire content is written
         and any pre-existing file is deleted (or moved to the previous version if supported).
+        The content can be bytes, str, a file-like object or a ContentStream, it is sent
+        to the data gateway chunk by chunk.
+        Returns the stat info of the written file.
         """
         time_start = time.time()
+        content = ContentStream.from_content(content, self.config.chunk_size)
+        stat = self._lock_for_write(file_path, endpoint)
 
-        stat = None
-        try:
-            stat = self.stat_info(file_path, endpoint)
-            if stat:
-                # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
-                if self.config.dev_env and "/home/" in stat['filepath']:
-                    opaque_id = urllib.parse.unquote(stat['inode']['opaque_id'])
-                    storage_id = urllib.parse.unquote(stat['inode']['storage_id'])
-                    stat = self.stat_info(opaque_id, storage_id)
-
-                # file_path = self.lock_manager.resolve_file_path(stat)
-        except Exception as e:
-            self.log.info('Creating new file %s', file_path)
-
-        if stat:
-            # fixme - this might cause overwriting/locking issues due to unexpected error codes
-            self.lock_api.set_lock(stat)
+        if self._is_unchanged(stat, content) and self._is_current_version(stat):
+            return self._skip_upload(file_path, stat, time_start)
 
         content_size = FileUtils.calculate_content_size(content, format)
-        init_file_upload = self.storage_api.init_file_upload(file_path, endpoint, content_size)
+        init_file_upload = self._init_file_upload(file_path, endpoint, content_size, stat)
 
         try:
             upload_response = self.storage_api.upload_content(file_path, content, content_size, init_file_upload)
-
         except requests.exceptions.RequestException as e:
             self.log.error('msg="Exception when uploading file to Reva" reason="%s"' % e)
             raise IOError(e)
+        finally:
+            self._invalidate_written(file_path, endpoint, stat)
 
-        time_end = time.time()
+        self._check_upload(file_path, upload_response, time_start)
+        return self._stat_written(file_path, endpoint, stat, content)
 
-        if upload_response.status_code != http.HTTPStatus.OK:
+    def _lock_for_write(self, file_path, endpoint):
+        """
+        Returns the stat of the file to be written, locked by this server (None for a new file).
+        A file written before under a lock that is kept is not stated again.
+        """
+        written_key = self._get_written_key(file_path, endpoint)
+        stat = self.written_stats.get(written_key)
+        if stat is not None and self.lock_api.keep_lock(stat):
+            return stat
+
+        try:
+            stat = self._stat_for_write(file_path, endpoint)
+            # file_path = self.lock_manager.resolve_file_path(stat)
+        except Exception:
+            self.log.info('Creating new file %s', file_path)
+            return None
+
+        # fixme - this might cause overwriting/locking issues due to unexpected error codes
+        self.lock_api.set_lock(stat)
+        self.written_stats.set(written_key, stat)
+        return stat
+
+    def _is_current_version(self, stat):
+        """
+        Whether the file is still at the version of the given stat, which may have been remembered from the last
+        write. The lock of this server does not keep other writers out (e.g. the metadata lock is advisory),
+        so the file is stated again before an upload is skipped.
+        """
+        try:
+            return self._is_same_version(stat, self._stat_by_id(stat, cached=False))
+        except FileNotFoundError:
+            return False
+
+    def _skip_upload(self, file_path, stat, time_start):
+        self.log.info('msg="File unchanged, upload skipped" filepath="%s" elapsedTimems="%.1f"' % (
+            file_path, (time.time() - time_start) * 1000))
+        return self._without_checksum(stat)
+
+    def _check_upload(self, file_path, upload_response, time_start):
+        if upload_response.status_code not in (http.HTTPStatus.OK, http.HTTPStatus.CREATED, http.HTTPStatus.NO_CONTENT):
             self.log.error(
                 'msg="Error uploading file to Reva" code="%d" reason="%s"' % (upload_response.status_code, upload_response.reason))
             raise IOError(upload_response.reason)
 
         self.log.info(
             'msg="File open for write" filepath="%s" elapsedTimems="%.1f"' % (
-                file_path, (time_end - time_start) * 1000))
+                file_path, (time.time() - time_start) * 1000))
+
+    def _stat_written(self, file_path, endpoint, stat, content):
+        """
+        Stats the written file and remembers the stat for the next write. The resource id is kept by the upload,
+        a stat by id returns the new size and mtime with the full path.
+        """
+        written_key = self._get_written_key(file_path, endpoint)
+        try:
+            stat = self._stat_by_id(stat) if stat else None
+        except FileNotFoundError:
+            stat = None  # the file was replaced by another resource in the meantime
+        if stat:
+            self.written_stats.set(written_key, self._with_checksum(stat, content))
+            return stat
+        self.written_stats.invalidate(written_key)
+        return self._stat_for_write(file_path, endpoint)
+
+    def _stat_for_write(self, file_path, endpoint):
+        stat = self.stat_info(file_path, endpoint)
+        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
+        if self._is_dev_home(stat):
+            stat = self._stat_by_id(stat)
+        return stat
+
+    def _stat_by_id(self, stat, cached=True):
+        return self.stat_info(*self._get_id_args(stat), cached)
+
+    @staticmethod
+    def _get_id_args(stat):
+        return urllib.parse.unquote(stat['inode']['opaque_id']), urllib.parse.unquote(stat['inode']['storage_id'])
+
+    def _init_file_upload(self, file_path, endpoint, content_size, stat):
+        """
+        Initiates the upload on condition that the file still has the etag of the given stat, so a concurrent
+        write is detected without an additional request. The etag also changes with the metadata (e.g. a lock),
+        so when it does not match the file is stated again and only a change of its content is a conflict.
+        """
+        if not stat or not stat['etag']:
+            return self.storage_api.init_file_upload(file_path, endpoint, content_size)
+        try:
+            return self.storage_api.init_file_upload(file_path, endpoint, content_size, stat['etag'])
+        except FileConflictError as e:
+            current = self._stat_by_id(stat, cached=False)
+            self._check_conflict(file_path, endpoint, stat, current, e)
+            return self.storage_api.init_file_upload(file_path, endpoint, content_size, current['etag'])
+
+    def _check_conflict(self, file_path, endpoint, stat, current, conflict):
+        if not self._is_same_version(stat, current):
+            self.written_stats.invalidate(self._get_written_key(file_path, endpoint))
+            raise conflict
+
+    @staticmethod
+    def _is_same_version(stat, current):
+        return (stat['size'], stat['mtime']) == (current['size'], current['mtime'])
+
+    def _invalidate_written(self, file_path, endpoint, stat):
+        self.storage_api.invalidate_stat(file_path, endpoint)
+        if stat:
+            self.storage_api.invalidate_stat_ref(FileUtils.get_reference(
+                urllib.parse.unquote(stat['inode']['opaque_id']), urllib.parse.unquote(stat['inode']['storage_id'])))
+
+    def _is_unchanged(self, stat, content):
+        """
+        Whether the file already has the given content: its checksum is compared with the one
+        of the resource, or with the one computed when the file was last written if the storage has none
+        """
+        if not stat or not content.repeatable or stat['size'] != len(content):
+            return False
+        algorithm = self.checksum_algorithms.get(stat['checksum'].get('type'))
+        if algorithm is not None:
+            return content.checksum(algorithm) == stat['checksum']['sum'].lower()
+        return '_local_checksum' in stat and content.checksum('sha1') == stat['_local_checksum']
+
+    def _with_checksum(self, stat, content):
+        """
+        The stat to be remembered for the next write. When the storage has no checksum, the sha1 of the written
+        content is kept under a private key, it is not the hash of the resource and is never returned.
+        """
+        if stat['checksum'].get('type') in self.checksum_algorithms or not content.repeatable:
+            return stat
+        return dict(stat, _local_checksum=content.checksum('sha1'))
+
+    @staticmethod
+    def _without_checksum(stat):
+        return {key: value for key, value in stat.items() if key != '_local_checksum'}
+
+    @staticmethod
+    def _get_written_key(file_path, endpoint):
+        ref = FileUtils.get_reference(file_path, endpoint)
+        return ref.path, ref.resource_id.storage_id, ref.resource_id.opaque_id
+
+    def _forget_written(self, *refs):
+        """
+        Drops the remembered stats of the given resources and of everything below them, after a remove or move
+        """
+        paths = {ref.path for ref in refs if ref.path}
+        prefixes = tuple(path.rstrip('/') + '/' for path in paths)
+        ids = {(ref.resource_id.storage_id, ref.resource_id.opaque_id) for ref in refs if not ref.path}
 
-        return file_path
+        def matches(key, stat):
+            return key[0] in paths or key[0].startswith(prefixes) or key[1:] in ids or \
+                (stat['inode']['storage_id'], stat['inode']['opaque_id']) in ids or \
+                stat['filepath'] in paths or stat['filepath'].startswith(prefixes)
+
+        self.written_stats.invalidate_if(matches)
 
     def remove(self, file_path, endpoint=None):
         """
         Remove a file or container using the given userid as access token.
         """
-
         reference = FileUtils.get_reference(file_path, endpoint)
-        req = cs3sp.DeleteRequest(ref=reference)
-        res = self.cs3_api.Delete(request=req, metadata=[('x-access-token', self.auth.authenticate())])
+        res = self.cs3_api.Delete(request=cs3sp.DeleteRequest(ref=reference), metadata=self._get_token())
+        self._check_removed(file_path, reference, res)
+
+    def _check_removed(self, file_path, reference, res):
+        self.storage_api.invalidate_stat_ref(reference)
+        self._forget_written(reference)
 
         if res.status.code == cs3code.CODE_NOT_FOUND:
             self.log.info('msg="File or folder not found on remove" filepath="%s"' % file_path)
@@ -191,10 +373,11 @@ class Cs3FileApi:
         Read a directory.
         """
         tstart = time.time()
-        reference = FileUtils.get_reference(path, endpoint)
-        req = cs3sp.ListContainerRequest(ref=reference)
-        res = self.cs3_api.ListContainer(request=req, metadata=[('x-access-token', self.auth.authenticate())])
+        req = cs3sp.ListContainerRequest(ref=FileUtils.get_reference(path, endpoint))
+        res = self.cs3_api.ListContainer(request=req, metadata=self._get_token())
+        return self._get_directory_infos(path, res, tstart)
 
+    def _get_directory_infos(self, path, res, tstart):
         if res.status.code == cs3code.CODE_NOT_FOUND:
             raise ResourceNotFoundError(f"directory {path} not found")
 
@@ -218,18 +401,25 @@ class Cs3FileApi:
         Move a file or container.
         """
         tstart = time.time()
-        src_reference = FileUtils.get_reference(source_path, endpoint)
-        dest_reference = FileUtils.get_reference(destination_path, endpoint)
-
         # fixme - this might cause overwriting issues due to unexpected error codes
         stat = self.storage_api.stat(destination_path, endpoint)
-        if stat.status.code == cs3code.CODE_OK:
+        req = self._get_move_request(source_path, destination_path, endpoint, stat)
+        res = self.cs3_api.Move(request=req, metadata=self._get_token())
+        self._check_moved(source_path, destination_path, req, res, tstart)
+
+    def _get_move_request(self, source_path, destination_path, endpoint, destination_stat):
+        if destination_stat.status.code == cs3code.CODE_OK:
             self.log.error('msg="Failed to move" source="%s" destination="%s" reason="%s"' % (
                 source_path, destination_path, "file already exists"))
             raise IOError("file already exists")
 
-        req = cs3sp.MoveRequest(source=src_reference, destination=dest_reference)
-        res = self.cs3_api.Move(request=req, metadata=[('x-access-token', self.auth.authenticate())])
+        return cs3sp.MoveRequest(source=FileUtils.get_reference(source_path, endpoint),
+                                 destination=FileUtils.get_reference(destination_path, endpoint))
+
+    def _check_moved(self, source_path, destination_path, req, res, tstart):
+        self.storage_api.invalidate_stat_ref(req.source)
+        self.storage_api.invalidate_stat_ref(req.destination)
+        self._forget_written(req.source, req.destination)
 
         if res.status.code == cs3code.CODE_NOT_FOUND:
             raise ResourceNotFoundError(f"source {source_path} not found")
@@ -249,8 +439,12 @@ class Cs3FileApi:
         """
         tstart = time.time()
         reference = FileUtils.get_reference(path, endpoint)
-        req = cs3sp.CreateContainerRequest(ref=reference)
-        res = self.cs3_api.CreateContainer(request=req, metadata=[('x-access-token', self.auth.authenticate())])
+        res = self.cs3_api.CreateContainer(request=cs3sp.CreateContainerRequest(ref=reference),
+                                           metadata=self._get_token())
+        self._check_created_directory(path, reference, res, tstart)
+
+    def _check_created_directory(self, path, reference, res, tstart):
+        self.storage_api.invalidate_stat_ref(reference)
 
         if res.status.code != cs3code.CODE_OK:
             self.log.warning('msg="Failed to create container" filepath="%s" reason="%s"' % (path, res.status.message))
@@ -260,7 +454,6 @@ class Cs3FileApi:
         self.log.debug(
             'msg="Invoked create container" filepath="%s" elapsedTimems="%.1f"' % (path, (tend - tstart) * 1000))
 
-
     def get_home_dir(self):
         return self.config.home_dir if self.config.home_dir else ""
 
@@ -269,3 +462,172 @@ class Cs3FileApi:
         raise Exception("Incorrect server response: " +
                         response.status.message)
 
+    def _get_token(self):
+        return [('x-access-token', self.auth.authenticate())]
+
+
+class AsyncCs3FileApi(Cs3FileApi):
+    """
+    Cs3FileApi on a grpc.aio channel. The uploads and downloads go through transfer_api,
+    a blocking StorageApi, in the default executor.
+    """
+    transfer_api = None
+
+    def __init__(self, log, storage_api=None, lock_api=None, transfer_api=None):
+        self.log = log
+        self.config = Cs3ConfigManager().get_config()
+        self.auth = Auth.get_authenticator(config=self.config, log=self.log)
+        self.cs3_api = cs3gw_grpc.GatewayAPIStub(AsyncChannelConnector.get_channel(log))
+        self.storage_api = storage_api or AsyncStorageApi(log)
+        self.lock_api = lock_api or LockApiFactory.create_async(log, self.config, self.storage_api)
+        self.transfer_api = transfer_api or StorageApi(log)
+        self.written_stats = TTLCache(self.config.stat_cache_size, self.config.locks_expiration_time)
+
+    async def mount_point(self):
+        return self._get_mount_point(await self.cs3_api.GetHome(cs3sp.GetHomeRequest()))
+
+    async def stat_info(self, file_path, endpoint='/', cached=True):
+        time_start = time.time()
+        stat = await self.storage_api.stat(file_path, endpoint, cached)
+        return self._get_stat_info(file_path, stat, time_start)
+
+    async def read_file(self, stat, endpoint=None):
+        self._check_read_stat(stat)
+        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
+        if self._is_dev_home(stat):
+            stat = await self._stat_by_id(stat)
+
+        try:
+            await self.lock_api.set_lock(stat)
+        except IOError:
+            self.log.info("File %s locked, opening in read-only mode" % stat['filepath'])
+
+        init_file_download = await self.storage_api.init_file_download(stat['filepath'], endpoint)
+        async for chunk in self.download(init_file_download, stat['size']):
+            yield chunk
+
+    async def download(self, init_file_download, size):
+        loop = asyncio.get_running_loop()
+        chunks = self._download(init_file_download, size, self.transfer_api)
+        next_chunk = None
+        try:
+            while True:
+                # shielded, so a cancelled read still waits for the chunk before the download is closed
+                next_chunk = loop.run_in_executor(None, next, chunks, None)
+                chunk = await asyncio.shield(next_chunk)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            if next_chunk is not None and not next_chunk.done():
+                await asyncio.wait([next_chunk])
+            await loop.run_in_executor(None, chunks.close)
+
+    async def write_file(self, file_path, content, endpoint=None, format=None):
+        time_start = time.time()
+        content = ContentStream.from_content(content, self.config.chunk_size)
+        stat = await self._lock_for_write(file_path, endpoint)
+
+        loop = asyncio.get_running_loop()
+        # the content is read to compute its checksum, which is done in the executor
+        if await loop.run_in_executor(None, self._is_unchanged, stat, content) \
+                and await self._is_current_version(stat):
+            return self._skip_upload(file_path, stat, time_start)
+
+        content_size = FileUtils.calculate_content_size(content, format)
+        init_file_upload = await self._init_file_upload(file_path, endpoint, content_size, stat)
+
+        try:
+            upload_response = await loop.run_in_executor(
+                None, self.transfer_api.upload_content, file_path, content, content_size, init_file_upload)
+        except requests.exceptions.RequestException as e:
+            self.log.error('msg="Exception when uploading file to Reva" reason="%s"' % e)
+            raise IOError(e)
+        finally:
+            self._invalidate_written(file_path, endpoint, stat)
+
+        self._check_upload(file_path, upload_response, time_start)
+        return await self._stat_written(file_path, endpoint, stat, content)
+
+    async def _lock_for_write(self, file_path, endpoint):
+        written_key = self._get_written_key(file_path, endpoint)
+        stat = self.written_stats.get(written_key)
+        if stat is not None and await self.lock_api.keep_lock(stat):
+            return stat
+
+        try:
+            stat = await self._stat_for_write(file_path, endpoint)
+        except Exception:
+            self.log.info('Creating new file %s', file_path)
+            return None
+
+        await self.lock_api.set_lock(stat)
+        self.written_stats.set(written_key, stat)
+        return stat
+
+    async def _is_current_version(self, stat):
+        try:
+            return self._is_same_version(stat, await self._stat_by_id(stat, cached=False))
+        except FileNotFoundError:
+            return False
+
+    async def _stat_written(self, file_path, endpoint, stat, content):
+        written_key = self._get_written_key(file_path, endpoint)
+        try:
+            stat = await self._stat_by_id(stat) if stat else None
+        except FileNotFoundError:
+            stat = None
+        if stat:
+            self.written_stats.set(written_key, await asyncio.get_running_loop().run_in_executor(
+                None, self._with_checksum, stat, content))
+            return stat
+        self.written_stats.invalidate(written_key)
+        return await self._stat_for_write(file_path, endpoint)
+
+    async def _stat_for_write(self, file_path, endpoint):
+        stat = await self.stat_info(file_path, endpoint)
+        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
+        if self._is_dev_home(stat):
+            stat = await self._stat_by_id(stat)
+        return stat
+
+    async def _stat_by_id(self, stat, cached=True):
+        return await self.stat_info(*self._get_id_args(stat), cached)
+
+    async def _init_file_upload(self, file_path, endpoint, content_size, stat):
+        if not stat or not stat['etag']:
+            return await self.storage_api.init_file_upload(file_path, endpoint, content_size)
+        try:
+            return await self.storage_api.init_file_upload(file_path, endpoint, content_size, stat['etag'])
+        except FileConflictError as e:
+            current = await self._stat_by_id(stat, cached=False)
+            self._check_conflict(file_path, endpoint, stat, current, e)
+            return await self.storage_api.init_file_upload(file_path, endpoint, content_size, current['etag'])
+
+    async def remove(self, file_path, endpoint=None):
+        reference = FileUtils.get_reference(file_path, endpoint)
+        res = await self.cs3_api.Delete(request=cs3sp.DeleteRequest(ref=reference), metadata=await self._get_token())
+        self._check_removed(file_path, reference, res)
+
+    async def read_directory(self, path, endpoint=None):
+        tstart = time.time()
+        req = cs3sp.ListContainerRequest(ref=FileUtils.get_reference(path, endpoint))
+        res = await self.cs3_api.ListContainer(request=req, metadata=await self._get_token())
+        return self._get_directory_infos(path, res, tstart)
+
+    async def move(self, source_path, destination_path, endpoint=None):
+        tstart = time.time()
+        stat = await self.storage_api.stat(destination_path, endpoint)
+        req = self._get_move_request(source_path, destination_path, endpoint, stat)
+        res = await self.cs3_api.Move(request=req, metadata=await self._get_token())
+        self._check_moved(source_path, destination_path, req, res, tstart)
+
+    async def create_directory(self, path, endpoint=None):
+        tstart = time.time()
+        reference = FileUtils.get_reference(path, endpoint)
+        res = await self.cs3_api.CreateContainer(request=cs3sp.CreateContainerRequest(ref=reference),
+                                                 metadata=await self._get_token())
+        self._check_created_directory(path, reference, res, tstart)
+
+    async def _get_token(self):
+        return [('x-access-token', await self.auth.async_authenticate())]
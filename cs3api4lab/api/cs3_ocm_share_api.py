@@ -14,6 +14,7 @@ import grpc
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.share_index import ShareIndex
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 from cs3api4lab.auth.channel_connector import ChannelConnector
 
@@ -33,11 +34,11 @@ from cs3.storage.provider.v1beta1.resources_pb2 import *
 
 class Cs3OcmShareApi:
 
-    def __init__(self, log):
+    def __init__(self, log, file_api=None):
         self.log = log
         self.config = Cs3ConfigManager().get_config()
         self.auth = Auth.get_authenticator(config=self.config, log=self.log)
-        self.file_api = Cs3FileApi(log)
+        self.file_api = file_api or Cs3FileApi(log)
         channel = ChannelConnector().get_channel()
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
         intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
@@ -45,6 +46,7 @@ class Cs3OcmShareApi:
         self.public_share_api = link_api_grpc.LinkAPIStub(channel)
         self.ocm_share_api = ocm_api_grpc.OcmAPIStub(channel)
         self.provider_api = ocm_provider_api_grpc.ProviderAPIStub(channel)
+        self.share_index = ShareIndex.get_index()
         return
 
     def create(self, opaque_id, idp, domain, endpoint, file_path, grantee_type=GRANTEE_TYPE_USER, role=Role.EDITOR, reshare=True):
@@ -77,6 +79,7 @@ class Cs3OcmShareApi:
         elif not self._is_code_ok(response):
             self._handle_error(response, "Error creating OCM share")
 
+        self.share_index.add(self._get_user(), ShareIndex.OCM, response.share)
         self.log.info("OCM share created:\n")
         return self._map_share(response.share)
 
@@ -88,9 +91,11 @@ class Cs3OcmShareApi:
                                                      metadata=self._token())
 
         if response.status.code == cs3_code.CODE_NOT_FOUND:
+            self.share_index.remove(self._get_user(), share_id)
             raise ShareNotFoundError(f"ocm share {share_id} not found")
         elif not self._is_code_ok(response):
             self._handle_error(response, "Error removing OCM share")
+        self.share_index.remove(self._get_user(), share_id)
         self.log.info("OCM share deleted: " + share_id)
 
     def update(self, share_id, field, value):
@@ -150,6 +155,12 @@ class Cs3OcmShareApi:
 
         if not self._is_code_ok(response):
             self._handle_error(response, "Error listing OCM share:")
+
+        if file_path is None:
+            self.share_index.replace_all(self._get_user(), ShareIndex.OCM, response.shares)
+        else:
+            for share in response.shares:
+                self.share_index.add(self._get_user(), ShareIndex.OCM, share)
         return response
 
     def get(self, share_id):
@@ -163,6 +174,7 @@ class Cs3OcmShareApi:
         elif response.status.code != cs3_code.CODE_OK:
             self._handle_error(response)
 
+        self.share_index.add(self._get_user(), ShareIndex.OCM, response.share)
         return self._map_share(response.share)
 
     def get_received_ocm_shares(self, share_id):
@@ -178,6 +190,7 @@ class Cs3OcmShareApi:
         if not self._is_code_ok(response):
             self._handle_error(response, "Error listing OCM received shares:")
 
+        self.share_index.replace_all(self._get_user(), ShareIndex.OCM_RECEIVED, response.shares)
         return response
 
     def get_received_share(self, share_id):
@@ -191,6 +204,7 @@ class Cs3OcmShareApi:
         elif response.status.code != cs3_code.CODE_OK:
             self._handle_error(response)
 
+        self.share_index.add(self._get_user(), ShareIndex.OCM_RECEIVED, response.share)
         return self._map_share(response.share.share, response.share.state)
 
     def _share_filter_by_resource(self, path):
@@ -263,6 +277,9 @@ class Cs3OcmShareApi:
         if role == Role.EDITOR:
             return '15'
 
+    def _get_user(self):
+        return self.auth.config.client_id
+
     def _is_code_ok(self, response):
         return response.status.code == cs3_code.CODE_OK
 
@@ -28,11 +28,11 @@ from cs3api4lab.auth.channel_connector import ChannelConnector
 
 class Cs3PublicShareApi:
 
-    def __init__(self, log):
+    def __init__(self, log, file_api=None):
         self.log = log
         self.config = Cs3ConfigManager().get_config()
         self.auth = Auth.get_authenticator(config=self.config, log=self.log)
-        self.file_api = Cs3FileApi(log)
+        self.file_api = file_api or Cs3FileApi(log)
         channel = ChannelConnector().get_channel()
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
         intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
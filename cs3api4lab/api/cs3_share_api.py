@@ -15,10 +15,9 @@ import cs3.identity.user.v1beta1.resources_pb2 as identity_res
 import cs3.rpc.v1beta1.code_pb2 as cs3_code
 import grpc
 
-from tornado import escape
-
-from cs3api4lab.api.storage_api import StorageApi
-from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.storage_api import StorageApi, AsyncStorageApi
+from cs3api4lab.api.cs3_file_api import Cs3FileApi, AsyncCs3FileApi
+from cs3api4lab.api.share_index import ShareIndex
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.utils.file_utils import FileUtils
@@ -26,6 +25,7 @@ from cs3api4lab.common.strings import State, Grantee, Role
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 import cs3.gateway.v1beta1.gateway_api_pb2_grpc as grpc_gateway
 from cs3api4lab.auth.channel_connector import ChannelConnector
+from cs3api4lab.auth.async_channel_connector import AsyncChannelConnector
 from cs3api4lab.exception.exceptions import ShareError, ShareAlreadyExistsError, ShareNotFoundError
 from cs3api4lab.exception.exceptions import InvalidTypeError, ResourceNotFoundError
 from cs3api4lab.utils.share_utils import ShareUtils
@@ -39,7 +39,7 @@ class Cs3ShareApi:
     auth = None
     config = {}
 
-    def __init__(self, log):
+    def __init__(self, log, file_api=None, storage_api=None):
         self.log = log
         self.config = Cs3ConfigManager().get_config()
         self.auth = Auth.get_authenticator(config=self.config, log=self.log)
@@ -48,20 +48,24 @@ class Cs3ShareApi:
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
         intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
         self.cs3_api = grpc_gateway.GatewayAPIStub(intercept_channel)
-        self.file_api = Cs3FileApi(log)
-        self.storage_api = StorageApi(log)
+        self.storage_api = storage_api or StorageApi(log)
+        self.file_api = file_api or Cs3FileApi(log, self.storage_api)
+        self.share_index = ShareIndex.get_index()
 
 
     def create(self, endpoint, file_path, grantee, idp, role, grantee_type):
-        share_permissions = self._get_share_permissions(role)
-        grantee_type_enum = self._get_grantee_type(grantee_type)
-        share_grant = self._get_share_grant(grantee_type_enum, share_permissions, idp, grantee)
+        share_grant = self._get_create_grant(role, grantee_type, idp, grantee)
         resource_info = self._get_resource_info(endpoint, file_path)
         create_request = sharing.CreateShareRequest(resource_info=resource_info, grant=share_grant)
-        token = self.auth.authenticate()
-        create_response = self.cs3_api.CreateShare(request=create_request,
-                                                   metadata=[('x-access-token', token)])
+        create_response = self.cs3_api.CreateShare(request=create_request, metadata=self._get_token())
+        return self._get_created_share(endpoint, file_path, grantee, idp, create_response)
+
+    def _get_create_grant(self, role, grantee_type, idp, grantee):
+        share_permissions = self._get_share_permissions(role)
+        grantee_type_enum = self._get_grantee_type(grantee_type)
+        return self._get_share_grant(grantee_type_enum, share_permissions, idp, grantee)
 
+    def _get_created_share(self, endpoint, file_path, grantee, idp, create_response):
         if create_response.status.code == cs3_code.CODE_NOT_FOUND:
             self.log.error(f"Resource {file_path} not found")
             raise ResourceNotFoundError(f"Resource {file_path} not found")
@@ -72,17 +76,25 @@ class Cs3ShareApi:
         elif not self._is_code_ok(create_response):
             self._handle_error(create_response)
 
+        self.share_index.add(self._get_user(), ShareIndex.REGULAR, create_response.share)
         return self._map_given_share(create_response.share)
 
     def list(self, file_path=None):
         list_request = self._share_filter_by_resource(file_path)
-        list_response = self.cs3_api.ListShares(request=list_request,
-                                                metadata=[('x-access-token', self.auth.authenticate())])
+        list_response = self.cs3_api.ListShares(request=list_request, metadata=self._get_token())
+        return self._get_listed_shares(file_path, list_response)
 
+    def _get_listed_shares(self, file_path, list_response):
         if not self._is_code_ok(list_response):
             self.log.error("Error listing shares response for user: " + self.config.client_id)
             self._handle_error(list_response)
 
+        if file_path is None:
+            self.share_index.replace_all(self._get_user(), ShareIndex.REGULAR, list_response.shares)
+        else:
+            for share in list_response.shares:
+                self.share_index.add(self._get_user(), ShareIndex.REGULAR, share)
+
         self.log.debug(f"List shares response for user {self.config.client_id}:\n{list_response}")
         return list_response
 
@@ -91,88 +103,97 @@ class Cs3ShareApi:
         :param file_path: path to the file
         :return: list of grantees
         """
-        share_list = self.list()
+        # the shares are filtered by the resource id on the server
+        try:
+            share_list = self.list(FileUtils.normalize_path(file_path))
+        except FileNotFoundError:
+            return []
 
-        file_path = ShareUtils.purify_file_path(file_path, self.config.client_id)
-        shares = []
-        for share in share_list.shares:
-            path = ShareUtils.purify_file_path(share.resource_id.opaque_id, self.config.client_id)
-            if file_path == escape.url_unescape(path):
-                shares.append(ShareUtils.get_share_info(share))
+        return self._get_shares_info(share_list)
 
-        return shares
+    @staticmethod
+    def _get_shares_info(share_list):
+        return [ShareUtils.get_share_info(share) for share in share_list.shares]
 
     def get(self, opaque_id):
-        share_id = sharing_res.ShareId(opaque_id=opaque_id)
-        ref = sharing_res.ShareReference(id=share_id)
-        request = sharing.GetShareRequest(ref=ref)
-        share = self.cs3_api.GetShare(request, metadata=[('x-access-token', self.auth.authenticate())])
+        share = self.cs3_api.GetShare(sharing.GetShareRequest(ref=self._get_share_reference(opaque_id)),
+                                      metadata=self._get_token())
+        return self._get_share(opaque_id, share)
 
+    def _get_share(self, opaque_id, share):
         if self._is_code_ok(share):
+            self.share_index.add(self._get_user(), ShareIndex.REGULAR, share.share)
             return share
         else:
             self.log.error(f"Error getting share for opaque_id {opaque_id}")
             raise ShareNotFoundError(f"Error getting share for opaque_id {opaque_id}")
 
     def remove(self, share_id):
-        share_id_object = sharing_res.ShareId(opaque_id=share_id)
-        ref = sharing_res.ShareReference(id=share_id_object)
-        remove_request = sharing.RemoveShareRequest(ref=ref)
-        remove_response = self.cs3_api.RemoveShare(request=remove_request,
-                                                   metadata=[('x-access-token', self.auth.authenticate())])
+        remove_request = sharing.RemoveShareRequest(ref=self._get_share_reference(share_id))
+        remove_response = self.cs3_api.RemoveShare(request=remove_request, metadata=self._get_token())
+        self._check_removed(share_id, remove_response)
 
+    @staticmethod
+    def _get_share_reference(share_id):
+        return sharing_res.ShareReference(id=sharing_res.ShareId(opaque_id=share_id))
+
+    def _check_removed(self, share_id, remove_response):
         if remove_response.status.code == cs3_code.CODE_NOT_FOUND:
+            self.share_index.remove(self._get_user(), share_id)
             raise ShareNotFoundError("Error removing share with ID: " + share_id)
         elif not self._is_code_ok(remove_response):
             self._handle_error(remove_response)
 
+        self.share_index.remove(self._get_user(), share_id)
         self.log.info("Successfully removed share with ID: " + share_id)
         self.log.info(remove_response)
 
     def update(self, share_id, role):
+        update_response = self.cs3_api.UpdateShare(request=self._get_update_request(share_id, role),
+                                                   metadata=self._get_token())
+        self._check_updated(share_id, role, update_response)
+
+    def _get_update_request(self, share_id, role):
         share_permissions = self._get_share_permissions(role)
-        share_id_object = sharing_res.ShareId(opaque_id=share_id)
-        ref = sharing_res.ShareReference(id=share_id_object)
-        update_request = sharing.UpdateShareRequest(ref=ref,
-                                                    field=sharing.UpdateShareRequest.UpdateField(
-                                                        permissions=share_permissions))
-        update_response = self.cs3_api.UpdateShare(request=update_request,
-                                                   metadata=[('x-access-token', self.auth.authenticate())])
+        return sharing.UpdateShareRequest(ref=self._get_share_reference(share_id),
+                                          field=sharing.UpdateShareRequest.UpdateField(
+                                              permissions=share_permissions))
+
+    def _check_updated(self, share_id, role, update_response):
         if update_response.status.code == cs3_code.CODE_NOT_FOUND:
             raise ShareNotFoundError("Error updating share: " + share_id)
         elif not self._is_code_ok(update_response):
             self._handle_error(update_response)
 
+        if update_response.HasField('share'):
+            self.share_index.add(self._get_user(), ShareIndex.REGULAR, update_response.share)
         self.log.info("Successfully updated share: " + share_id + " with role: " + role)
         self.log.info(update_response)
 
     def get_share_received(self, path):
-        share_filters = []
         stat = self.storage_api.stat(path, self.config.endpoint)
 
-        if stat.status.code == cs3_code.CODE_NOT_FOUND or stat.status.code == cs3_code.CODE_INTERNAL:
+        if self._is_stat_missing(stat):
             return None
 
-        # fix opaque_id on local/localhome driver
-        opaque_id = urllib.parse.unquote(stat.info.id.opaque_id)
-        storage_id = urllib.parse.unquote(stat.info.id.storage_id)
-
-        # remove after https://github.com/cs3org/reva/issues/3243 is fixed
-        opaque_id = FileUtils.fix_dev_opaque(opaque_id, self.config.dev_env)
+        return self.get_share_received_by_stat(self._get_file_stat(stat))
 
-        resource = storage_resources.ResourceId(
-            storage_id=storage_id,
-            opaque_id=opaque_id
-        )
-        share_filters.append(sharing_res.Filter(
-            resource_id=resource,
-            type=sharing_res.Filter.Type.TYPE_RESOURCE_ID
-        ))
+    @staticmethod
+    def _is_stat_missing(stat):
+        return stat.status.code == cs3_code.CODE_NOT_FOUND or stat.status.code == cs3_code.CODE_INTERNAL
 
+    def get_share_received_by_stat(self, file_stat):
+        """
+        Same as get_share_received, for a file that was already stated
+        """
         list_response = self.cs3_api.ListReceivedShares(
-            request=sharing.ListReceivedSharesRequest(filters=share_filters),
-            metadata=[('x-access-token', self.auth.authenticate())]
+            request=sharing.ListReceivedSharesRequest(filters=self._get_resource_filters(file_stat)),
+            metadata=self._get_token()
         )
+        return self._get_received_by_stat(list_response)
+
+    @staticmethod
+    def _get_received_by_stat(list_response):
         share = None
         if len(list_response.shares):
             share = list_response.shares.pop().share
@@ -181,16 +202,38 @@ class Cs3ShareApi:
     def list_received(self, path=None):
         self.log.info("Listing received shares")
         list_request = self._shares_received_filter_by_resource(path)
-        list_response = self.cs3_api.ListReceivedShares(request=list_request,
-                                                        metadata=[('x-access-token', self.auth.authenticate())])
+        list_response = self.cs3_api.ListReceivedShares(request=list_request, metadata=self._get_token())
+        return self._get_listed_received(path, list_response)
 
+    def _get_listed_received(self, path, list_response):
         if not self._is_code_ok(list_response):
             self.log.error("Error retrieving received shares for user: " + self.config.client_id)
             self._handle_error(list_response)
 
+        if path is None:
+            self.share_index.replace_all(self._get_user(), ShareIndex.RECEIVED, list_response.shares)
+        else:
+            for share in list_response.shares:
+                self.share_index.add(self._get_user(), ShareIndex.RECEIVED, share)
+
         self.log.debug(f"Retrieved received shares for user {self.config.client_id}:\n{list_response}")
         return list_response
 
+    def get_received(self, share_id):
+        response = self.cs3_api.GetReceivedShare(
+            request=sharing.GetReceivedShareRequest(ref=self._get_share_reference(share_id)),
+            metadata=self._get_token())
+        return self._get_received(share_id, response)
+
+    def _get_received(self, share_id, response):
+        if response.status.code == cs3_code.CODE_NOT_FOUND:
+            raise ShareNotFoundError(f"Received share {share_id} not found")
+        elif not self._is_code_ok(response):
+            self._handle_error(response)
+
+        self.share_index.add(self._get_user(), ShareIndex.RECEIVED, response.share)
+        return response.share
+
     def _share_filter_by_resource(self, path):
         """
         This method is designed to filter by resource_id (opaque_id, storage_id)
@@ -204,6 +247,13 @@ class Cs3ShareApi:
             return sharing.ListSharesRequest()
 
         file_stat = self.file_api.stat_info(path)
+        return sharing.ListSharesRequest(filters=self._get_resource_filters(file_stat))
+
+    @staticmethod
+    def _get_file_stat(stat):
+        return {'inode': {'opaque_id': stat.info.id.opaque_id, 'storage_id': stat.info.id.storage_id}}
+
+    def _get_resource_filters(self, file_stat):
         opaque_id = urllib.parse.unquote(file_stat['inode']['opaque_id'])
         storage_id = urllib.parse.unquote(file_stat['inode']['storage_id'])
 
@@ -220,8 +270,7 @@ class Cs3ShareApi:
             resource_id=resource,
             type=sharing_res.Filter.Type.TYPE_RESOURCE_ID
         ))
-
-        return sharing.ListSharesRequest(filters=share_filters)
+        return share_filters
 
     def _shares_received_filter_by_resource(self, path):
         if path is None:
@@ -232,23 +281,7 @@ class Cs3ShareApi:
         except FileNotFoundError:
             return sharing.ListReceivedSharesRequest()
 
-        opaque_id = urllib.parse.unquote(file_stat['inode']['opaque_id'])
-        storage_id = urllib.parse.unquote(file_stat['inode']['storage_id'])
-
-        # remove after https://github.com/cs3org/reva/issues/3243 is fixed
-        opaque_id = FileUtils.fix_dev_opaque(opaque_id, self.config.dev_env)
-
-        resource = storage_resources.ResourceId(
-            storage_id=storage_id,
-            opaque_id=opaque_id
-        )
-
-        share_filters = []
-        share_filters.append(sharing_res.Filter(
-            resource_id=resource,
-            type=sharing_res.Filter.Type.TYPE_RESOURCE_ID
-        ))
-        return sharing.ListReceivedSharesRequest(filters=share_filters)
+        return sharing.ListReceivedSharesRequest(filters=self._get_resource_filters(file_stat))
 
     def _map_given_share(self, share):
         share_mapped = {
@@ -291,35 +324,35 @@ class Cs3ShareApi:
 
     def update_received(self, share_id, state=State.ACCEPTED):
         share_state = ShareUtils.string_to_state(state)
-        list_request = sharing.ListReceivedSharesRequest()
-        list_response = self.cs3_api.ListReceivedShares(request=list_request,
-                                                        metadata=[('x-access-token', self.auth.authenticate())])
-        share_to_update = None
-        for share in list_response.shares:
-            if share_id == share.share.id.opaque_id:
-                share_to_update = share
-        if not share_to_update:
-            raise ShareNotFoundError(f"Received share {share_id} not found")
+        share_to_update = self.share_index.get(self._get_user(), share_id, ShareIndex.RECEIVED)
+        if share_to_update is None:
+            share_to_update = self.get_received(share_id)
 
-        update_request = sharing.UpdateReceivedShareRequest(
-            share=sharing_res.ReceivedShare(
-                share=share_to_update.share,
-                state=share_state,
-                mount_point=FileUtils.get_reference(share_to_update.share.resource_id.opaque_id,
-                                                    share_to_update.share.resource_id.storage_id)),
-            update_mask=field_masks.FieldMask(paths=["state"])
-        )
+        update_request = self._get_update_received_request(share_to_update, share_state)
+        update_response = self.cs3_api.UpdateReceivedShare(request=update_request, metadata=self._get_token())
+        return self._get_updated_received(share_id, state, update_response)
 
-        update_response = self.cs3_api.UpdateReceivedShare(request=update_request,
-                                                           metadata=[('x-access-token', self.auth.authenticate())])
+    def _get_updated_received(self, share_id, state, update_response):
         if not self._is_code_ok(update_response):
             self.log.error("Error updating received share: " + share_id + " with state " + state)
             self._handle_error(update_response)
 
+        if update_response.HasField('share'):
+            self.share_index.add(self._get_user(), ShareIndex.RECEIVED, update_response.share)
         self.log.info("Successfully updated share: " + share_id + " with state " + state)
         self.log.info(update_response)
         return update_response.share
 
+    def _get_update_received_request(self, share_to_update, share_state):
+        return sharing.UpdateReceivedShareRequest(
+            share=sharing_res.ReceivedShare(
+                share=share_to_update.share,
+                state=share_state,
+                mount_point=FileUtils.get_reference(share_to_update.share.resource_id.opaque_id,
+                                                    share_to_update.share.resource_id.storage_id)),
+            update_mask=field_masks.FieldMask(paths=["state"])
+        )
+
     def _resolve_share_permissions(self, share):
         has_move_permission = share.permissions.permissions.move is True
         has_delete_permission = share.permissions.permissions.delete is True
@@ -330,9 +363,10 @@ class Cs3ShareApi:
 
     def _get_resource_info(self, endpoint, file_id):
         ref = FileUtils.get_reference(file_id, endpoint)
-        stat_response = self.cs3_api.Stat(request=storage_provider.StatRequest(ref=ref),
-                                          metadata=[('x-access-token', self.auth.authenticate())])
+        stat_response = self.cs3_api.Stat(request=storage_provider.StatRequest(ref=ref), metadata=self._get_token())
+        return self._get_stat_resource_info(file_id, stat_response)
 
+    def _get_stat_resource_info(self, file_id, stat_response):
         if stat_response.status.code == cs3_code.CODE_NOT_FOUND:
             raise ResourceNotFoundError(f"Resource {file_id} not found")
         elif not self._is_code_ok(stat_response):
@@ -378,9 +412,131 @@ class Cs3ShareApi:
         else:
             raise InvalidTypeError("Invalid role")
 
+    def _get_user(self):
+        return self.auth.config.client_id
+
     def _is_code_ok(self, response):
         return response.status.code == cs3_code.CODE_OK
 
     def _handle_error(self, response):
         self.log.error(response)
         raise ShareError("Incorrect server response: " + response.status.message)
+
+    def _get_token(self):
+        return [('x-access-token', self.auth.authenticate())]
+
+
+class AsyncCs3ShareApi(Cs3ShareApi):
+    """
+    Cs3ShareApi on a grpc.aio channel, the shares are indexed together with the ones of Cs3ShareApi
+    """
+
+    def __init__(self, log, file_api=None, storage_api=None):
+        self.log = log
+        self.config = Cs3ConfigManager().get_config()
+        self.auth = Auth.get_authenticator(config=self.config, log=self.log)
+        self.cs3_api = grpc_gateway.GatewayAPIStub(AsyncChannelConnector.get_channel(log))
+        self.storage_api = storage_api or AsyncStorageApi(log)
+        self.file_api = file_api or AsyncCs3FileApi(log, self.storage_api)
+        self.share_index = ShareIndex.get_index()
+
+    async def create(self, endpoint, file_path, grantee, idp, role, grantee_type):
+        share_grant = self._get_create_grant(role, grantee_type, idp, grantee)
+        resource_info = await self._get_resource_info(endpoint, file_path)
+        create_request = sharing.CreateShareRequest(resource_info=resource_info, grant=share_grant)
+        create_response = await self.cs3_api.CreateShare(request=create_request, metadata=await self._get_token())
+        return self._get_created_share(endpoint, file_path, grantee, idp, create_response)
+
+    async def list(self, file_path=None):
+        list_request = await self._share_filter_by_resource(file_path)
+        list_response = await self.cs3_api.ListShares(request=list_request, metadata=await self._get_token())
+        return self._get_listed_shares(file_path, list_response)
+
+    async def list_shares_for_filepath(self, file_path):
+        try:
+            share_list = await self.list(FileUtils.normalize_path(file_path))
+        except FileNotFoundError:
+            return []
+
+        return self._get_shares_info(share_list)
+
+    async def get(self, opaque_id):
+        share = await self.cs3_api.GetShare(sharing.GetShareRequest(ref=self._get_share_reference(opaque_id)),
+                                            metadata=await self._get_token())
+        return self._get_share(opaque_id, share)
+
+    async def remove(self, share_id):
+        remove_request = sharing.RemoveShareRequest(ref=self._get_share_reference(share_id))
+        remove_response = await self.cs3_api.RemoveShare(request=remove_request, metadata=await self._get_token())
+        self._check_removed(share_id, remove_response)
+
+    async def update(self, share_id, role):
+        update_response = await self.cs3_api.UpdateShare(request=self._get_update_request(share_id, role),
+                                                         metadata=await self._get_token())
+        self._check_updated(share_id, role, update_response)
+
+    async def get_share_received(self, path):
+        stat = await self.storage_api.stat(path, self.config.endpoint)
+
+        if self._is_stat_missing(stat):
+            return None
+
+        return await self.get_share_received_by_stat(self._get_file_stat(stat))
+
+    async def get_share_received_by_stat(self, file_stat):
+        list_response = await self.cs3_api.ListReceivedShares(
+            request=sharing.ListReceivedSharesRequest(filters=self._get_resource_filters(file_stat)),
+            metadata=await self._get_token()
+        )
+        return self._get_received_by_stat(list_response)
+
+    async def list_received(self, path=None):
+        self.log.info("Listing received shares")
+        list_request = await self._shares_received_filter_by_resource(path)
+        list_response = await self.cs3_api.ListReceivedShares(request=list_request,
+                                                              metadata=await self._get_token())
+        return self._get_listed_received(path, list_response)
+
+    async def get_received(self, share_id):
+        response = await self.cs3_api.GetReceivedShare(
+            request=sharing.GetReceivedShareRequest(ref=self._get_share_reference(share_id)),
+            metadata=await self._get_token())
+        return self._get_received(share_id, response)
+
+    async def _share_filter_by_resource(self, path):
+        if path is None:
+            return sharing.ListSharesRequest()
+
+        file_stat = await self.file_api.stat_info(path)
+        return sharing.ListSharesRequest(filters=self._get_resource_filters(file_stat))
+
+    async def _shares_received_filter_by_resource(self, path):
+        if path is None:
+            return sharing.ListReceivedSharesRequest()
+
+        try:
+            file_stat = await self.file_api.stat_info(path)
+        except FileNotFoundError:
+            return sharing.ListReceivedSharesRequest()
+
+        return sharing.ListReceivedSharesRequest(filters=self._get_resource_filters(file_stat))
+
+    async def update_received(self, share_id, state=State.ACCEPTED):
+        share_state = ShareUtils.string_to_state(state)
+        share_to_update = self.share_index.get(self._get_user(), share_id, ShareIndex.RECEIVED)
+        if share_to_update is None:
+            share_to_update = await self.get_received(share_id)
+
+        update_request = self._get_update_received_request(share_to_update, share_state)
+        update_response = await self.cs3_api.UpdateReceivedShare(request=update_request,
+                                                                 metadata=await self._get_token())
+        return self._get_updated_received(share_id, state, update_response)
+
+    async def _get_resource_info(self, endpoint, file_id):
+        ref = FileUtils.get_reference(file_id, endpoint)
+        stat_response = await self.cs3_api.Stat(request=storage_provider.StatRequest(ref=ref),
+                                                metadata=await self._get_token())
+        return self._get_stat_resource_info(file_id, stat_response)
+
+    async def _get_token(self):
+        return [('x-access-token', await self.auth.async_authenticate())]
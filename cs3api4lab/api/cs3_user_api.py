@@ -1,15 +1,20 @@
+import asyncio
+
 import cs3.identity.user.v1beta1.resources_pb2 as id_res
 import cs3.identity.user.v1beta1.user_api_pb2 as user_api
 import cs3.identity.user.v1beta1.user_api_pb2_grpc as user_api_grpc
 import cs3.ocm.invite.v1beta1.invite_api_pb2 as ia
 import cs3.ocm.invite.v1beta1.invite_api_pb2_grpc as iag
 from cs3api4lab.auth.channel_connector import ChannelConnector
+from cs3api4lab.auth.async_channel_connector import AsyncChannelConnector
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 import cs3.rpc.v1beta1.code_pb2 as cs3_code
+from cs3api4lab.utils.cache import TTLCache
 
 
 class Cs3UserApi:
+    __user_cache = None
 
     def __init__(self, log):
         channel = ChannelConnector.get_channel()
@@ -17,6 +22,24 @@ class Cs3UserApi:
         self.config = Cs3ConfigManager().get_config()
         self.auth = Auth.get_authenticator(config=self.config, log=log)
         self.invite_api = iag.InviteAPIStub(channel)
+        self.user_cache = Cs3UserApi.get_user_cache(self.config)
+
+    @classmethod
+    def get_user_cache(cls, config=None):
+        """
+        The user records are cached for all the instances. The users that were not found are cached for a shorter
+        time, as they may be created (or an OCM invitation accepted) at any time.
+        """
+        if cls.__user_cache is None:
+            if config is None:
+                config = Cs3ConfigManager.get_config()
+            cls.__user_cache = TTLCache(config.user_cache_size, config.user_cache_ttl)
+        return cls.__user_cache
+
+    @classmethod
+    def flush_cache(cls):
+        if cls.__user_cache is not None:
+            cls.__user_cache.clear()
 
     def get_user(self, idp, opaque_id):
         user_info = self.get_user_info(idp, opaque_id)
@@ -27,87 +50,181 @@ class Cs3UserApi:
         return user_info
 
     def get_user_info(self, idp, opaque_id):
-        user_id = id_res.UserId(idp=idp, opaque_id=opaque_id)
-        request = user_api.GetUserRequest(user_id=user_id, skip_fetching_user_groups=True)
-        response = self.api.GetUser(request=request)
-
-        if response.status.code == cs3_code.CODE_OK:
-            return {"username": response.user.username,
-                    "display_name": response.user.display_name,
-                    "full_name": response.user.display_name + " (" + response.user.username + ")",
-                    "idp": response.user.id.idp,
-                    "opaque_id": response.user.id.opaque_id,
-                    "mail": response.user.mail}
+        key = ('id', idp, opaque_id)
+        cached_user = self._get_cached_user(key)
+        if cached_user is not None:
+            return cached_user
 
-        return {}
+        response = self.api.GetUser(request=self._get_user_request(idp, opaque_id))
+        return self._get_found_user(key, response)
 
     def find_accepted_users(self, opaque_id):
         if self.config.enable_ocm:
+            key = self._get_accepted_key(opaque_id)
+            cached_user = self._get_cached_user(key)
+            if cached_user is not None:
+                return cached_user
+
             ocm_response = self.invite_api.FindAcceptedUsers(ia.FindAcceptedUsersRequest(filter=opaque_id),
                                                              metadata=[('x-access-token', self.auth.authenticate())])
-
-            ocm_user = ocm_response.accepted_users.pop(0)
-            if ocm_response.status.code == cs3_code.CODE_OK:
-                return {
-                    "username": "",
-                    "display_name": ocm_user.display_name,
-                    "full_name": ocm_user.display_name,
-                    "idp": ocm_user.id.idp,
-                    "opaque_id": ocm_user.id.opaque_id,
-                    "mail": ocm_user.mail
-                }
+            return self._get_accepted_user(key, ocm_response)
 
         return {}
 
     def get_user_info_by_claim(self, claim, value):
         # get user info by mail or username
-        request = user_api.GetUserByClaimRequest(claim=claim, value=value, skip_fetching_user_groups=True)
-        response = self.api.GetUserByClaim(request=request)
+        key = ('claim', claim, value)
+        cached_user = self._get_cached_user(key)
+        if cached_user is not None:
+            return cached_user
+
+        response = self.api.GetUserByClaim(request=self._get_claim_request(claim, value))
+        return self._get_found_user(key, response)
+
+    def _get_cached_user(self, key):
+        cached_user = self.user_cache.get(key)
+        return dict(cached_user) if cached_user is not None else None
+
+    def _get_accepted_key(self, opaque_id):
+        # the accepted users depend on the invitations of the authenticated user
+        return 'accepted', self.auth.config.client_id, opaque_id
+
+    @staticmethod
+    def _get_user_request(idp, opaque_id):
+        user_id = id_res.UserId(idp=idp, opaque_id=opaque_id)
+        return user_api.GetUserRequest(user_id=user_id, skip_fetching_user_groups=True)
+
+    @staticmethod
+    def _get_claim_request(claim, value):
+        return user_api.GetUserByClaimRequest(claim=claim, value=value, skip_fetching_user_groups=True)
+
+    def _get_found_user(self, key, response):
         if response.status.code == cs3_code.CODE_OK:
-            return {"username": response.user.username,
-                    "display_name": response.user.display_name,
-                    "full_name": response.user.display_name + " (" + response.user.username + ")",
-                    "idp": response.user.id.idp,
-                    "opaque_id": response.user.id.opaque_id,
-                    "mail": response.user.mail}
-        else:
+            return self._cache_user(key, self._map_user(response.user))
+        if response.status.code == cs3_code.CODE_NOT_FOUND:
+            return self._cache_user(key, {}, self.config.user_negative_cache_ttl)
+        return {}
+
+    def _get_accepted_user(self, key, ocm_response):
+        if ocm_response.status.code != cs3_code.CODE_OK:
             return {}
+        if not ocm_response.accepted_users:
+            # an invitation may be accepted at any time
+            return self._cache_user(key, {}, self.config.user_negative_cache_ttl)
+        return self._cache_user(key, self._map_ocm_user(ocm_response.accepted_users[0]))
+
+    def _cache_user(self, key, user, ttl=None):
+        self.user_cache.set(key, user, ttl)
+        return dict(user)
+
+    @staticmethod
+    def _map_user(user):
+        return {"username": user.username,
+                "display_name": user.display_name,
+                "full_name": user.display_name + " (" + user.username + ")",
+                "idp": user.id.idp,
+                "opaque_id": user.id.opaque_id,
+                "mail": user.mail}
+
+    @staticmethod
+    def _map_ocm_user(user):
+        return {"username": "",
+                "display_name": user.display_name,
+                "full_name": user.display_name,
+                "idp": user.id.idp,
+                "opaque_id": user.id.opaque_id,
+                "mail": user.mail}
 
     def find_users_by_query(self, query):
         if len(query) < 3:
             return []
 
-        users = []
-        user_by_username = self.get_user_info_by_claim('username', query)
-        if user_by_username:
-            users.append(user_by_username)
-
-        user_by_mail = self.get_user_info_by_claim('mail', query)
-        if user_by_mail:
-            users.append(user_by_mail)
+        claim_users = [self.get_user_info_by_claim('username', query), self.get_user_info_by_claim('mail', query)]
 
         response = self.api.FindUsers(user_api.FindUsersRequest(filter=query, skip_fetching_user_groups=True),
                                       metadata=[('x-access-token', self.auth.authenticate())])
 
-        for user in response.users:
-            users.append({"username": user.username,
-                          "display_name": user.display_name,
-                          "full_name": user.display_name + " (" + user.username + ")",
-                          "idp": user.id.idp,
-                          "opaque_id": user.id.opaque_id,
-                          "mail": user.mail})
-
-        ocm_users = []
+        ocm_response = None
         if self.config.enable_ocm:
             ocm_response = self.invite_api.FindAcceptedUsers(ia.FindAcceptedUsersRequest(filter=query),
                                                              metadata=[('x-access-token', self.auth.authenticate())])
 
-            for user in ocm_response.accepted_users:
-                ocm_users.append({"username": "",
-                                  "display_name": user.display_name,
-                                  "full_name": user.display_name,
-                                  "idp": user.id.idp,
-                                  "opaque_id": user.id.opaque_id,
-                                  "mail": user.mail})
+        return self._get_query_users(claim_users, response, ocm_response)
+
+    def _get_query_users(self, claim_users, response, ocm_response):
+        users = [user for user in claim_users if user]
+        users += [self._map_user(user) for user in response.users]
+        if ocm_response is not None:
+            users += [self._map_ocm_user(user) for user in ocm_response.accepted_users]
+        return users
+
+
+class AsyncCs3UserApi(Cs3UserApi):
+    """
+    Cs3UserApi on a grpc.aio channel, the user records are cached together with the ones of Cs3UserApi
+    """
+
+    def __init__(self, log):
+        channel = AsyncChannelConnector.get_channel(log)
+        self.api = user_api_grpc.UserAPIStub(channel)
+        self.config = Cs3ConfigManager().get_config()
+        self.auth = Auth.get_authenticator(config=self.config, log=log)
+        self.invite_api = iag.InviteAPIStub(channel)
+        self.user_cache = Cs3UserApi.get_user_cache(self.config)
+
+    async def get_user(self, idp, opaque_id):
+        user_info = await self.get_user_info(idp, opaque_id)
+
+        if not user_info and self.config.enable_ocm:
+            user_info = await self.find_accepted_users(opaque_id)
+
+        return user_info
+
+    async def get_user_info(self, idp, opaque_id):
+        key = ('id', idp, opaque_id)
+        cached_user = self._get_cached_user(key)
+        if cached_user is not None:
+            return cached_user
+
+        response = await self.api.GetUser(request=self._get_user_request(idp, opaque_id))
+        return self._get_found_user(key, response)
+
+    async def find_accepted_users(self, opaque_id):
+        if self.config.enable_ocm:
+            key = self._get_accepted_key(opaque_id)
+            cached_user = self._get_cached_user(key)
+            if cached_user is not None:
+                return cached_user
+
+            ocm_response = await self.invite_api.FindAcceptedUsers(
+                ia.FindAcceptedUsersRequest(filter=opaque_id),
+                metadata=[('x-access-token', await self.auth.async_authenticate())])
+            return self._get_accepted_user(key, ocm_response)
+
+        return {}
+
+    async def get_user_info_by_claim(self, claim, value):
+        key = ('claim', claim, value)
+        cached_user = self._get_cached_user(key)
+        if cached_user is not None:
+            return cached_user
+
+        response = await self.api.GetUserByClaim(request=self._get_claim_request(claim, value))
+        return self._get_found_user(key, response)
+
+    async def find_users_by_query(self, query):
+        if len(query) < 3:
+            return []
+
+        # the claim lookups and the searches are independent, they are sent together
+        token = await self.auth.async_authenticate()
+        lookups = [self.get_user_info_by_claim('username', query),
+                   self.get_user_info_by_claim('mail', query),
+                   self.api.FindUsers(user_api.FindUsersRequest(filter=query, skip_fetching_user_groups=True),
+                                      metadata=[('x-access-token', token)])]
+        if self.config.enable_ocm:
+            lookups.append(self.invite_api.FindAcceptedUsers(ia.FindAcceptedUsersRequest(filter=query),
+                                                             metadata=[('x-access-token', token)]))
+        results = await asyncio.gather(*lookups)
 
-        return users + ocm_users
+        return self._get_query_users(results[:2], results[2], results[3] if self.config.enable_ocm else None)
@@ -1,31 +1,23 @@
+import codecs
+import contextvars
 import importlib
 import urllib
 import nbformat
-import os
-import posixpath
 import nest_asyncio
-
-import cs3.storage.provider.v1beta1.resources_pb2 as resource_types
-import cs3.rpc.v1beta1.code_pb2 as cs3code
-
-from base64 import decodebytes
+from concurrent.futures import ThreadPoolExecutor
 
 from jupyter_server.services.contents.manager import ContentsManager
 from requests import HTTPError
 
-from cs3api4lab.common.strings import Role
-from cs3api4lab.api.cs3_file_api import Cs3FileApi
 from tornado import web
-from nbformat.v4 import new_notebook
 from cs3api4lab.config.config_manager import Cs3ConfigManager
-from cs3api4lab.utils.share_utils import ShareUtils
 from cs3api4lab.utils.file_utils import FileUtils
-from cs3api4lab.api.share_api_facade import ShareAPIFacade
 from cs3api4lab.utils.model_utils import ModelUtils
 from cs3api4lab.utils.asyncify import asyncify
-from cs3api4lab.api.storage_api import StorageApi
-from cs3api4lab.locks.factory import LockApiFactory
-from cs3api4lab.exception.exceptions import ResourceNotFoundError
+from cs3api4lab.utils.request_context import RequestContext, request_scope
+from cs3api4lab.api.services import ServiceRegistry
+from cs3api4lab.api.cs3apismanager_mixin import CS3APIsManagerMixin
+from cs3api4lab.exception.exceptions import ResourceNotFoundError, FileConflictError, GatewayUnavailableError
 from traitlets.config import HasTraits
 
 """
@@ -35,9 +27,7 @@ It's used for operations on files (user filesystem and files shared by users)
 Note: This uses validation from ContentsManager package which means we are 
 bound to the endpoint rules defined in ContentsManager.
 """
-class CS3APIsManager(ContentsManager):
-    cs3_config = None
-    log = None
+class CS3APIsManager(CS3APIsManagerMixin, ContentsManager):
     file_api = None
 
     def __init__(self, parent, log, **kwargs):
@@ -45,11 +35,14 @@ class CS3APIsManager(ContentsManager):
         HasTraits.__init__(self, **kwargs)
         self.cs3_config = Cs3ConfigManager.get_config()
         self.log = log
-        self.file_api = Cs3FileApi(self.log)
-        self.share_api = ShareAPIFacade(log)
-        self.storage_api = StorageApi(log)
-        self.lock_api = LockApiFactory.create(log, self.cs3_config)
+        services = ServiceRegistry.get_services(log)
+        self.file_api = services.file_api
+        self.share_api = services.share_facade
+        self.storage_api = services.storage_api
+        self.lock_api = services.lock_api
         self.checkpoints = self._create_checkpoints_instance(log, self.cs3_config)
+        self._init_caches()
+        self._open_executor = ThreadPoolExecutor(max_workers=self.cs3_config.open_file_workers)
 
         #line below must be run in order for loop.run_until_complete() to work
         nest_asyncio.apply()
@@ -77,6 +70,7 @@ class CS3APIsManager(ContentsManager):
             return None
 
     # _is_dir is already async, so no need to asyncify this
+    @request_scope
     def dir_exists(self, path):
         """Does a directory exist at the given path?
         Like os.path.isdir
@@ -106,12 +100,9 @@ class CS3APIsManager(ContentsManager):
         hidden : bool
             Whether the path is hidden.
         """
-        path = FileUtils.normalize_path(path)
-        parts = path.split('/')
-        if any(part.startswith('.') for part in parts):
-            return True
-        return False
+        return self._is_hidden_path(FileUtils.normalize_path(path))
 
+    @request_scope
     @asyncify
     def file_exists(self, path=''):
         """Does a file exist at the given path?
@@ -132,43 +123,48 @@ class CS3APIsManager(ContentsManager):
         except FileNotFoundError:
             return False
 
-        if file_info['type'] == resource_types.RESOURCE_TYPE_FILE:
-            return True
-
-        return False
+        return self._is_file_info(file_info)
 
     # can't be async because SQLite (used for jupyter notebooks) doesn't allow multithreaded operations by default
-    def get(self, path, content=True, type=None, format=None):
-        """Get a file, notebook or directory model."""
+    @request_scope
+    def get(self, path, content=True, type=None, format=None, require_hash=False):
+        """
+        Get a file, notebook or directory model.
+        With require_hash the models of files and notebooks carry the hash of their content.
+        """
         path = FileUtils.normalize_path(path)
         model = None
 
-        if type:
-            if type == 'directory' and self._is_dir(path):
-                model = self._dir_model(path, content=content)
-            elif type == 'file' and self.file_exists(path):
-                model = self._file_model(path, content=content, format=format)
-            elif type == 'notebook' or (type is None and path.endswith('.ipynb')):
-                try:   #this needs to be fixed/refactored in a separate issue
-                    model = self._notebook_model(path, content=content)
-                except Exception as e:
-                    self.log.info("Notebook does not exist %s", path)
-        else:
-            if path.endswith('.ipynb'):
-                try:   #this needs to be fixed/refactored in a separate issue
-                    model = self._notebook_model(path, content=content)
-                except Exception:
-                    self.log.info("Notebook does not exist %s", path)
-            elif self.file_exists(path):
-                model = self._file_model(path, content=content, format=format)
-            elif self._is_dir(path):
-                model = self._dir_model(path, content=content)
+        try:
+            if type:
+                if type == 'directory' and self._is_dir(path):
+                    model = self._dir_model(path, content=content)
+                elif type == 'file' and self.file_exists(path):
+                    model = self._file_model(path, content=content, format=format, require_hash=require_hash)
+                elif type == 'notebook' or (type is None and path.endswith('.ipynb')):
+                    try:   #this needs to be fixed/refactored in a separate issue
+                        model = self._notebook_model(path, content=content, require_hash=require_hash)
+                    except Exception as e:
+                        self.log.info("Notebook does not exist %s", path)
+            else:
+                if path.endswith('.ipynb'):
+                    try:   #this needs to be fixed/refactored in a separate issue
+                        model = self._notebook_model(path, content=content, require_hash=require_hash)
+                    except Exception:
+                        self.log.info("Notebook does not exist %s", path)
+                elif self.file_exists(path):
+                    model = self._file_model(path, content=content, format=format, require_hash=require_hash)
+                elif self._is_dir(path):
+                    model = self._dir_model(path, content=content)
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
 
         if model:
             return model
 
         raise web.HTTPError(404, u'Resource %s does not exist' % path)
 
+    @request_scope
     @asyncify
     def get_kernel_path(self, path, model=None):
         """
@@ -179,25 +175,10 @@ class CS3APIsManager(ContentsManager):
 
         WARNING: root_dir will be later added to kernel_path, so consider it when defining kernel_path
         """
-        self.log.debug(f"Requesting the kernel path for {path}")
-
-        # FIXME delete this everywhere
-        if ":" in path:
-            path = path.split(":")[1]
-
-        kernel_path = self.cs3_config.kernel_path
-        path = posixpath.join(kernel_path, path)
-
-        # Lets use the local filesystem instead of going via cs3apis
-        if os.path.isdir(path):
-            return path
-        if '/' in path:
-            parent_dir = path.rsplit('/', 1)[0]
-        else:
-            parent_dir = ''
-        return parent_dir
+        return self._get_kernel_dir(path)
 
     # can't be async because SQLite (used for jupyter notebooks) doesn't allow multithreaded operations by default
+    @request_scope
     def save(self, model, path):
         """
         Save a file or directory model to path.
@@ -208,10 +189,10 @@ class CS3APIsManager(ContentsManager):
         path = FileUtils.check_and_transform_file_path(path)
         # self._check_write_permissions(path)
 
-        if 'type' not in model:
-            raise web.HTTPError(400, u'No file type provided')
-        if 'content' not in model and model['type'] != 'directory':
-            raise web.HTTPError(400, u'No file content provided')
+        if model.get('chunk') is not None:
+            return self._save_chunk(model, path)
+
+        self._check_save_model(model)
         self.log.debug("Saving %s", path)
         # ToDo: Implements run_pre_save_hook and run_post_save_hook
         # self.run_pre_save_hook(model=model, path=path)
@@ -221,14 +202,14 @@ class CS3APIsManager(ContentsManager):
 
                 nb = nbformat.from_dict(model['content'])
                 self.check_and_sign(nb, path)
-                self._save_notebook(path, nb, model['format'])
+                file_info = self._save_notebook(path, nb, model['format'])
 
                 # ToDo: Implement save to checkpoint
                 # if not self.checkpoints.list_checkpoints(path):
                 #     self.create_checkpoint(path)
 
             elif model['type'] == 'file':
-                self._save_file(path, model['content'], model['format'])
+                file_info = self._save_file(path, model['content'], model['format'])
 
             elif model['type'] == 'directory':
                 self._save_directory(path)
@@ -239,19 +220,23 @@ class CS3APIsManager(ContentsManager):
         except web.HTTPError:
             raise
 
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
+
         except Exception as e:
             self.log.error(u'Error while saving file: %s %s', path, e, exc_info=True)
             raise web.HTTPError(500, u'Unexpected error while saving file: %s %s' % (path, e))
 
+        self._forget_dir_models(path)
         validation_message = None
 
         if model['type'] == 'notebook':
             self.validate_notebook_model(model)
             validation_message = model.get('message', None)
-            model = self._notebook_model(path, content=False)
+            model = self._saved_model(path, file_info, 'notebook')
 
         elif model['type'] == 'file':
-            model = self._file_model(path, content=False, format=None)
+            model = self._saved_model(path, file_info, 'file')
         elif model['type'] == 'directory':
             model = self._dir_model(path, content=False)
         if validation_message:
@@ -261,6 +246,36 @@ class CS3APIsManager(ContentsManager):
 
         return model
 
+    def _save_chunk(self, model, path):
+        spool = self._get_chunk_spool(model, path)
+        try:
+            self._write_spool(spool, self._get_content_stream(model['content'], model['format']))
+
+            if model['chunk'] != -1:
+                return self._chunk_model(path, spool)
+
+            spool.seek(0)
+            file_info = self.file_api.write_file(path, spool, self.cs3_config.endpoint, model['format'])
+        except web.HTTPError:
+            self._discard_upload_spools(path)
+            raise
+        except FileConflictError as e:
+            self._discard_upload_spools(path)
+            self.log.info(u'Conflict saving: %s %s', path, e)
+            raise web.HTTPError(409, u'File %s was changed by another writer' % path)
+        except GatewayUnavailableError as e:
+            self._discard_upload_spools(path)
+            raise self._get_unavailable_error(e)
+        except Exception as e:
+            self._discard_upload_spools(path)
+            self.log.error(u'Error while saving file: %s %s', path, e, exc_info=True)
+            raise web.HTTPError(500, u'Unexpected error while saving file: %s %s' % (path, e))
+
+        self._discard_upload_spools(path)
+        self._forget_dir_models(path)
+        return self._saved_model(path, file_info, 'file')
+
+    @request_scope
     @asyncify
     def delete_file(self, path):
         """Delete the file or directory at path."""
@@ -272,10 +287,16 @@ class CS3APIsManager(ContentsManager):
             self.log.error(u'File not found error: %s %s', path, e, exc_info=True)
             raise web.HTTPError(404, u'No such file or directory: %s %s' % (path, e))
 
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
+
         except Exception as e:
             self.log.error(u'Unknown error delete file: %s %s', path, e, exc_info=True)
             raise web.HTTPError(500, u'Unknown error delete file: %s %s' % (path, e))
 
+        self._forget_dir_models(path)
+
+    @request_scope
     @asyncify
     def rename_file(self, old_path, new_path):
         """Rename a file or directory."""
@@ -291,38 +312,33 @@ class CS3APIsManager(ContentsManager):
 
         try:
             self.file_api.move(old_path, new_path, self.cs3_config.endpoint)
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
         except Exception as e:
             self.log.error(u'Error renaming file: %s %s', old_path, e)
             raise web.HTTPError(500, u'Error renaming file: %s %s' % (old_path, e))
 
+        self._forget_dir_models(old_path, new_path)
+
+    @request_scope
+    def new_untitled(self, path='', type='', ext=''):
+        """Create a new untitled file or directory, the candidate names are stated once each."""
+        return super().new_untitled(path, type, ext)
+
+    @request_scope
+    def copy(self, from_path, to_path=None):
+        """Copy an existing file, within one request context."""
+        return super().copy(from_path, to_path)
+
     # can't be async because SQLite (used for jupyter notebooks) doesn't allow multithreaded operations by default
+    @request_scope
     def new(self, model=None, path=''):
 
         path = path.strip('/')
         path = FileUtils.normalize_path(path)
         # self._check_write_permissions(path)
 
-        if model is None:
-            model = {}
-
-        if path.endswith('.ipynb'):
-            model.setdefault('type', 'notebook')
-        else:
-            model.setdefault('type', 'file')
-
-        # no content, not a directory, so fill out new-file model
-        if 'content' not in model and model['type'] != 'directory':
-            if model['type'] == 'notebook':
-                model['content'] = new_notebook()
-                model['format'] = 'json'
-            else:
-                model['content'] = ''
-                model['type'] = 'file'
-                model['format'] = 'text'
-
-        model = self.save(model, path)
-
-        return model
+        return self.save(self._fill_new_model(model, path), path)
 
     def _get_parent_path(self, path):
 
@@ -338,14 +354,23 @@ class CS3APIsManager(ContentsManager):
         head, _sep, tail = source_string.rpartition(replace_what)
         return head + replace_with + tail
 
-    def _read_file(self, stat, file_format=None):
+    def _read_file(self, stat, file_format=None, chunks=None):
+        """
+        Reads the file content, chunks can be a download of the file that was already started
+        """
+        if chunks is None:
+            chunks = self.file_api.read_file(stat, self.cs3_config.endpoint)
+
         if file_format is None or file_format == "text":
             try:
-                content = ''
-                for chunk in self.file_api.read_file(stat, self.cs3_config.endpoint):
-                    content += chunk.decode('utf-8')
-
-                return content
+                # chunks are cut at arbitrary byte offsets, so multibyte characters have to be decoded incrementally
+                decoder = codecs.getincrementaldecoder('utf-8')()
+                content = []
+                for chunk in chunks:
+                    content.append(decoder.decode(chunk))
+                content.append(decoder.decode(b'', final=True))
+
+                return ''.join(content)
             except UnicodeError as e:
                 if file_format == "text":
                     raise HTTPError(
@@ -353,9 +378,11 @@ class CS3APIsManager(ContentsManager):
                         "%s is not UTF-8 encoded" % stat['filepath'],
                         reason="bad format",
                     ) from e
+            # the content is not text, it is downloaded again as binary
+            chunks = self.file_api.read_file(stat, self.cs3_config.endpoint)
 
         content = []
-        for chunk in self.file_api.read_file(stat, self.cs3_config.endpoint):
+        for chunk in chunks:
             content.append(chunk)
 
         return b''.join(content)
@@ -363,83 +390,138 @@ class CS3APIsManager(ContentsManager):
     @asyncify
     def _dir_model(self, path, content):
         try:
+            etag = None
+            if content:
+                # the etag of a directory changes with its content, the listing is reused while it does not
+                etag = self.file_api.stat_info(path, self.cs3_config.endpoint, cached=False)['etag']
+                cached_model = self._get_cached_dir_model(path, etag)
+                if cached_model is not None:
+                    return cached_model
             cs3_container = self.file_api.read_directory(path, self.cs3_config.endpoint)
             model = ModelUtils.convert_container_to_directory_model(path, cs3_container, content)
-        except ResourceNotFoundError:
+        except (ResourceNotFoundError, FileNotFoundError):
             raise web.HTTPError(404, u'%s does not exist' % path)
-        return model
+        except GatewayUnavailableError as e:
+            return self._get_stale_dir_model(path, content, e)
+        return self._remember_dir_model(path, etag, model)
+
+    def _stat_file(self, path):
+        file_info = self.file_api.stat_info(path, self.cs3_config.endpoint)
+
+        if self._is_dev_home(file_info):
+            opaque_id = urllib.parse.unquote(file_info['inode']['opaque_id'])
+            storage_id = urllib.parse.unquote(file_info['inode']['storage_id'])
+            file_info = self.file_api.stat_info(opaque_id, storage_id)
+
+        return file_info
 
     @asyncify
-    def _file_model(self, path, content, format):
+    def _file_model(self, path, content, format, require_hash=False):
         file_info = None
         model = ModelUtils.create_empty_file_model(path)
         try:
-            file_info = self.file_api.stat_info(path, self.cs3_config.endpoint)
-
-            # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
-            if self.config.dev_env and "/home/" in file_info['filepath']:
-                opaque_id = urllib.parse.unquote(file_info['inode']['opaque_id'])
-                storage_id = urllib.parse.unquote(file_info['inode']['storage_id'])
-                file_info = self.file_api.stat_info(opaque_id, storage_id)
-        except Exception as e:
-            self.log.info('File % does not exists' % path)
+            file_info = self._stat_file(path)
+        except Exception:
+            self.log.info('File %s does not exists' % path)
 
+        file_content = None
         if file_info:
-            model = ModelUtils.update_file_model(ModelUtils.create_empty_file_model(path), file_info)
+            model = self._stated_file_model(path, file_info, require_hash)
+            _, model['writable'], file_content = self._open_file(file_info, content, format)
+        else:
+            model['writable'] = True
 
-        model['writable'] = self._is_editor(file_info)
         if content:
-            content = self._read_file(file_info, format)
-            if format is None:
-                format = "text"
-
-            if model['mimetype'] is None:
-                default_mime = {
-                    'text': 'text/plain',
-                    'base64': 'application/octet-stream'
-                }[format]
-                model['mimetype'] = default_mime
-
-            model.update(
-                content=content,
-                format=format,
-            )
+            self._set_file_content(model, file_content, format)
 
         return model
 
     # can't be async because SQLite (used for jupyter notebooks) doesn't allow multithreaded operations by default
-    def _notebook_model(self, path, content):
-        file_info = self.file_api.stat_info(path, self.cs3_config.endpoint)
-
-        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
-        if self.config.dev_env and "/home/" in file_info['filepath']:
-            opaque_id = urllib.parse.unquote(file_info['inode']['opaque_id'])
-            storage_id = urllib.parse.unquote(file_info['inode']['storage_id'])
-            file_info = self.file_api.stat_info(opaque_id, storage_id)
+    def _notebook_model(self, path, content, require_hash=False):
+        file_info = self._stat_file(path)
 
-        model = ModelUtils.update_file_model(ModelUtils.create_empty_file_model(path), file_info)
+        model = self._stated_file_model(path, file_info, require_hash)
         model['type'] = 'notebook'
-        model['locked'] = self.lock_api.is_file_locked(file_info)
+        model['locked'], model['writable'], file_content = self._open_file(file_info, content)
         if content:
-            file_content = self._read_file(file_info)
             nb = nbformat.reads(file_content, as_version=4)
             self.mark_trusted_cells(nb, path)
             model['content'] = nb
             model['format'] = 'json'
             self.validate_notebook_model(model)
 
-        model['writable'] = self._is_editor(file_info)
-
         return model
 
+    def _open_file(self, file_info, content=False, format=None):
+        """
+        Fetches what the model of a stated file needs, every fact once. The lock state, the role of
+        a received share and (with content) the download are requested together, then the lock is
+        acquired while the content is downloaded.
+        Returns the lock state of the file (locked by another user), whether it is writable and the content.
+        Without content, a file this server still holds the lock of is answered from the stat alone.
+        """
+        held_role = self._get_held_role(file_info, content)
+        if held_role is not None:
+            return False, self._get_writable(file_info, held_role[0], False), None
+
+        lock_future = self._submit(self._get_lock_state, file_info)
+        role_future = self._submit(self._get_share_role, file_info)
+        download_future = None
+        if content:
+            download_future = self._submit(self.storage_api.init_file_download,
+                                           file_info['filepath'], self.cs3_config.endpoint)
+
+        lock = lock_future.result()
+        locked = self.lock_api.is_locked_by_other(lock)
+        file_content = None
+        if content:
+            acquire_future = None
+            if locked:
+                self.log.info("File %s locked, opening in read-only mode" % file_info['filepath'])
+            else:
+                acquire_future = self._submit(self._acquire_lock, file_info, lock)
+            chunks = self.file_api.download(download_future.result(), file_info['size'])
+            file_content = self._read_file(file_info, format, chunks)
+            if acquire_future is not None:
+                acquire_future.result()
+
+        role = role_future.result()
+        self._remember_held_role(file_info, role, locked)
+        return locked, self._get_writable(file_info, role, locked), file_content
+
+    def _submit(self, fn, *args):
+        # every task runs in its own copy of the request context, a context can't be entered by two threads at once
+        return self._open_executor.submit(contextvars.copy_context().run, fn, *args)
+
+    def _get_lock_state(self, file_info):
+        key = self._get_file_key(file_info)
+        lock = RequestContext.get('lock', key)
+        if lock is RequestContext.NOT_SET:
+            lock = self.lock_api.get_lock_state(file_info)
+            RequestContext.set('lock', key, lock)
+        return lock
+
+    def _get_share_role(self, file_info):
+        key = self._get_file_key(file_info)
+        role = RequestContext.get('role', key)
+        if role is RequestContext.NOT_SET:
+            role = self.share_api.get_share_received_role_by_stat(file_info)
+            RequestContext.set('role', key, role)
+        return role
+
+    def _acquire_lock(self, file_info, lock):
+        try:
+            self.lock_api.acquire_lock(file_info, lock)
+        except IOError:
+            self.log.info("File %s locked, opening in read-only mode" % file_info['filepath'])
+
     @asyncify
     def _is_dir(self, path):
-        if path == '/' or path == '' or path is None:
+        if self._is_root(path):
             return True
 
         path = FileUtils.normalize_path(path)
-        stat = self.storage_api.stat(path)
-        return stat.status.code == cs3code.CODE_OK and stat.info.type == resource_types.RESOURCE_TYPE_CONTAINER
+        return self._is_dir_stat(self.storage_api.stat(path))
 
     @asyncify
     def _save_file(self, path, content, format):
@@ -447,13 +529,15 @@ class CS3APIsManager(ContentsManager):
             raise web.HTTPError(400, "Must specify format of file contents as 'text' or 'base64'", )
 
         try:
-            if format is None or format == 'text':
-                bcontent = content.encode('utf8')
-            else:
-                b64_bytes = content.encode('ascii')
-                bcontent = decodebytes(b64_bytes)
+            return self.file_api.write_file(path, self._get_content_stream(content, format),
+                                            self.cs3_config.endpoint, format)
+
+        except FileConflictError as e:
+            self.log.info(u'Conflict saving: %s %s', path, e)
+            raise web.HTTPError(409, u'File %s was changed by another writer' % path)
 
-            self.file_api.write_file(path, bcontent, self.cs3_config.endpoint, format)
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
 
         except Exception as e:
             self.log.error(u'Error saving: %s %s', path, e)
@@ -464,7 +548,14 @@ class CS3APIsManager(ContentsManager):
 
         nb_content = nbformat.writes(nb)
         try:
-            self.file_api.write_file(path, nb_content, self.cs3_config.endpoint, format)
+            return self.file_api.write_file(path, nb_content, self.cs3_config.endpoint, format)
+
+        except FileConflictError as e:
+            self.log.info(u'Conflict saving: %s %s', path, e)
+            raise web.HTTPError(409, u'File %s was changed by another writer' % path)
+
+        except GatewayUnavailableError as e:
+            raise self._get_unavailable_error(e)
 
         except Exception as e:
             self.log.error(u'Error saving: %s %s', path, e)
@@ -489,29 +580,16 @@ class CS3APIsManager(ContentsManager):
         This determines if the user can write to the file or not
         (check permissions of the file, share and check if the file is locked)
         '''
-        is_editor = True
-
         if not file_info:
-            return is_editor
-
-        # check file permissions
-        if ShareUtils.map_permissions_to_role(file_info['permissions']) == Role.VIEWER:
-            is_editor = False
-
-        # check if file is shared with me
-        role = self.share_api.get_share_received_role(file_info['filepath'])
-        if is_editor and role and role == Role.VIEWER:
-            is_editor = False
-
-        # check if file is locked
-        if self.lock_api.is_file_locked(file_info):
-            is_editor = False
+            return True
 
-        return is_editor
+        _, writable, _ = self._open_file(file_info)
+        return writable
 
     #
     # Notebook hack - disable checkpoint
     #
+    @request_scope
     @asyncify
     def delete(self, path):
         path = path.strip('/')
@@ -519,22 +597,18 @@ class CS3APIsManager(ContentsManager):
             raise web.HTTPError(400, "Can't delete root")
         self.delete_file(path)
 
+    @request_scope
     @asyncify
     def rename(self, old_path, new_path):
         self.rename_file(old_path, new_path)
 
+    @request_scope
     @asyncify
     def create_clone_file(self, path):
         path_normalized = FileUtils.normalize_path(path)
         path_normalized = FileUtils.check_and_transform_file_path(path_normalized)
-        notebook_container = self.cs3_config.home_dir if self.cs3_config.home_dir else self.cs3_config.mount_dir
 
-        file_info = self.file_api.stat_info(path_normalized, self.config.endpoint)
-        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
-        if self.config.dev_env and "/home/" in file_info['filepath']:
-            opaque_id = urllib.parse.unquote(file_info['inode']['opaque_id'])
-            storage_id = urllib.parse.unquote(file_info['inode']['storage_id'])
-            file_info = self.file_api.stat_info(opaque_id, storage_id)
+        file_info = self._stat_file(path_normalized)
 
         clone_file = self.lock_api.resolve_file_path(path)
         clone_file_exists = self.file_exists(clone_file)
@@ -543,10 +617,10 @@ class CS3APIsManager(ContentsManager):
         if not clone_file_exists:
             try:
                 file_content = self._read_file(file_info)
-                clone_file_path = FileUtils.normalize_path(notebook_container + '/' + clone_file)
-                clone_file_path = FileUtils.check_and_transform_file_path(clone_file_path)
+                clone_file_path = self._get_clone_path(clone_file)
 
                 self.file_api.write_file(clone_file_path, file_content, self.cs3_config.endpoint, None)
+                self._forget_dir_models(clone_file_path)
 
                 clone_file_created = True
             except Exception:
@@ -0,0 +1,283 @@
+import copy
+import mimetypes
+import os
+import posixpath
+import tempfile
+import time
+
+import cs3.storage.provider.v1beta1.resources_pb2 as resource_types
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+from nbformat.v4 import new_notebook
+from tornado import web
+
+from cs3api4lab.common.strings import Role
+from cs3api4lab.utils.share_utils import ShareUtils
+from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.content_stream import ContentStream
+from cs3api4lab.utils.model_utils import ModelUtils
+from cs3api4lab.utils.cache import TTLCache
+
+
+class CS3APIsManagerMixin:
+    """
+    The parts of CS3APIsManager and AsyncCS3APIsManager that don't make any request: the models, the caches
+    and the upload spools. Each manager only implements the requests, blocking or awaited.
+    """
+    cs3_config = None
+    log = None
+    upload_spool_timeout = 3600
+    dir_model_ttl = 60
+
+    def _init_caches(self):
+        self._upload_spools = {}
+        # directory listings with the etag of the directory they were built for
+        self._dir_models = TTLCache(self.cs3_config.dir_cache_size, self.dir_model_ttl)
+        # roles of the files locked by this server, a file which is still locked needs no lookups to be stated
+        self._held_roles = TTLCache(self.cs3_config.stat_cache_size, self.cs3_config.locks_expiration_time)
+
+    @staticmethod
+    def _is_hidden_path(path):
+        parts = path.split('/')
+        if any(part.startswith('.') for part in parts):
+            return True
+        return False
+
+    @staticmethod
+    def _is_file_info(file_info):
+        return file_info['type'] == resource_types.RESOURCE_TYPE_FILE
+
+    @staticmethod
+    def _is_root(path):
+        return path == '/' or path == '' or path is None
+
+    @staticmethod
+    def _is_dir_stat(stat):
+        return stat.status.code == cs3code.CODE_OK and stat.info.type == resource_types.RESOURCE_TYPE_CONTAINER
+
+    def _is_dev_home(self, file_info):
+        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
+        return self.cs3_config.dev_env and "/home/" in file_info['filepath']
+
+    @staticmethod
+    def _get_unavailable_error(error):
+        return web.HTTPError(503, str(error))
+
+    def _get_kernel_dir(self, path):
+        """
+        Since the kernel only uses the access to the local storage (where we assume we
+        fuse mount the remote storage), the web (cs3api based) paths are translated to a local one.
+
+        WARNING: root_dir will be later added to kernel_path, so consider it when defining kernel_path
+        """
+        self.log.debug(f"Requesting the kernel path for {path}")
+
+        # FIXME delete this everywhere
+        if ":" in path:
+            path = path.split(":")[1]
+
+        kernel_path = self.cs3_config.kernel_path
+        path = posixpath.join(kernel_path, path)
+
+        # Lets use the local filesystem instead of going via cs3apis
+        if os.path.isdir(path):
+            return path
+        if '/' in path:
+            parent_dir = path.rsplit('/', 1)[0]
+        else:
+            parent_dir = ''
+        return parent_dir
+
+    @staticmethod
+    def _check_save_model(model):
+        if 'type' not in model:
+            raise web.HTTPError(400, u'No file type provided')
+        if 'content' not in model and model['type'] != 'directory':
+            raise web.HTTPError(400, u'No file content provided')
+
+    @staticmethod
+    def _fill_new_model(model, path):
+        if model is None:
+            model = {}
+
+        if path.endswith('.ipynb'):
+            model.setdefault('type', 'notebook')
+        else:
+            model.setdefault('type', 'file')
+
+        # no content, not a directory, so fill out new-file model
+        if 'content' not in model and model['type'] != 'directory':
+            if model['type'] == 'notebook':
+                model['content'] = new_notebook()
+                model['format'] = 'json'
+            else:
+                model['content'] = ''
+                model['type'] = 'file'
+                model['format'] = 'text'
+
+        return model
+
+    def _get_content_stream(self, content, format):
+        # the content is encoded/decoded lazily while it is uploaded, no full copy is made
+        if format is None or format == 'text':
+            return ContentStream.from_text(content, self.cs3_config.chunk_size)
+        return ContentStream.from_base64(content, self.cs3_config.chunk_size)
+
+    def _get_chunk_spool(self, model, path):
+        """
+        JupyterLab uploads large files in numbered chunks (1..n, -1 for the last one).
+        The chunks are appended to a local spool file, which is uploaded once the last chunk arrives,
+        so only one chunk is kept in memory at a time. Returns the spool of the upload of the chunk.
+        """
+        chunk = model['chunk']
+        if 'type' not in model:
+            raise web.HTTPError(400, u'No file type provided')
+        if model['type'] != 'file':
+            raise web.HTTPError(400, u'File type "%s" is not supported for large file transfer' % model['type'])
+        if 'content' not in model:
+            raise web.HTTPError(400, u'No file content provided')
+        if model.get('format') not in {'text', 'base64'}:
+            raise web.HTTPError(400, "Must specify format of file contents as 'text' or 'base64'")
+
+        self.log.debug("Saving chunk %s of file %s", chunk, path)
+        if chunk == 1:
+            self._discard_upload_spools(path)
+            self._upload_spools[path] = (time.time(), tempfile.TemporaryFile())
+        elif path not in self._upload_spools:
+            raise web.HTTPError(400, u'No upload in progress for %s, the first chunk is missing' % path)
+
+        return self._upload_spools[path][1]
+
+    @staticmethod
+    def _write_spool(spool, content):
+        for data in content:
+            spool.write(data)
+
+    @staticmethod
+    def _chunk_model(path, spool):
+        model = ModelUtils.create_empty_file_model(path)
+        model['size'] = spool.tell()
+        model['mimetype'] = mimetypes.guess_type(path)[0]
+        return model
+
+    def _discard_upload_spools(self, path):
+        """
+        Closes the spool of the given path and the ones of uploads abandoned for longer than the timeout
+        """
+        for spool_path, (created, spool) in list(self._upload_spools.items()):
+            if spool_path == path or time.time() - created > self.upload_spool_timeout:
+                spool.close()
+                del self._upload_spools[spool_path]
+
+    def _saved_model(self, path, file_info, model_type):
+        """
+        Model of a file that has just been written, built from the stat returned by the upload.
+        The file was written under our lock, so it is writable and not locked by another user.
+        It carries the hash of the content, to be compared with the one of a later get.
+        """
+        model = ModelUtils.update_file_model(ModelUtils.create_empty_file_model(path), file_info)
+        ModelUtils.update_hash(model, file_info)
+        model['type'] = model_type
+        if model_type == 'notebook':
+            model['locked'] = False
+        return model
+
+    def _get_cached_dir_model(self, path, etag):
+        cached_model = self._dir_models.get(path)
+        if cached_model is None or not etag or cached_model[0] != etag:
+            return None
+        return copy.deepcopy(cached_model[1])
+
+    def _remember_dir_model(self, path, etag, model):
+        if etag:
+            self._dir_models.set(path, (etag, copy.deepcopy(model)))
+        return model
+
+    def _forget_dir_models(self, *paths):
+        """
+        Drops the listings of the parents of the given paths, once this server has written, removed or moved them,
+        and the listings of the paths themselves and of everything below them, in case they are directories
+        """
+        paths = {dir_path for path in paths for dir_path in self._get_dir_model_paths(path)}
+        parents = {posixpath.dirname(path) for path in paths}
+        prefixes = tuple(path.rstrip('/') + '/' for path in paths)
+
+        def matches(key, model):
+            key = key.rstrip('/') or '/'
+            return key in parents or key in paths or key.startswith(prefixes)
+
+        self._dir_models.invalidate_if(matches)
+
+    def _get_dir_model_paths(self, path):
+        # the listings are cached by the path they were requested with, which may lack the mount dir
+        path = FileUtils.normalize_path(path).rstrip('/') or '/'
+        mount_dir = self.cs3_config.mount_dir.rstrip('/')
+        if mount_dir and path.startswith(mount_dir + '/'):
+            return path, path[len(mount_dir):]
+        return path,
+
+    def _get_stale_dir_model(self, path, content, error):
+        """
+        The last known listing is served while the gateway circuit is open
+        """
+        stale_model = self._dir_models.get_stale(path)
+        if stale_model is None:
+            raise self._get_unavailable_error(error)
+        self.log.warning('msg="Gateway unavailable, serving a stale listing" path="%s"' % path)
+        model = copy.deepcopy(stale_model[1])
+        if not content:
+            model['content'] = None
+            model['format'] = None
+        return model
+
+    def _stated_file_model(self, path, file_info, require_hash):
+        model = ModelUtils.update_file_model(ModelUtils.create_empty_file_model(path), file_info)
+        if require_hash:
+            ModelUtils.update_hash(model, file_info)
+        return model
+
+    @staticmethod
+    def _set_file_content(model, file_content, format):
+        if format is None:
+            format = "text"
+
+        if model['mimetype'] is None:
+            default_mime = {
+                'text': 'text/plain',
+                'base64': 'application/octet-stream'
+            }[format]
+            model['mimetype'] = default_mime
+
+        model.update(
+            content=file_content,
+            format=format,
+        )
+
+    def _get_held_role(self, file_info, content):
+        if content or not self.lock_api.holds_lock(file_info):
+            return None
+        return self._held_roles.get(self._get_file_key(file_info))
+
+    def _remember_held_role(self, file_info, role, locked):
+        if not locked and self.lock_api.holds_lock(file_info):
+            self._held_roles.set(self._get_file_key(file_info), (role,))
+
+    @staticmethod
+    def _get_file_key(file_info):
+        return file_info['inode']['storage_id'], file_info['inode']['opaque_id']
+
+    def _get_writable(self, file_info, role, locked):
+        # check file permissions
+        if ShareUtils.map_permissions_to_role(file_info['permissions']) == Role.VIEWER:
+            return False
+
+        # check if file is shared with me
+        if role and role == Role.VIEWER:
+            return False
+
+        # check if file is locked
+        return not locked
+
+    def _get_clone_path(self, clone_file):
+        notebook_container = self.cs3_config.home_dir if self.cs3_config.home_dir else self.cs3_config.mount_dir
+        clone_file_path = FileUtils.normalize_path(notebook_container + '/' + clone_file)
+        return FileUtils.check_and_transform_file_path(clone_file_path)
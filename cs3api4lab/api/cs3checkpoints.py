@@ -6,13 +6,13 @@ import cs3.rpc.v1beta1.code_pb2 as cs3code
 import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
 
 import grpc
-from jupyter_server.services.contents.checkpoints import Checkpoints
+from jupyter_server.services.contents.checkpoints import Checkpoints, AsyncCheckpoints
 
-from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.services import ServiceRegistry
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.auth.channel_connector import ChannelConnector
-from cs3api4lab.locks.factory import LockApiFactory
+from cs3api4lab.auth.async_channel_connector import AsyncChannelConnector
 from cs3api4lab.utils.file_utils import FileUtils
 from traitlets.config import HasTraits
 
@@ -35,8 +35,9 @@ class CS3Checkpoints(Checkpoints):
 
         self.auth = Auth.get_authenticator(config=self.cs3_config, log=self.log)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
-        self.file_api = Cs3FileApi(log)
-        self.lock_api = LockApiFactory.create(log, self.cs3_config)
+        services = ServiceRegistry.get_services(log)
+        self.file_api = services.file_api
+        self.lock_api = services.lock_api
 
     def list_checkpoints(self, path):
         ref = FileUtils.get_reference(path)
@@ -44,6 +45,9 @@ class CS3Checkpoints(Checkpoints):
         response = self.cs3_api.ListFileVersions(request=request,
                                                  metadata=[('x-access-token', self.auth.authenticate())])
 
+        return self._map_versions(path, response)
+
+    def _map_versions(self, path, response):
         if response.status.code != cs3code.CODE_OK:
             self.log.error(f"msg=\"Failed to list file versions\" filepath={path}")
 
@@ -105,4 +109,79 @@ class CS3Checkpoints(Checkpoints):
        pass
 
     def delete_checkpoint(self, checkpoint_id, path):
-       pass
\ No newline at end of file
+       pass
+
+
+class AsyncCS3Checkpoints(AsyncCheckpoints, CS3Checkpoints):
+    """
+    CS3Checkpoints for AsyncCS3APIsManager, the file versions are listed and restored on a grpc.aio channel
+    """
+
+    def __init__(self, parent, log, config, **kwargs):
+        AsyncCheckpoints.__init__(self, **kwargs)
+        HasTraits.__init__(self, **kwargs)
+        self.parent = parent
+        self.log = log
+        self.cs3_config = config
+        self.auth = Auth.get_authenticator(config=self.cs3_config, log=self.log)
+
+    @property
+    def cs3_api(self):
+        return cs3gw_grpc.GatewayAPIStub(AsyncChannelConnector.get_channel(self.log))
+
+    @property
+    def file_api(self):
+        return ServiceRegistry.get_async_services(self.log).file_api
+
+    @property
+    def lock_api(self):
+        return ServiceRegistry.get_async_services(self.log).lock_api
+
+    async def list_checkpoints(self, path):
+        ref = FileUtils.get_reference(path)
+        request = cs3sp.ListFileVersionsRequest(ref=ref)
+        response = await self.cs3_api.ListFileVersions(
+            request=request, metadata=[('x-access-token', await self.auth.async_authenticate())])
+
+        return self._map_versions(path, response)
+
+    async def restore_checkpoint(self, contents_mgr, checkpoint_id, path):
+        checkpoint_id = str(checkpoint_id).replace('-', '.')
+        if self.cs3_config.dev_env:  # we need this until https://github.com/cs3org/reva/issues/3927 is fixed
+            checkpoint_id = 'v' + checkpoint_id
+
+        file_info = await self.file_api.stat_info(path)
+        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
+        if self.cs3_config.dev_env and "/home/" in file_info['filepath']:
+            opaque_id = urllib.parse.unquote(file_info['inode']['opaque_id'])
+            storage_id = urllib.parse.unquote(file_info['inode']['storage_id'])
+            file_info = await self.file_api.stat_info(opaque_id, storage_id)
+
+        ref = FileUtils.get_reference(path, self.cs3_config.endpoint)
+        request = cs3sp.RestoreFileVersionRequest(ref=ref, key=checkpoint_id)
+
+        if self.cs3_config.locks_api == "metadata":
+            if await self.lock_api.is_file_locked(file_info):
+                self.log.error(f"File {path} is locked and cannot be restored")
+                raise IOError(f"File {path} is locked and cannot be restored")
+        elif self.cs3_config.locks_api == "cs3":
+            if await self.lock_api.is_file_locked(file_info):
+                lock = await self.lock_api.get_lock(ref)
+                request = cs3sp.RestoreFileVersionRequest(ref=ref, key=checkpoint_id, lock_id=lock['lockId'])
+
+        response = await self.cs3_api.RestoreFileVersion(
+            request=request, metadata=[('x-access-token', await self.auth.async_authenticate())])
+        self.file_api.storage_api.invalidate_stat_ref(ref)
+
+        if response.status.code != cs3code.CODE_OK:
+            self.log.error(f"msg=\"Failed to restore file version\" filepath={path} version={checkpoint_id}")
+            raise IOError(response.status.message)
+
+    async def create_checkpoint(self, contents_mgr, path):
+        return {'id': 'checkpoint', 'last_modified': "0"}
+
+    async def rename_checkpoint(self, checkpoint_id, old_path, new_path):
+        pass
+
+    async def delete_checkpoint(self, checkpoint_id, path):
+        pass
@@ -0,0 +1,94 @@
+"""
+range_downloader.py
+
+Downloads a file from the Reva data gateway as byte ranges fetched concurrently
+
+Authors:
+"""
+import http
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RangeDownloader:
+
+    def __init__(self, log, config, storage_api):
+        self.log = log
+        self.config = config
+        self.storage_api = storage_api
+
+    def download(self, init_file_download, size):
+        """
+        Yields the content of a file of the given size in order, in chunks of config.chunk_size bytes.
+        Ranges of config.download_range_size bytes are fetched by config.download_parallelism workers,
+        at most that many ranges are kept in memory. Falls back to a single stream if the endpoint
+        does not honour the Range header.
+        """
+        time_start = time.time()
+        range_size = self.config.download_range_size
+        ranges = [(start, min(start + range_size, size) - 1) for start in range(0, size, range_size)]
+
+        file_get = self.storage_api.download_content(init_file_download, stream=True, byte_range=ranges[0])
+        executor = ThreadPoolExecutor(max_workers=self.config.download_parallelism)
+        pending = []
+        try:
+            if file_get.status_code == http.HTTPStatus.OK:
+                self.log.info('msg="Range requests not supported, downloading in a single stream"')
+                yield from file_get.iter_content(chunk_size=self.config.chunk_size)
+                return
+            self._check_range(file_get, ranges[0])
+
+            # the first response only probes the Range support, the next ranges are requested before its body is read
+            remaining = iter(ranges[1:])
+            for byte_range in itertools.islice(remaining, self.config.download_parallelism - 1):
+                pending.append(executor.submit(self._download_range, init_file_download, byte_range))
+            content = self._read_range(file_get, ranges[0])
+            file_get.close()
+
+            # a window of in-flight ranges keeps the workers busy while the ranges are yielded in order
+            while True:
+                next_range = next(remaining, None)
+                if next_range is not None:
+                    pending.append(executor.submit(self._download_range, init_file_download, next_range))
+                yield from self._iter_chunks(content)
+                if not pending:
+                    break
+                content = pending.pop(0).result()
+        finally:
+            file_get.close()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        self.log.debug('msg="ranged download finished" size="%d" ranges="%d" elapsedTimems="%.1f"' % (
+            size, len(ranges), (time.time() - time_start) * 1000))
+
+    def _download_range(self, init_file_download, byte_range):
+        file_get = self.storage_api.download_content(init_file_download, byte_range=byte_range)
+        return self._read_range(file_get, byte_range)
+
+    def _read_range(self, file_get, byte_range):
+        start, end = byte_range
+        self._check_range(file_get, byte_range)
+
+        content = file_get.content
+        if len(content) != end - start + 1:
+            raise IOError('Incomplete range %d-%d, received %d bytes' % (start, end, len(content)))
+        return content
+
+    def _check_range(self, file_get, byte_range):
+        start, end = byte_range
+        if file_get.status_code != http.HTTPStatus.PARTIAL_CONTENT:
+            self.log.error('msg="Error downloading file range from Reva" range="%d-%d" code="%d" reason="%s"' % (
+                start, end, file_get.status_code, file_get.reason))
+            raise IOError(file_get.reason)
+
+        content_range = file_get.headers.get('Content-Range')
+        if content_range is not None and not content_range.startswith('bytes %d-%d/' % (start, end)):
+            raise IOError('Unexpected range %s, requested %d-%d' % (content_range, start, end))
+
+    def _iter_chunks(self, content):
+        view = memoryview(content)
+        for i in range(0, len(view), self.config.chunk_size):
+            yield bytes(view[i:i + self.config.chunk_size])
@@ -0,0 +1,91 @@
+"""
+services.py
+
+Process-wide container of the CS3 API objects shared by the handlers, the contents manager and the checkpoints
+
+Authors:
+"""
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.api.storage_api import StorageApi, AsyncStorageApi
+from cs3api4lab.api.cs3_file_api import Cs3FileApi, AsyncCs3FileApi
+from cs3api4lab.api.cs3_user_api import Cs3UserApi, AsyncCs3UserApi
+from cs3api4lab.api.cs3_share_api import Cs3ShareApi, AsyncCs3ShareApi
+from cs3api4lab.api.cs3_ocm_share_api import Cs3OcmShareApi
+from cs3api4lab.api.cs3_public_share_api import Cs3PublicShareApi
+from cs3api4lab.api.share_api_facade import ShareAPIFacade
+from cs3api4lab.locks.factory import LockApiFactory
+from cs3api4lab.auth.async_channel_connector import AsyncChannelConnector
+from cs3api4lab.utils.asyncify import get_or_create_eventloop
+
+
+class Services:
+    """
+    Builds the API object graph once: every API gets the same StorageApi, lock API and Cs3FileApi
+    instead of constructing its own copies (with their own stubs and intercept channels) on every request.
+    The APIs keep no per-request state, so the instances are shared by the request threads.
+    """
+
+    def __init__(self, log, config=None):
+        self.log = log
+        self.config = config or Cs3ConfigManager.get_config()
+        self.storage_api = StorageApi(log)
+        self.lock_api = LockApiFactory.create(log, self.config, self.storage_api)
+        self.file_api = Cs3FileApi(log, self.storage_api, self.lock_api)
+        self.user_api = Cs3UserApi(log)
+        self.share_api = Cs3ShareApi(log, self.file_api, self.storage_api)
+        self.ocm_share_api = Cs3OcmShareApi(log, self.file_api)
+        self.public_share_api = Cs3PublicShareApi(log, self.file_api)
+        self.share_facade = ShareAPIFacade(log, self.file_api, self.user_api, self.share_api, self.ocm_share_api,
+                                           self.storage_api)
+
+
+class AsyncServices:
+    """
+    The grpc.aio counterpart of Services. The aio channel belongs to an event loop, so an object graph
+    is built for each loop it is requested from.
+    """
+
+    def __init__(self, log, config=None):
+        self.log = log
+        self.config = config or Cs3ConfigManager.get_config()
+        self.loop = get_or_create_eventloop()
+        self.storage_api = AsyncStorageApi(log)
+        self.transfer_api = StorageApi(log)
+        self.lock_api = LockApiFactory.create_async(log, self.config, self.storage_api)
+        self.file_api = AsyncCs3FileApi(log, self.storage_api, self.lock_api, self.transfer_api)
+        self.user_api = AsyncCs3UserApi(log)
+        self.share_api = AsyncCs3ShareApi(log, self.file_api, self.storage_api)
+
+
+class ServiceRegistry:
+    __services_instance = None
+    __async_services = {}
+
+    @classmethod
+    def get_services(cls, log=None):
+        if cls.__services_instance is None:
+            if log is None:
+                log = LoggingConfigurable().log
+            cls.__services_instance = Services(log)
+        return cls.__services_instance
+
+    @classmethod
+    def get_async_services(cls, log=None):
+        loop = get_or_create_eventloop()
+        services = cls.__async_services.get(loop)
+        if services is None:
+            if log is None:
+                log = LoggingConfigurable().log
+            # the graphs of the closed loops can't make any request anymore
+            cls.__async_services = {services_loop: loop_services for services_loop, loop_services
+                                    in cls.__async_services.items() if not services_loop.is_closed()}
+            services = cls.__async_services[loop] = AsyncServices(log)
+        return services
+
+    @classmethod
+    def clean(cls):
+        cls.__services_instance = None
+        cls.__async_services = {}
+        AsyncChannelConnector.close()
@@ -1,4 +1,8 @@
+import copy
+import hashlib
+import json
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 import cs3.ocm.provider.v1beta1.provider_api_pb2_grpc as ocm_provider_api_grpc
 import cs3.storage.provider.v1beta1.resources_pb2 as Resources
@@ -12,28 +16,37 @@ from cs3api4lab.api.cs3_user_api import Cs3UserApi
 
 from cs3api4lab.api.cs3_share_api import Cs3ShareApi
 from cs3api4lab.api.cs3_ocm_share_api import Cs3OcmShareApi
+from cs3api4lab.api.share_index import ShareIndex
 
 from cs3api4lab.utils.share_utils import ShareUtils
 from cs3api4lab.utils.model_utils import ModelUtils
 from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.cache import TTLCache
 from cs3api4lab.api.storage_api import StorageApi
-from cs3api4lab.exception.exceptions import OCMDisabledError
+from cs3api4lab.exception.exceptions import OCMDisabledError, ShareNotFoundError
 
 class ShareAPIFacade:
-    def __init__(self, log):
+    # the models of the share lists also show the names and sizes of the shared resources, which change
+    # without changing the share lists, so a model is not served for longer than this
+    share_model_ttl = 60
+
+    def __init__(self, log, file_api=None, user_api=None, share_api=None, ocm_share_api=None, storage_api=None):
         self.log = log
         self.config = Cs3ConfigManager().get_config()
         self.auth = Auth.get_authenticator(config=self.config, log=self.log)
-        self.file_api = Cs3FileApi(log)
+        self.storage_api = storage_api or StorageApi(log)
+        self.file_api = file_api or Cs3FileApi(log, self.storage_api)
 
         channel = ChannelConnector().get_channel()
         self.provider_api = ocm_provider_api_grpc.ProviderAPIStub(channel)
-        self.user_api = Cs3UserApi(log)
+        self.user_api = user_api or Cs3UserApi(log)
 
-        self.share_api = Cs3ShareApi(log)
-        self.ocm_share_api = Cs3OcmShareApi(log)
+        self.share_api = share_api or Cs3ShareApi(log, self.file_api, self.storage_api)
+        self.ocm_share_api = ocm_share_api or Cs3OcmShareApi(log, self.file_api)
 
-        self.storage_api = StorageApi(log)
+        self.share_index = ShareIndex.get_index()
+        # (version of the share lists, etag, model) of the last listings of created and received shares
+        self.share_models = TTLCache(2, self.share_model_ttl)
         return
 
     def create(self, endpoint, file_path, opaque_id, idp, role=Role.EDITOR, grantee_type=Grantee.USER, reshare=True):
@@ -57,6 +70,11 @@ class ShareAPIFacade:
 
         return role
 
+    def get_share_received_role_by_stat(self, file_stat):
+        """Same as get_share_received_role, for a file that was already stated"""
+        share = self.share_api.get_share_received_by_stat(file_stat)
+        return ShareUtils.map_permissions_to_role(share.permissions.permissions) if share else None
+
     def update_share(self, params):
         """Updates a field of a share
             Paramterers:
@@ -113,15 +131,22 @@ class ShareAPIFacade:
         :param: filter_duplicates - wether to filter out duplicated shares by resource id
         :rtype: dict
         """
+        return self.list_shares_with_etag(filter_duplicates)[1]
+
+    def list_shares_with_etag(self, filter_duplicates=False):
+        """
+        :return: the etag and the model of list_shares, the model is mapped again only when
+        the share lists returned by the server change
+        """
         share_list = self.share_api.list()
         if self.config.enable_ocm:
             ocm_share_list = self.ocm_share_api.list()
         else:
             ocm_share_list = None
-        mapped_shares = self.map_shares(share_list, ocm_share_list)
+        etag, mapped_shares = self._get_share_model(ShareIndex.REGULAR, share_list, ocm_share_list)
         if filter_duplicates:
             mapped_shares = self._filter_duplicates(mapped_shares)
-        return mapped_shares
+        return '%s-%d' % (etag, filter_duplicates), mapped_shares
 
     def _filter_duplicates(self, shares):
         resource_ids = []
@@ -139,20 +164,49 @@ class ShareAPIFacade:
         :return: received shares and OCM received shares combined and mapped to Jupyter model
         :rtype: dict
         """
+        return self.list_received_with_etag(status, path)[1]
 
+    def list_received_with_etag(self, status=None, path=None):
+        """
+        :return: the etag and the model of list_received, the model of all the received shares
+        is mapped again only when the share lists returned by the server change
+        """
         share_list = self.share_api.list_received(path)
         if self.config.enable_ocm:
             ocm_share_list = self.ocm_share_api.list_received()
         else:
             ocm_share_list = None
 
-        mapped_shares = self.map_shares(share_list, ocm_share_list, True)
+        if path is None:
+            etag, mapped_shares = self._get_share_model(ShareIndex.RECEIVED, share_list, ocm_share_list)
+        else:
+            etag, mapped_shares = None, self.map_shares(share_list, ocm_share_list, True)
         if not status:
             status = 'accepted'
 
         mapped_shares['content'] = list(filter(lambda share: share['state'] == status, mapped_shares['content']))
 
-        return mapped_shares
+        return etag and '%s-%s' % (etag, status), mapped_shares
+
+    def _get_share_model(self, kind, share_list, ocm_share_list):
+        """
+        Returns the etag and a copy of the model of the share lists, the model is kept with a hash
+        of the lists and mapped again when they change. The etag is a hash of the model, a model mapped
+        again without any change (e.g. after it expired) keeps its etag.
+        """
+        version = hashlib.sha1()
+        for response in (share_list, ocm_share_list):
+            if response is not None:
+                version.update(response.SerializeToString(deterministic=True))
+        version = version.hexdigest()
+
+        cached_model = self.share_models.get(kind)
+        if cached_model is None or cached_model[0] != version:
+            model = self.map_shares(share_list, ocm_share_list, kind == ShareIndex.RECEIVED)
+            etag = hashlib.sha1(json.dumps(model, sort_keys=True, default=str).encode()).hexdigest()
+            cached_model = (version, etag, model)
+            self.share_models.set(kind, cached_model)
+        return cached_model[1], copy.deepcopy(cached_model[2])
 
     def list_grantees_for_file(self, file_path, type):
         """
@@ -194,6 +248,12 @@ class ShareAPIFacade:
         return not bool(self.user_api.get_user_info(idp, opaque_id))
 
     def is_share(self, opaque_id):
+        kinds = self.share_index.get_kinds(self.auth.config.client_id, opaque_id)
+        if ShareIndex.REGULAR in kinds:
+            return True
+        if ShareIndex.OCM in kinds:
+            return False
+
         try:
             self.share_api.get(opaque_id)
         except Exception:
@@ -202,23 +262,31 @@ class ShareAPIFacade:
         return True
 
     def is_ocm_share(self, share_id):
-        """Checks if share is present on shares list"""
-        for share in self.share_api.list().shares:
-            if share.id.opaque_id == share_id:
-                return False
-        return True
+        """Checks if share is not a regular share"""
+        return not self.is_share(share_id)
 
     def is_ocm_received_share(self, share_id):
-        """Checks if share is present on OCM received shares list"""
-        if self.config.enable_ocm:
-            try:
-                # if OCM is not enabled on IOP side this call will fail
-                received_shares = self.ocm_share_api.list_received()
-                for share in received_shares.shares:
-                    if share_id == share.share.id.opaque_id:
-                        return True
-            except Exception as e:
-                self.log.error("Error checking OCM " + str(e))
+        """Checks if share is an OCM received share"""
+        kinds = self.share_index.get_kinds(self.auth.config.client_id, share_id)
+        if ShareIndex.OCM_RECEIVED in kinds:
+            return True
+        if ShareIndex.RECEIVED in kinds or not self.config.enable_ocm:
+            return False
+
+        try:
+            self.share_api.get_received(share_id)
+            return False
+        except Exception:
+            pass
+
+        try:
+            # if OCM is not enabled on IOP side this call will fail
+            self.ocm_share_api.get_received_share(share_id)
+            return True
+        except ShareNotFoundError:
+            pass
+        except Exception as e:
+            self.log.error("Error checking OCM " + str(e))
         return False
 
     def map_shares(self, share_list, ocm_share_list, received=False):
@@ -232,15 +300,17 @@ class ShareAPIFacade:
 
     def map_shares_to_model(self, list_response, received=False):
         respond_model = ModelUtils.create_respond_model()
-        share_no = 0
-        for share in list_response.shares:
-            if received:
-                share = share.share
+        if received:
+            shares = [(received_share.share, received_share.state) for received_share in list_response.shares]
+        else:
+            shares = [(share, None) for share in list_response.shares]
+
+        owners, stats = self._resolve_owners_and_resources([share for share, _ in shares])
+
+        for share, state in shares:
             try:
-                user = self.user_api.get_user_info(share.owner.idp, share.owner.opaque_id)
-                stat = self.file_api.stat_info(urllib.parse.unquote(share.resource_id.opaque_id),
-                                               share.resource_id.storage_id)  # todo remove this and use storage_logic
-                # stat = self.storage_logic.stat_info(urllib.parse.unquote(share.resource_id.opaque_id), share.resource_id.storage_id)
+                user = owners[(share.owner.idp, share.owner.opaque_id)].result()
+                stat = stats[(share.resource_id.storage_id, share.resource_id.opaque_id)].result()
 
                 if stat['type'] == Resources.RESOURCE_TYPE_FILE:
                     if hasattr(share.permissions.permissions,
@@ -263,10 +333,29 @@ class ShareAPIFacade:
                 continue
 
             if received:
-                model['state'] = ShareUtils.state_to_string(list_response.shares[share_no].state)
+                model['state'] = ShareUtils.state_to_string(state)
             model['resource_id'] = {'storage_id': share.resource_id.storage_id,
                                     'opaque_id': share.resource_id.opaque_id}
             respond_model['content'].append(model)
-            share_no = share_no + 1
 
         return respond_model
+
+    def _resolve_owners_and_resources(self, shares):
+        """
+        Looks up every distinct owner and resource of the shares once, the lookups run concurrently
+        in a pool of config.share_lookup_workers threads. Returns the futures keyed by owner and by resource id,
+        a failed lookup raises when its result is read.
+        """
+        owner_ids = {(share.owner.idp, share.owner.opaque_id) for share in shares}
+        resource_ids = {(share.resource_id.storage_id, share.resource_id.opaque_id) for share in shares}
+        workers = max(min(self.config.share_lookup_workers, len(owner_ids) + len(resource_ids)), 1)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            owners = {owner_id: executor.submit(self.user_api.get_user_info, *owner_id)
+                      for owner_id in owner_ids}
+            # todo remove this and use storage_logic
+            stats = {resource_id: executor.submit(self.file_api.stat_info, urllib.parse.unquote(resource_id[1]),
+                                                  resource_id[0])
+                     for resource_id in resource_ids}
+
+        return owners, stats
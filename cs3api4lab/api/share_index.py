@@ -0,0 +1,111 @@
+"""
+share_index.py
+
+Index of the shares seen by the share APIs, so a share can be found without listing all of them
+
+Authors:
+"""
+import threading
+
+
+class ShareIndex:
+    """
+    Keeps the shares returned by the share APIs per user, by share id and by resource id.
+    Every entry knows the kind of the share: a given share, an OCM share or a received (OCM) share.
+    The index is filled by the list calls and updated incrementally by create, get, update and remove,
+    a lookup that misses means that the share was not seen yet, not that it does not exist.
+    """
+    REGULAR = 'regular'
+    OCM = 'ocm'
+    RECEIVED = 'received'
+    OCM_RECEIVED = 'ocm_received'
+
+    __index_instance = None
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._shares = {}  # (user, share id) -> {kind: share}
+        self._by_resource = {}  # (user, storage id, opaque id) -> {(share id, kind)}
+        self._by_kind = {}  # (user, kind) -> {share id}
+
+    @classmethod
+    def get_index(cls):
+        if cls.__index_instance is None:
+            cls.__index_instance = ShareIndex()
+        return cls.__index_instance
+
+    def add(self, user, kind, share):
+        """
+        Adds or replaces a share, received shares are indexed by the id of the share they wrap
+        """
+        share_id = self._get_share(kind, share).id.opaque_id
+        with self._lock:
+            self._discard(user, kind, share_id)
+            self._shares.setdefault((user, share_id), {})[kind] = share
+            self._by_resource.setdefault(self._get_resource_key(user, kind, share), set()).add((share_id, kind))
+            self._by_kind.setdefault((user, kind), set()).add(share_id)
+
+    def replace_all(self, user, kind, shares):
+        """
+        Replaces all the shares of a kind with the result of a complete list call
+        """
+        with self._lock:
+            for share_id in list(self._by_kind.get((user, kind), ())):
+                self._discard(user, kind, share_id)
+            for share in shares:
+                self.add(user, kind, share)
+
+    def remove(self, user, share_id):
+        with self._lock:
+            for kind in list(self._shares.get((user, share_id), {})):
+                self._discard(user, kind, share_id)
+
+    def get(self, user, share_id, kind=None):
+        """
+        Returns the share of the given kind (or of any kind), None if it was not seen yet
+        """
+        with self._lock:
+            shares = self._shares.get((user, share_id), {})
+            if kind is not None:
+                return shares.get(kind)
+            return next(iter(shares.values()), None)
+
+    def get_kinds(self, user, share_id):
+        with self._lock:
+            return set(self._shares.get((user, share_id), {}))
+
+    def find_by_resource(self, user, storage_id, opaque_id, kind=None):
+        with self._lock:
+            entries = self._by_resource.get((user, storage_id, opaque_id), set())
+            return [self._shares[(user, share_id)][share_kind] for share_id, share_kind in entries
+                    if kind is None or share_kind == kind]
+
+    def clear(self):
+        with self._lock:
+            self._shares = {}
+            self._by_resource = {}
+            self._by_kind = {}
+
+    def _discard(self, user, kind, share_id):
+        shares = self._shares.get((user, share_id))
+        if not shares or kind not in shares:
+            return
+
+        share = shares.pop(kind)
+        if not shares:
+            del self._shares[(user, share_id)]
+
+        resource_key = self._get_resource_key(user, kind, share)
+        entries = self._by_resource.get(resource_key)
+        if entries is not None:
+            entries.discard((share_id, kind))
+            if not entries:
+                del self._by_resource[resource_key]
+        self._by_kind.get((user, kind), set()).discard(share_id)
+
+    def _get_resource_key(self, user, kind, share):
+        resource_id = self._get_share(kind, share).resource_id
+        return user, resource_id.storage_id, resource_id.opaque_id
+
+    def _get_share(self, kind, share):
+        return share.share if kind in (ShareIndex.RECEIVED, ShareIndex.OCM_RECEIVED) else share
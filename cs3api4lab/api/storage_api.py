@@ -1,21 +1,27 @@
+import asyncio
 import urllib.parse
 
 import grpc
-import requests
 
 import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
 import cs3.types.v1beta1.types_pb2 as types
 import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
 import cs3.rpc.v1beta1.code_pb2 as cs3code
 import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
-import webdav3.client as webdav
 
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.channel_connector import ChannelConnector
+from cs3api4lab.auth.async_channel_connector import AsyncChannelConnector
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 
 from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.cache import TTLCache
+from cs3api4lab.utils.request_context import RequestContext
+from cs3api4lab.utils.content_stream import ContentStream
+from cs3api4lab.api.tus_uploader import TusUploader
+from cs3api4lab.api.transfer_sessions import TransferSessions
 from cs3api4lab.auth.authenticator import Auth
+from cs3api4lab.exception.exceptions import FileConflictError, GatewayUnavailableError
 
 
 class StorageApi:
@@ -23,6 +29,8 @@ class StorageApi:
     cs3_api = None
     auth = None
     config = None
+    stat_cache = None
+    __stat_cache_instance = None
 
     def __init__(self, log):
         self.log = log
@@ -32,58 +40,180 @@ class StorageApi:
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
         intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
+        self.stat_cache = StorageApi.get_stat_cache(self.config)
         return
 
+    @classmethod
+    def get_stat_cache(cls, config=None):
+        """
+        The stat cache is shared by all the StorageApi instances, so that a change made through one
+        of them invalidates the entries seen by the others
+        """
+        if cls.__stat_cache_instance is None:
+            if config is None:
+                config = Cs3ConfigManager.get_config()
+            cls.__stat_cache_instance = TTLCache(config.stat_cache_size, config.stat_cache_ttl)
+        return cls.__stat_cache_instance
+
     def get_unified_file_ref(self, file_path, endpoint):
         stat = self.stat(file_path, endpoint)
         if stat.status.code != cs3code.CODE_OK:
             return None
         else:
-            stat_unified = self._stat_internal(ref=storage_provider.Reference(
-                resource_id=storage_provider.ResourceId(storage_id=stat.info.id.storage_id,
-                                                        opaque_id=stat.info.id.opaque_id)))
+            stat_unified = self._stat_internal(ref=self._get_id_reference(stat))
             return storage_provider.Reference(path=stat_unified.info.path)
 
-    def stat(self, file_path, endpoint='/'):
+    def stat(self, file_path, endpoint='/', cached=True):
+        """
+        Stats the resource, with cached=False the server is asked even if the stat is cached
+        (the cache is updated with the response)
+        """
         ref = FileUtils.get_reference(file_path, endpoint)
-        return self._stat_internal(ref)
+        return self._stat_internal(ref, cached)
+
+    def _stat_internal(self, ref, cached=True):
+        key = self._get_stat_cache_key(ref)
+        stat = self._get_known_stat(key, cached)
+        if stat is not None:
+            return stat
+
+        try:
+            stat = self.cs3_api.Stat(request=self._get_stat_request(ref), metadata=self._get_token())
+        except GatewayUnavailableError as e:
+            return self._get_stale_stat(key, e)
+        return self._remember_stat(key, stat)
+
+    def _get_known_stat(self, key, cached):
+        """
+        Returns a copy of the stat of the resource from the current request or from the cache, None if it has
+        to be stated. A resource stated during the current request is not stated again, even uncached.
+        """
+        request_stat = RequestContext.get('stat', key)
+        if request_stat is not RequestContext.NOT_SET:
+            return self._copy_stat(request_stat)
+
+        cached_stat = self.stat_cache.get(key) if cached else None
+        if cached_stat is not None:
+            return self._copy_stat(cached_stat)
+        return None
+
+    @staticmethod
+    def _get_stat_request(ref):
+        return cs3sp.StatRequest(ref=ref, arbitrary_metadata_keys='*')
+
+    def _remember_stat(self, key, stat):
+        if stat.status.code in (cs3code.CODE_OK, cs3code.CODE_NOT_FOUND):
+            RequestContext.set('stat', key, self._copy_stat(stat))
+        if stat.status.code == cs3code.CODE_OK:
+            # the callers get their own copy, so a modified response never ends up in the cache
+            self.stat_cache.set(key, self._copy_stat(stat))
+        return stat
+
+    def invalidate_stat(self, file_path, endpoint=None):
+        self.invalidate_stat_ref(FileUtils.get_reference(file_path, endpoint))
+
+    def invalidate_stat_ref(self, ref):
+        """
+        Drops the cached stats of a resource and of everything below it. A resource can be cached
+        under its path and under its id, the entries are matched by both the requested reference
+        and the path and id returned by the server. The entries of all the users are dropped,
+        as a shared resource is seen by the grantees under the same id.
+        """
+        paths = {ref.path} if ref.path else set()
+        ids = set() if ref.path else {(ref.resource_id.storage_id, ref.resource_id.opaque_id)}
+
+        def matches(key, stat):
+            return self._is_path_below(key[1], paths) or key[2:] in ids or \
+                self._is_path_below(stat.info.path, paths) or \
+                (stat.info.id.storage_id, stat.info.id.opaque_id) in ids
+
+        for key, stat in self.stat_cache.items():
+            if matches(key, stat):
+                paths.add(stat.info.path)
+                ids.add((stat.info.id.storage_id, stat.info.id.opaque_id))
+
+        self.stat_cache.invalidate_if(matches)
+        # the change may affect anything looked up during the current request
+        RequestContext.invalidate()
+
+    def _get_stat_cache_key(self, ref):
+        return self.auth.config.client_id, ref.path, ref.resource_id.storage_id, ref.resource_id.opaque_id
+
+    def _get_stale_stat(self, key, error):
+        """
+        Returns a copy of the last known stat, served while the gateway circuit is open.
+        The error is raised again when there is none.
+        """
+        stale_stat = self.stat_cache.get_stale(key)
+        if stale_stat is None:
+            raise error
+        self.log.warning('msg="Gateway unavailable, serving a stale stat" path="%s"' % key[1])
+        return self._copy_stat(stale_stat)
 
-    def _stat_internal(self, ref):
-        return self.cs3_api.Stat(request=cs3sp.StatRequest(ref=ref, arbitrary_metadata_keys='*'),
-                                 metadata=[('x-access-token', self.auth.authenticate())])
+    @staticmethod
+    def _is_path_below(path, paths):
+        return bool(path) and any(path == p or path.startswith(p.rstrip('/') + '/') for p in paths)
+
+    @staticmethod
+    def _copy_stat(stat):
+        stat_copy = cs3sp.StatResponse()
+        stat_copy.CopyFrom(stat)
+        return stat_copy
+
+    @staticmethod
+    def _get_id_reference(stat):
+        return storage_provider.Reference(resource_id=storage_provider.ResourceId(
+            storage_id=stat.info.id.storage_id, opaque_id=stat.info.id.opaque_id))
 
     def set_metadata(self, key, data, stat):
+        request = self._get_set_metadata_request(key, data, stat)
+        set_metadata_response = self.cs3_api.SetArbitraryMetadata(request=request, metadata=self._get_token())
+        self._check_set_metadata(stat, request.ref, set_metadata_response)
+
+    @staticmethod
+    def _get_set_metadata_request(key, data, stat):
         opaque_id = urllib.parse.unquote(stat['inode']['opaque_id'])
         storage_id = urllib.parse.unquote(stat['inode']['storage_id'])
         reference = FileUtils.get_reference(opaque_id, storage_id)
         arbitrary_metadata = storage_provider.ArbitraryMetadata()
         arbitrary_metadata.metadata[key] = data
+        return cs3sp.SetArbitraryMetadataRequest(ref=reference, arbitrary_metadata=arbitrary_metadata)
 
-        set_metadata_response = self.cs3_api.SetArbitraryMetadata(
-            request=cs3sp.SetArbitraryMetadataRequest(
-                ref=reference,
-                arbitrary_metadata=arbitrary_metadata),
-            metadata=self._get_token())
-
+    def _check_set_metadata(self, stat, reference, set_metadata_response):
+        self.invalidate_stat_ref(reference)
         if set_metadata_response.status.code != cs3code.CODE_OK:
             raise Exception('Unable to set metadata for: ' + stat['filepath'] + ' ' + str(set_metadata_response.status))
 
     def get_metadata(self, file_path, endpoint):
         ref = self.get_unified_file_ref(file_path, endpoint)
         if ref:
-            stat = self._stat_internal(ref)
-            if stat.status.code == cs3code.CODE_OK:
-                return stat.info.arbitrary_metadata.metadata
+            return self._get_metadata(self._stat_internal(ref))
         return None
 
-    def init_file_upload(self, file_path, endpoint, content_size):
+    @staticmethod
+    def _get_metadata(stat):
+        if stat.status.code == cs3code.CODE_OK:
+            return stat.info.arbitrary_metadata.metadata
+        return None
+
+    def init_file_upload(self, file_path, endpoint, content_size, if_match=None):
+        req = self._get_upload_request(file_path, endpoint, content_size, if_match)
+        init_file_upload_res = self.cs3_api.InitiateFileUpload(request=req, metadata=self._get_token())
+        return self._get_upload_response(file_path, if_match, init_file_upload_res)
+
+    @staticmethod
+    def _get_upload_request(file_path, endpoint, content_size, if_match):
         reference = FileUtils.get_reference(file_path, endpoint)
         meta_data = types.Opaque(
             map={"Upload-Length": types.OpaqueEntry(decoder="plain", value=str.encode(content_size))})
 
-        req = cs3sp.InitiateFileUploadRequest(ref=reference, opaque=meta_data)
-        init_file_upload_res = self.cs3_api.InitiateFileUpload(request=req, metadata=[
-            ('x-access-token', self.auth.authenticate())])
+        # with if_match the upload is only initiated while the file still has the given etag
+        return cs3sp.InitiateFileUploadRequest(ref=reference, opaque=meta_data, if_match=if_match or '')
+
+    def _get_upload_response(self, file_path, if_match, init_file_upload_res):
+        if init_file_upload_res.status.code in (cs3code.CODE_FAILED_PRECONDITION, cs3code.CODE_ABORTED) and if_match:
+            self.log.info('msg="File changed since it was stated" file_path="%s" etag="%s"' % (file_path, if_match))
+            raise FileConflictError("File %s was changed" % file_path)
 
         if init_file_upload_res.status.code != cs3code.CODE_OK:
             self.log.debug('msg="Failed to initiateFileUpload on write" file_path="%s" reason="%s"' % \
@@ -96,6 +226,16 @@ class StorageApi:
         return init_file_upload_res
 
     def upload_content(self, file_path, content, content_size, init_file_upload_response):
+        content = ContentStream.from_content(content, self.config.chunk_size)
+        tus_protocols = [p for p in init_file_upload_response.protocols if p.protocol == "tus"]
+        if self.config.tus_enabled and tus_protocols:
+            headers = {
+                'x-access-token': self.auth.authenticate(),
+                'X-Reva-Transfer': tus_protocols[0].token
+            }
+            uploader = TusUploader(self.log, self.config, tus_protocols[0].upload_endpoint, headers)
+            return uploader.upload(content)
+
         protocol = [p for p in init_file_upload_response.protocols if p.protocol == "simple"][0]
         if self.config.tus_enabled:
             headers = {
@@ -111,24 +251,26 @@ class StorageApi:
                 'Upload-Length': content_size,
                 'X-Reva-Transfer': protocol.token
             }
-        put_res = requests.put(url=protocol.upload_endpoint, data=content, headers=headers)
+        # an empty body would be sent with chunked transfer encoding
+        data = content if len(content) > 0 else b''
+        session = TransferSessions.get_session(protocol.upload_endpoint)
+        put_res = session.put(url=protocol.upload_endpoint, data=data, headers=headers)
 
         return put_res
 
     def init_file_download(self, file_path, endpoint):
-        reference = FileUtils.get_reference(file_path, endpoint)
-        req = cs3sp.InitiateFileDownloadRequest(ref=reference)
-
-        init_file_download_response = self.cs3_api.InitiateFileDownload(request=req, metadata=[
-            ('x-access-token', self.auth.authenticate())])
+        req = cs3sp.InitiateFileDownloadRequest(ref=FileUtils.get_reference(file_path, endpoint))
+        init_file_download_response = self.cs3_api.InitiateFileDownload(request=req, metadata=self._get_token())
+        return self._get_download_response(file_path, init_file_download_response)
 
+    def _get_download_response(self, file_path, init_file_download_response):
         if init_file_download_response.status.code == cs3code.CODE_NOT_FOUND:
             self.log.info('msg="File not found on read" filepath="%s"' % file_path)
             raise IOError('No such file or directory')
 
         elif init_file_download_response.status.code != cs3code.CODE_OK:
-            self.log.debug('msg="Failed to initiateFileDownload on read" filepath="%s" reason="%s"' % file_path,
-                           init_file_download_response.status.message)
+            self.log.debug('msg="Failed to initiateFileDownload on read" filepath="%s" reason="%s"' % (
+                file_path, init_file_download_response.status.message))
             raise IOError(init_file_download_response.status.message)
 
         self.log.debug(
@@ -136,24 +278,103 @@ class StorageApi:
 
         return init_file_download_response
 
-    def download_content(self, init_file_download):
+    def download_content(self, init_file_download, stream=False, byte_range=None):
+        """
+        Downloads the file content. With stream=True the body is not read up front,
+        the caller is expected to consume it with iter_content() and close the response.
+        byte_range is an inclusive (start, end) tuple, a server honouring it answers with 206.
+        """
         protocol = [p for p in init_file_download.protocols if p.protocol == "simple"][0]
         # if file is shared via OCM the request needs to go through webdav
         if protocol.opaque and init_file_download.protocols[0].opaque.map['webdav-file-path'].value:
             download_url = protocol.download_endpoint + str(protocol.opaque.map['webdav-file-path'].value, 'utf-8')[1:]
-            file_get = webdav.Client({}).session.request(
-                method='GET',
-                url=download_url,
-                headers={
-                    'X-Access-Token': str(protocol.opaque.map['webdav-token'].value, 'utf-8')}
-            )
+            headers = {
+                'X-Access-Token': str(protocol.opaque.map['webdav-token'].value, 'utf-8')
+            }
         else:
+            download_url = protocol.download_endpoint
             headers = {
                 'x-access-token': self.auth.authenticate(),
                 'X-Reva-Transfer': protocol.token  # needed if the downloads pass through the data gateway in reva
             }
-            file_get = requests.get(url=protocol.download_endpoint, headers=headers)
-        return file_get
+
+        if byte_range is not None:
+            headers['Range'] = 'bytes=%d-%d' % byte_range
+
+        session = TransferSessions.get_session(download_url)
+        return session.get(url=download_url, headers=headers, stream=stream)
 
     def _get_token(self):
         return [('x-access-token', self.auth.authenticate())]
+
+
+class AsyncStorageApi(StorageApi):
+    """
+    StorageApi on a grpc.aio channel, the RPCs are awaited on the event loop.
+    The HTTP transfers to the data gateway are still blocking, they run in the default executor.
+    """
+
+    def __init__(self, log):
+        self.log = log
+        self.config = Cs3ConfigManager.get_config()
+        self.auth = Auth.get_authenticator(config=self.config, log=self.log)
+        self.cs3_api = cs3gw_grpc.GatewayAPIStub(AsyncChannelConnector.get_channel(log))
+        self.stat_cache = StorageApi.get_stat_cache(self.config)
+
+    async def get_unified_file_ref(self, file_path, endpoint):
+        stat = await self.stat(file_path, endpoint)
+        if stat.status.code != cs3code.CODE_OK:
+            return None
+        else:
+            stat_unified = await self._stat_internal(ref=self._get_id_reference(stat))
+            return storage_provider.Reference(path=stat_unified.info.path)
+
+    async def stat(self, file_path, endpoint='/', cached=True):
+        ref = FileUtils.get_reference(file_path, endpoint)
+        return await self._stat_internal(ref, cached)
+
+    async def _stat_internal(self, ref, cached=True):
+        key = self._get_stat_cache_key(ref)
+        stat = self._get_known_stat(key, cached)
+        if stat is not None:
+            return stat
+
+        try:
+            stat = await self.cs3_api.Stat(request=self._get_stat_request(ref), metadata=await self._get_token())
+        except GatewayUnavailableError as e:
+            return self._get_stale_stat(key, e)
+        return self._remember_stat(key, stat)
+
+    async def set_metadata(self, key, data, stat):
+        request = self._get_set_metadata_request(key, data, stat)
+        set_metadata_response = await self.cs3_api.SetArbitraryMetadata(request=request,
+                                                                        metadata=await self._get_token())
+        self._check_set_metadata(stat, request.ref, set_metadata_response)
+
+    async def get_metadata(self, file_path, endpoint):
+        ref = await self.get_unified_file_ref(file_path, endpoint)
+        if ref:
+            return self._get_metadata(await self._stat_internal(ref))
+        return None
+
+    async def init_file_upload(self, file_path, endpoint, content_size, if_match=None):
+        req = self._get_upload_request(file_path, endpoint, content_size, if_match)
+        init_file_upload_res = await self.cs3_api.InitiateFileUpload(request=req, metadata=await self._get_token())
+        return self._get_upload_response(file_path, if_match, init_file_upload_res)
+
+    async def upload_content(self, file_path, content, content_size, init_file_upload_response):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, super().upload_content, file_path, content, content_size, init_file_upload_response)
+
+    async def init_file_download(self, file_path, endpoint):
+        req = cs3sp.InitiateFileDownloadRequest(ref=FileUtils.get_reference(file_path, endpoint))
+        init_file_download_response = await self.cs3_api.InitiateFileDownload(request=req,
+                                                                              metadata=await self._get_token())
+        return self._get_download_response(file_path, init_file_download_response)
+
+    async def download_content(self, init_file_download, stream=False, byte_range=None):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, super().download_content, init_file_download, stream, byte_range)
+
+    async def _get_token(self):
+        return [('x-access-token', await self.auth.async_authenticate())]
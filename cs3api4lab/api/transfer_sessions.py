@@ -0,0 +1,59 @@
+"""
+transfer_sessions.py
+
+Shared HTTP sessions for the data transfers to the Reva data gateway and WebDAV endpoints
+
+Authors:
+"""
+import http.cookiejar
+import threading
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+
+
+class TransferSessions:
+    """
+    Keeps one pooled session per scheme and host, so that uploads and downloads reuse
+    kept-alive TCP/TLS connections instead of paying a new handshake for every file operation.
+    The sessions do not store cookies, which keeps them stateless and safe to share between threads.
+    """
+    __sessions = {}
+    __lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls, url):
+        parsed_url = urllib.parse.urlparse(url)
+        key = (parsed_url.scheme, parsed_url.netloc)
+
+        session = cls.__sessions.get(key)
+        if session is None:
+            with cls.__lock:
+                session = cls.__sessions.get(key)
+                if session is None:
+                    session = cls._create_session()
+                    cls.__sessions[key] = session
+        return session
+
+    @classmethod
+    def clean(cls):
+        with cls.__lock:
+            for session in cls.__sessions.values():
+                session.close()
+            cls.__sessions = {}
+
+    @staticmethod
+    def _create_session():
+        config = Cs3ConfigManager.get_config()
+        session = requests.Session()
+        session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        if not config.http_keep_alive:
+            session.headers['Connection'] = 'close'
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.http_pool_size, pool_block=False)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
@@ -0,0 +1,184 @@
+"""
+tus_uploader.py
+
+Client for the tus resumable upload protocol (https://tus.io/protocols/resumable-upload)
+used to upload files to the Reva data gateway.
+
+Authors:
+"""
+import http
+import math
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from cs3api4lab.api.transfer_sessions import TransferSessions
+
+
+class TusUploader:
+    tus_version = '1.0.0'
+
+    def __init__(self, log, config, upload_endpoint, headers):
+        self.log = log
+        self.config = config
+        self.upload_endpoint = upload_endpoint
+        self.headers = dict(headers, **{'Tus-Resumable': self.tus_version})
+
+    def upload(self, content):
+        """
+        Uploads a ContentStream with PATCH requests of config.tus_chunk_size bytes. A failed request
+        is resumed from the offset reported by the server, so only the missing bytes are sent again.
+        Parts are uploaded concurrently when config.tus_parallel_uploads > 1, the content supports
+        random access and the server implements the concatenation extension.
+        """
+        time_start = time.time()
+        parallel_uploads = self._count_parts(content)
+        if parallel_uploads > 1 and 'concatenation' in self._get_extensions():
+            response = self._upload_concatenated(content, parallel_uploads)
+        else:
+            upload_url = self._find_or_create(len(content))
+            response = self._upload_range(upload_url, iter(content), len(content))
+
+        self.log.debug('msg="tus upload finished" endpoint="%s" size="%d" elapsedTimems="%.1f"' % (
+            self.upload_endpoint, len(content), (time.time() - time_start) * 1000))
+        return response
+
+    def _count_parts(self, content):
+        if self.config.tus_parallel_uploads <= 1 or not content.supports_ranges:
+            return 1
+        return max(min(self.config.tus_parallel_uploads, math.ceil(len(content) / self.config.tus_chunk_size)), 1)
+
+    def _upload_concatenated(self, content, parts):
+        part_size = math.ceil(len(content) / parts)
+        ranges = [(start, min(start + part_size, len(content))) for start in range(0, len(content), part_size)]
+
+        def upload_part(byte_range):
+            start, end = byte_range
+            part_url = self._create(end - start, {'Upload-Concat': 'partial'})
+            self._upload_range(part_url, content.iter_range(start, end), end - start)
+            return part_url
+
+        with ThreadPoolExecutor(max_workers=parts) as executor:
+            part_urls = list(executor.map(upload_part, ranges))
+
+        response = self._request('POST', self.upload_endpoint, {
+            'Upload-Concat': 'final;' + ' '.join(urllib.parse.urlparse(url).path for url in part_urls)
+        })
+        if response.status_code != http.HTTPStatus.CREATED:
+            raise IOError('Unable to concatenate upload parts: %d %s' % (response.status_code, response.reason))
+        return response
+
+    def _upload_range(self, upload_url, chunks, length):
+        """
+        Sends the chunks, which add up to length bytes, starting at the offset already stored on the server
+        """
+        offset = self._get_offset(upload_url)
+        if length == 0:
+            return self._patch(upload_url, b'', 0)
+
+        response = None
+        position = 0
+        for buffer in self._buffer(chunks):
+            buffer_end = position + len(buffer)
+            if buffer_end > offset:
+                response, offset = self._send_buffer(upload_url, buffer, position, offset)
+            position = buffer_end
+
+        if offset != length:
+            raise IOError('Upload incomplete, %d of %d bytes stored' % (offset, length))
+        return response
+
+    def _send_buffer(self, upload_url, buffer, position, offset):
+        view = memoryview(buffer)
+        buffer_end = position + len(buffer)
+        retries = 0
+        response = None
+        while offset < buffer_end:
+            try:
+                response = self._patch(upload_url, view[offset - position:], offset)
+                patched_offset = int(response.headers['Upload-Offset'])
+            except (requests.exceptions.RequestException, IOError, KeyError, ValueError) as e:
+                error = e
+            else:
+                self._check_offset(patched_offset, position, buffer_end)
+                if patched_offset > offset:
+                    offset = patched_offset
+                    continue
+                # a request which stored nothing is a failed attempt, so the upload cannot loop forever
+                error = IOError('No bytes stored at offset %d' % offset)
+
+            retries += 1
+            if retries > self.config.tus_max_retries:
+                self.log.error('msg="tus upload failed" url="%s" offset="%d" reason="%s"' % (upload_url, offset, error))
+                raise IOError(error)
+            self.log.info('msg="tus upload interrupted, resuming" url="%s" offset="%d" reason="%s"' % (
+                upload_url, offset, error))
+
+            time.sleep(min(0.5 * 2 ** (retries - 1), 10))
+            try:
+                offset = self._get_offset(upload_url)
+            except (requests.exceptions.RequestException, IOError) as e:
+                self.log.info('msg="Unable to get tus upload offset" url="%s" reason="%s"' % (upload_url, e))
+
+            self._check_offset(offset, position, buffer_end)
+
+        return response, offset
+
+    @staticmethod
+    def _check_offset(offset, position, buffer_end):
+        if offset < position or offset > buffer_end:
+            raise IOError('Unexpected upload offset %d, expected between %d and %d' % (offset, position, buffer_end))
+
+    def _buffer(self, chunks):
+        """
+        Regroups the content chunks into buffers of config.tus_chunk_size bytes, one buffer is kept at a time
+        """
+        buffer = bytearray()
+        for chunk in chunks:
+            buffer += chunk
+            while len(buffer) >= self.config.tus_chunk_size:
+                yield bytes(buffer[:self.config.tus_chunk_size])
+                del buffer[:self.config.tus_chunk_size]
+        if buffer:
+            yield bytes(buffer)
+
+    def _find_or_create(self, length):
+        # Reva creates the upload when InitiateFileUpload is called, other servers need a creation request
+        response = self._request('HEAD', self.upload_endpoint)
+        if response.status_code in (http.HTTPStatus.OK, http.HTTPStatus.NO_CONTENT) and 'Upload-Offset' in response.headers:
+            return self.upload_endpoint
+        return self._create(length)
+
+    def _create(self, length, headers=None):
+        response = self._request('POST', self.upload_endpoint, dict(headers or {}, **{'Upload-Length': str(length)}))
+        if response.status_code != http.HTTPStatus.CREATED or 'Location' not in response.headers:
+            raise IOError('Unable to create upload: %d %s' % (response.status_code, response.reason))
+        return urllib.parse.urljoin(self.upload_endpoint, response.headers['Location'])
+
+    def _get_offset(self, upload_url):
+        response = self._request('HEAD', upload_url)
+        if response.status_code not in (http.HTTPStatus.OK, http.HTTPStatus.NO_CONTENT):
+            raise IOError('Unable to get upload offset: %d %s' % (response.status_code, response.reason))
+        return int(response.headers.get('Upload-Offset', 0))
+
+    def _get_extensions(self):
+        try:
+            response = self._request('OPTIONS', self.upload_endpoint)
+        except requests.exceptions.RequestException:
+            return []
+        return [extension.strip() for extension in response.headers.get('Tus-Extension', '').split(',')]
+
+    def _patch(self, upload_url, data, offset):
+        response = self._request('PATCH', upload_url, {
+            'Upload-Offset': str(offset),
+            'Content-Type': 'application/offset+octet-stream'
+        }, data)
+        if response.status_code != http.HTTPStatus.NO_CONTENT:
+            raise IOError('Unable to upload chunk at offset %d: %d %s' % (offset, response.status_code, response.reason))
+        return response
+
+    def _request(self, method, url, headers=None, data=None):
+        session = TransferSessions.get_session(url)
+        return session.request(method, url, headers=dict(self.headers, **(headers or {})), data=data)
@@ -0,0 +1,34 @@
+from cs3api4lab.auth.authenticator import Auth
+from cs3api4lab.auth.channel_connector import Channel
+from cs3api4lab.auth.check_auth_interceptor import AsyncCheckAuthInterceptor
+from cs3api4lab.utils.asyncify import get_or_create_eventloop, run_on_loop
+
+
+class AsyncChannelConnector:
+    """
+    Keeps the grpc.aio channels used by the async APIs. An aio channel belongs to the event loop
+    it was created on, so a channel is kept per loop. The channels of the loops closed in the meantime
+    are dropped when a channel is created for a new loop.
+    """
+    __channels = {}
+
+    @classmethod
+    def get_channel(cls, log=None):
+        loop = get_or_create_eventloop()
+        channel = cls.__channels.get(loop)
+        if channel is None:
+            cls.__channels = {channel_loop: loop_channel for channel_loop, loop_channel in cls.__channels.items()
+                              if not channel_loop.is_closed()}
+            auth = Auth.get_authenticator(log=log)
+            channel = Channel(asynchronous=True, interceptors=[AsyncCheckAuthInterceptor(log, auth)]).channel
+            cls.__channels[loop] = channel
+        return channel
+
+    @classmethod
+    def close(cls):
+        """
+        Closes the channels, each one on its own loop
+        """
+        channels, cls.__channels = cls.__channels, {}
+        for loop, channel in channels.items():
+            run_on_loop(loop, channel.close())
@@ -1,4 +1,8 @@
+import asyncio
 import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import jwt
@@ -12,8 +16,15 @@ from cs3api4lab.auth.channel_connector import ChannelConnector
 
 
 class Authenticator:
-    token = None
     cs3_stub = None
+    _token = None
+    _token_refresh_at = None
+    _token_expires_at = None
+    _refresh_future = None
+    _refresh_lock = threading.Lock()
+    _refresh_executor = ThreadPoolExecutor(max_workers=1)
+    # the token is refreshed in the background this many seconds (at most half of its lifetime) before it expires
+    refresh_margin = 60
 
     def __init__(self, config=None, log=None):
         self.config = config
@@ -27,15 +38,85 @@ class Authenticator:
     Using auth type is declared in the config file.
     """
 
+    @property
+    def token(self):
+        return self._token
+
+    @token.setter
+    def token(self, token):
+        """
+        The expiry of a new token is decoded once, so authenticate() only compares timestamps
+        """
+        expires_at = self._get_expiry(token) if token is not None else None
+        if expires_at is None:
+            refresh_at = None
+        else:
+            refresh_at = expires_at - min(self.refresh_margin, max(expires_at - time.time(), 0) / 2)
+        self._token, self._token_refresh_at, self._token_expires_at = token, refresh_at, expires_at
+
     def authenticate(self):
         """
         The basic authenticate method, return IOP token or refresh if is not present or invalid.
+        A token close to its expiry is returned while a new one is fetched in the background.
+        """
+        if self._needs_refresh():
+            self._start_refresh().result()
+        return self.token
+
+    async def async_authenticate(self):
+        """
+        Async variant of authenticate(), only a token refresh (a blocking call) runs in the refresh executor.
+        """
+        if self._needs_refresh():
+            await asyncio.wrap_future(self._start_refresh())
+        return self.token
+
+    def renew_token(self, rejected_token):
         """
-        if self.token is None or self._check_token(self.token) is False:
-            self.refresh_token()
+        Returns a new token after the server rejected the given one, e.g. because it was revoked
+        before its expiry. A token which was already replaced by another caller is not refreshed again.
+        """
+        if self.token is None or self.token == rejected_token:
+            self._start_refresh().result()
+        return self.token
 
+    async def async_renew_token(self, rejected_token):
+        if self.token is None or self.token == rejected_token:
+            await asyncio.wrap_future(self._start_refresh())
         return self.token
 
+    def _needs_refresh(self):
+        """
+        Whether the caller has to wait for a new token, which is the case only if there is no valid one.
+        A token which is about to expire is refreshed in the background.
+        """
+        token, refresh_at, expires_at = self._token, self._token_refresh_at, self._token_expires_at
+        if token is None:
+            return True
+        if expires_at is None:
+            return False
+        now = time.time()
+        if now > expires_at:
+            return True
+        if now > refresh_at:
+            self._start_refresh()
+        return False
+
+    def _start_refresh(self):
+        """
+        Starts a token refresh unless one is in progress, all the callers share the same refresh
+        """
+        with self._refresh_lock:
+            if self._refresh_future is None or self._refresh_future.done():
+                self._refresh_future = self._refresh_executor.submit(self.refresh_token)
+                self._refresh_future.add_done_callback(self._log_refresh_failure)
+            return self._refresh_future
+
+    def _log_refresh_failure(self, refresh_future):
+        if refresh_future.exception() is not None and self.log is not None:
+            self.log.error('msg="Failed to refresh token" user="%s" reason="%s"' % (
+                self.config.client_id, refresh_future.exception()))
+
     def refresh_token(self):
         self.raise_401_error()
 
@@ -64,6 +145,11 @@ class Authenticator:
 
         return True
 
+    @staticmethod
+    def _get_expiry(token):
+        decode = jwt.decode(jwt=token, algorithms=["HS256"], options={"verify_signature": False})
+        return decode.get('exp')
+
 
 class Auth: 
     __auth_instance = None
@@ -1,16 +1,30 @@
 import sys
 import grpc
+import grpc.aio
 from traitlets.config import LoggingConfigurable
 
 from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.auth.rpc_policy_interceptor import RpcPolicyInterceptor, AsyncRpcPolicyInterceptor
+from cs3api4lab.auth.circuit_breaker_interceptor import CircuitBreaker, CircuitBreakerInterceptor, \
+    AsyncCircuitBreakerInterceptor
 
 
 class Channel(LoggingConfigurable):
     channel = None
 
-    def __init__(self, **kwargs):
+    def __init__(self, asynchronous=False, interceptors=None, **kwargs):
         super().__init__(**kwargs)
+        channel_module = grpc.aio if asynchronous else grpc
         config = Cs3ConfigManager.get_config()
+        # the deadline and retries are applied to every attempt made by the given interceptors,
+        # the circuit breaker sees the outcome of the retried call and fails fast before any attempt
+        circuit_breaker = CircuitBreaker.get_circuit_breaker(self.log, config)
+        if asynchronous:
+            policy = [AsyncCircuitBreakerInterceptor(circuit_breaker), AsyncRpcPolicyInterceptor(self.log, config)]
+        else:
+            policy = [CircuitBreakerInterceptor(circuit_breaker), RpcPolicyInterceptor(self.log, config)]
+        interceptors = list(interceptors or []) + policy
+        channel_kwargs = {'interceptors': interceptors} if asynchronous else {}
         if config.secure_channel:
             try:
 
@@ -31,13 +45,15 @@ class Channel(LoggingConfigurable):
                         ca_cert = ca_cert_content.read()
 
                 credentials = grpc.ssl_channel_credentials(root_certificates=ca_cert, private_key=key, certificate_chain=cert)
-                channel = grpc.secure_channel(config.reva_host, credentials)
+                channel = channel_module.secure_channel(config.reva_host, credentials, **channel_kwargs)
 
             except Exception as ex:
                 self.log.error('msg="Error create secure channel" reason="%s"' % ex)
                 raise IOError(ex)
         else:
-            channel = grpc.insecure_channel(config.reva_host)
+            channel = channel_module.insecure_channel(config.reva_host, **channel_kwargs)
+        if not asynchronous:
+            channel = grpc.intercept_channel(channel, *interceptors)
         self.channel = channel
 
 
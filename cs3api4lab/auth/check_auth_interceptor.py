@@ -1,11 +1,30 @@
+import collections
+
 import cs3.rpc.v1beta1.code_pb2 as cs3code
 import grpc
 
+TOKEN_HEADER = 'x-access-token'
+
+
+class ClientCallDetails(collections.namedtuple('ClientCallDetails',
+                                               ('method', 'timeout', 'metadata', 'credentials',
+                                                'wait_for_ready', 'compression')),
+                        grpc.ClientCallDetails):
+    """
+    The details of a call passed on by an interceptor, e.g. with a new token or deadline
+    """
+    pass
+
 
 class CheckAuthInterceptor(grpc.UnaryUnaryClientInterceptor,
                            grpc.UnaryStreamClientInterceptor,
                            grpc.StreamUnaryClientInterceptor,
                            grpc.StreamStreamClientInterceptor):
+    """
+    Checks the responses of the blocking unary calls: a call rejected as unauthenticated is retried once
+    with a new token, before the user gets a 401. Future calls and streams are passed through without
+    waiting for them, a request stream can't be sent again.
+    """
     unauth_codes = {cs3code.CODE_UNAUTHENTICATED}
 
     def __init__(self, log, authenticator):
@@ -13,22 +32,84 @@ class CheckAuthInterceptor(grpc.UnaryUnaryClientInterceptor,
         self.authenticator = authenticator
 
     def intercept_unary_unary(self, continuation, client_call_details, request):
-        return self._intercept_call(continuation, client_call_details, request)
+        response = continuation(client_call_details, request)
+        if not response.done() or not self._is_unauthenticated(response):
+            return response
+
+        rejected_token = _get_token(client_call_details.metadata)
+        self.log.info('msg="Call rejected as unauthenticated, retrying with a new token" method="%s"'
+                      % client_call_details.method)
+        token = self.authenticator.renew_token(rejected_token)
+        response = continuation(self._with_token(client_call_details, token), request)
+        if response.done() and self._is_unauthenticated(response):
+            self.authenticator.raise_401_error()
+        return response
 
     def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
-        return self._intercept_call(continuation, client_call_details, request_iterator)
+        response = continuation(client_call_details, request_iterator)
+        if response.done() and self._is_unauthenticated(response):
+            self.authenticator.raise_401_error()
+        return response
 
     def intercept_unary_stream(self, continuation, client_call_details, request):
-        return self._intercept_call(continuation, client_call_details, request)
+        return continuation(client_call_details, request)
 
     def intercept_stream_stream(self, continuation, client_call_details, request_iterator):
-        return self._intercept_call(continuation, client_call_details, request_iterator)
+        return continuation(client_call_details, request_iterator)
 
-    def _intercept_call(self, continuation, client_call_details, request_or_iterator):
-        response = continuation(client_call_details, request_or_iterator)
-        self._check_result(response.result())
-        return response
+    def _is_unauthenticated(self, response):
+        return response.exception() is None and _has_unauth_status(response.result(), self.unauth_codes)
+
+    @staticmethod
+    def _with_token(client_call_details, token):
+        return ClientCallDetails(client_call_details.method, client_call_details.timeout,
+                                  _replace_token(client_call_details.metadata, token),
+                                  client_call_details.credentials,
+                                  getattr(client_call_details, 'wait_for_ready', None),
+                                  getattr(client_call_details, 'compression', None))
+
+
+class AsyncCheckAuthInterceptor(grpc.aio.UnaryUnaryClientInterceptor,
+                                grpc.aio.UnaryStreamClientInterceptor):
+    """
+    CheckAuthInterceptor for grpc.aio channels, the streamed responses are passed through
+    """
+    unauth_codes = {cs3code.CODE_UNAUTHENTICATED}
 
-    def _check_result(self, result):
-        if result is not None and result.status is not None and result.status.code in self.unauth_codes:
+    def __init__(self, log, authenticator):
+        self.log = log
+        self.authenticator = authenticator
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        call = await continuation(client_call_details, request)
+        if not _has_unauth_status(await call, self.unauth_codes):
+            return call
+
+        rejected_token = _get_token(client_call_details.metadata)
+        method = client_call_details.method
+        self.log.info('msg="Call rejected as unauthenticated, retrying with a new token" method="%s"'
+                      % (method.decode() if isinstance(method, bytes) else method))
+        token = await self.authenticator.async_renew_token(rejected_token)
+        call = await continuation(client_call_details._replace(
+            metadata=grpc.aio.Metadata(*_replace_token(client_call_details.metadata, token))), request)
+        if _has_unauth_status(await call, self.unauth_codes):
             self.authenticator.raise_401_error()
+        return call
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        return await continuation(client_call_details, request)
+
+
+def _has_unauth_status(result, unauth_codes):
+    return result is not None and result.status is not None and result.status.code in unauth_codes
+
+
+def _get_token(metadata):
+    for key, value in metadata or ():
+        if key == TOKEN_HEADER:
+            return value
+    return None
+
+
+def _replace_token(metadata, token):
+    return [(key, value) for key, value in metadata or () if key != TOKEN_HEADER] + [(TOKEN_HEADER, token)]
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import deque
+
+import grpc
+
+from cs3api4lab.exception.exceptions import GatewayUnavailableError
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of the gateway calls by RPC family. When too many calls of a family fail with a transient
+    error, the circuit of that family opens and its calls fail fast with GatewayUnavailableError instead of
+    waiting for their deadline. After the reset time a single probe call is let through (half-open), the
+    circuit closes again if it succeeds.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    failure_codes = frozenset({grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED,
+                               grpc.StatusCode.RESOURCE_EXHAUSTED})
+    # the error rate is computed over the calls of the last window seconds, once there are at least min_calls
+    window = 30
+    min_calls = 10
+
+    __circuit_breaker_instance = None
+
+    def __init__(self, log, config):
+        self.log = log
+        self.threshold = config.circuit_breaker_threshold / 100 if config.circuit_breaker_threshold > 0 else None
+        self.reset_time = config.circuit_breaker_reset_time
+        self._families = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_circuit_breaker(cls, log, config):
+        """
+        The circuit breaker is shared by the sync and async channels, as they talk to the same gateway
+        """
+        if cls.__circuit_breaker_instance is None:
+            cls.__circuit_breaker_instance = cls(log, config)
+        return cls.__circuit_breaker_instance
+
+    @staticmethod
+    def get_family(method):
+        if isinstance(method, bytes):
+            method = method.decode()
+        name = method.rsplit('/', 1)[-1]
+        if 'Share' in name:
+            return 'shares'
+        if name in ('Authenticate', 'WhoAmI'):
+            return 'auth'
+        if name.endswith(('User', 'Users', 'Group', 'Groups', 'UserByClaim')):
+            return 'users'
+        return 'storage'
+
+    def before_call(self, family):
+        """
+        Raises GatewayUnavailableError while the circuit of the family is open, returns whether the call is a probe
+        """
+        if self.threshold is None:
+            return False
+        with self._lock:
+            circuit = self._get_circuit(family)
+            if circuit.state == self.CLOSED:
+                return False
+            if circuit.state == self.OPEN and time.monotonic() >= circuit.opened_at + self.reset_time:
+                circuit.state = self.HALF_OPEN
+                return True
+        raise GatewayUnavailableError(f"gateway calls of {family} are failing, retry in a while")
+
+    def record(self, family, failed, probe=False):
+        if self.threshold is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._get_circuit(family)
+            if probe or circuit.state == self.HALF_OPEN:
+                if failed:
+                    self._open(family, circuit, now)
+                elif probe:
+                    circuit.state = self.CLOSED
+                    circuit.outcomes.clear()
+                    self.log.info('msg="Gateway circuit closed" family="%s"' % family)
+                return
+
+            circuit.outcomes.append((now, failed))
+            while circuit.outcomes and circuit.outcomes[0][0] < now - self.window:
+                circuit.outcomes.popleft()
+            failures = sum(1 for _, call_failed in circuit.outcomes if call_failed)
+            if circuit.state == self.CLOSED and len(circuit.outcomes) >= self.min_calls \
+                    and failures >= self.threshold * len(circuit.outcomes):
+                self._open(family, circuit, now)
+
+    def record_code(self, family, code, probe=False):
+        self.record(family, code in self.failure_codes, probe)
+
+    def get_state(self, family):
+        with self._lock:
+            return self._get_circuit(family).state
+
+    def _open(self, family, circuit, now):
+        circuit.state = self.OPEN
+        circuit.opened_at = now
+        circuit.outcomes.clear()
+        self.log.warning('msg="Gateway circuit opened" family="%s" resettime="%d"' % (family, self.reset_time))
+
+    def _get_circuit(self, family):
+        circuit = self._families.get(family)
+        if circuit is None:
+            circuit = self._families[family] = _Circuit()
+        return circuit
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CircuitBreaker.CLOSED
+        self.opened_at = 0
+        self.outcomes = deque()
+
+
+class CircuitBreakerInterceptor(grpc.UnaryUnaryClientInterceptor):
+    """
+    Fails the unary calls of an RPC family fast while its circuit is open and records their outcome
+    """
+
+    def __init__(self, circuit_breaker):
+        self.circuit_breaker = circuit_breaker
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        family = self.circuit_breaker.get_family(client_call_details.method)
+        probe = self.circuit_breaker.before_call(family)
+        try:
+            response = continuation(client_call_details, request)
+        except Exception:
+            self.circuit_breaker.record(family, True, probe)
+            raise
+        # the outcome of a future call is known only once it is done
+        response.add_done_callback(lambda future: self._record(family, future, probe))
+        return response
+
+    def _record(self, family, future, probe):
+        exception = future.exception()
+        code = exception.code() if isinstance(exception, grpc.Call) else grpc.StatusCode.OK
+        self.circuit_breaker.record_code(family, code, probe)
+
+
+class AsyncCircuitBreakerInterceptor(grpc.aio.UnaryUnaryClientInterceptor):
+    """
+    CircuitBreakerInterceptor for grpc.aio channels
+    """
+
+    def __init__(self, circuit_breaker):
+        self.circuit_breaker = circuit_breaker
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        family = self.circuit_breaker.get_family(client_call_details.method)
+        probe = self.circuit_breaker.before_call(family)
+        try:
+            call = await continuation(client_call_details, request)
+            code = await call.code()
+        except grpc.aio.AioRpcError as e:
+            code = e.code()
+            self.circuit_breaker.record_code(family, code, probe)
+            raise
+        except BaseException:
+            if probe:  # e.g. cancelled, the gateway is probed again after the reset time
+                self.circuit_breaker.record(family, True, probe)
+            raise
+        self.circuit_breaker.record_code(family, code, probe)
+        return call
@@ -10,11 +10,7 @@ class Eos(Oauth):
 
         if self.config.eos_file:
 
-            try:
-                with open(self.config.eos_file, "r") as file:
-                    eos_token = file.read()
-            except IOError as e:
-                raise IOError(f"Error opening token file {self.config.eos_file} exception: {e}")
+            eos_token = self._get_token_file().read()
 
         elif self.config.eos_token:
             eos_token = self.config.eos_token
@@ -27,3 +23,6 @@ class Eos(Oauth):
             raise self.raise_401_error()
 
         return eos_split_token[1]
+
+    def _get_token_file_path(self):
+        return self.config.eos_file
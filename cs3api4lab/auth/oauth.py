@@ -1,7 +1,11 @@
 from cs3api4lab.auth.authenticator import Authenticator
+from cs3api4lab.auth.token_file import TokenFile
 
 
 class Oauth(Authenticator):
+    _token_file = None
+    # how often (in seconds) the token file is checked for a new token
+    token_file_poll_interval = 10
 
     def __init__(self, config=None, log=None):
         super().__init__(config, log)
@@ -9,6 +13,7 @@ class Oauth(Authenticator):
     def refresh_token(self):
         oauth_token = self._refresh_token_from_file_or_config()
         self.token = self._auth_in_iop(oauth_token, "bearer")
+        self._watch_token_file()
 
     def _refresh_token_from_file_or_config(self):
         """
@@ -17,11 +22,7 @@ class Oauth(Authenticator):
 
         if self.config.oauth_file:
 
-            try:
-                with open(self.config.oauth_file, "r") as file:
-                    oauth_token = file.read()
-            except IOError as e:
-                raise IOError(f"Error opening token file {self.config.oauth_file} exception: {e}")
+            oauth_token = self._get_token_file().read()
 
         elif self.config.oauth_token:
             oauth_token = self.config.oauth_token
@@ -32,3 +33,23 @@ class Oauth(Authenticator):
             self.raise_401_error()
 
         return oauth_token
+
+    def _get_token_file_path(self):
+        return self.config.oauth_file
+
+    def _get_token_file(self):
+        path = self._get_token_file_path()
+        if not path:
+            return None
+        if self._token_file is None or self._token_file.path != path:
+            self._token_file = TokenFile(path, self.log)
+        return self._token_file
+
+    def _watch_token_file(self):
+        """
+        Once a token was obtained from the token file, a new token written to the file
+        is exchanged in the background, without waiting for the current one to expire
+        """
+        token_file = self._get_token_file()
+        if token_file is not None:
+            token_file.watch(self._start_refresh, self.token_file_poll_interval)
@@ -0,0 +1,198 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import grpc
+
+from cs3api4lab.auth.check_auth_interceptor import ClientCallDetails
+
+
+class RpcPolicy:
+    """
+    The deadline, retries and hedging applied to the gateway calls, by method name. The deadline of a call
+    is the budget of all its attempts: a retry or a hedged call only gets the time left.
+    """
+    # calls without side effects, which can be sent again (or twice at once) safely
+    idempotent_methods = frozenset({
+        'Stat', 'ListContainer', 'GetLock', 'GetHome', 'GetPath', 'ListFileVersions', 'InitiateFileDownload',
+        'ListShares', 'GetShare', 'ListReceivedShares', 'GetReceivedShare',
+        'ListOCMShares', 'GetOCMShare', 'ListReceivedOCMShares', 'GetReceivedOCMShare',
+        'ListPublicShares', 'GetPublicShare', 'GetPublicShareByToken',
+        'WhoAmI', 'GetUser', 'GetUserByClaim', 'FindUsers', 'GetGroup', 'FindGroups',
+    })
+    retry_codes = frozenset({grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED})
+    # the n-th retry waits a random time up to min(backoff_max, backoff_base * 2^n) seconds
+    backoff_base = 0.1
+    backoff_max = 2.0
+
+    def __init__(self, config):
+        self.timeout = config.rpc_timeout if config.rpc_timeout > 0 else None
+        self.read_timeout = config.rpc_read_timeout if config.rpc_read_timeout > 0 else self.timeout
+        self.max_retries = max(config.rpc_max_retries, 0)
+        self.hedge_delay = config.rpc_hedge_delay / 1000 if config.rpc_hedge_delay > 0 else None
+
+    def is_idempotent(self, method):
+        if isinstance(method, bytes):
+            method = method.decode()
+        return method.rsplit('/', 1)[-1] in self.idempotent_methods
+
+    def get_timeout(self, idempotent):
+        return self.read_timeout if idempotent else self.timeout
+
+    @staticmethod
+    def get_deadline(timeout):
+        return None if timeout is None else time.monotonic() + timeout
+
+    @staticmethod
+    def get_time_left(deadline):
+        return None if deadline is None else deadline - time.monotonic()
+
+    def get_backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def is_retried(self, code, attempt, backoff, deadline):
+        """
+        Whether a failed attempt is sent again, there must be time left for it after the backoff
+        """
+        time_left = self.get_time_left(deadline)
+        return attempt < self.max_retries and code in self.retry_codes and (time_left is None or time_left > backoff)
+
+
+class RpcPolicyInterceptor(grpc.UnaryUnaryClientInterceptor):
+    """
+    Applies the RpcPolicy to the blocking unary calls of a channel: every call gets a deadline, shorter for
+    idempotent calls, an idempotent call failing with a transient error is retried with exponential backoff
+    and, with hedging enabled, an idempotent call still pending after the hedge delay is sent a second time,
+    the first response wins.
+    """
+    hedge_workers = 32
+    _hedge_executor = None
+    _hedge_executor_lock = threading.Lock()
+
+    def __init__(self, log, config):
+        self.log = log
+        self.policy = RpcPolicy(config)
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        idempotent = self.policy.is_idempotent(client_call_details.method)
+        if client_call_details.timeout is None:
+            client_call_details = self._with_timeout(client_call_details, self.policy.get_timeout(idempotent))
+        if not idempotent:
+            return continuation(client_call_details, request)
+
+        deadline = self.policy.get_deadline(client_call_details.timeout)
+        attempt = 0
+        while True:
+            response = self._call(continuation, client_call_details, request, deadline)
+            if not response.done() or response.exception() is None:
+                return response
+            code = response.exception().code()
+            backoff = self.policy.get_backoff(attempt)
+            if not self.policy.is_retried(code, attempt, backoff, deadline):
+                return response
+            self.log.info('msg="Retrying gateway call" method="%s" code="%s" attempt="%d" backoffms="%.1f"' % (
+                client_call_details.method, code, attempt + 1, backoff * 1000))
+            time.sleep(backoff)
+            attempt += 1
+            client_call_details = self._with_timeout(client_call_details, self.policy.get_time_left(deadline))
+
+    def _call(self, continuation, client_call_details, request, deadline):
+        if self.policy.hedge_delay is None:
+            return continuation(client_call_details, request)
+
+        executor = self._get_hedge_executor()
+        pending = {executor.submit(continuation, client_call_details, request)}
+        done, _ = wait(pending, timeout=self.policy.hedge_delay)
+        if not done:
+            hedge_call_details = self._with_timeout(client_call_details, self.policy.get_time_left(deadline))
+            pending.add(executor.submit(continuation, hedge_call_details, request))
+
+        response = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                response = future.result()
+                if response.exception() is None:
+                    return response
+        return response
+
+    @staticmethod
+    def _with_timeout(client_call_details, timeout):
+        if timeout is None:
+            return client_call_details
+        return ClientCallDetails(client_call_details.method, timeout, client_call_details.metadata,
+                                 client_call_details.credentials,
+                                 getattr(client_call_details, 'wait_for_ready', None),
+                                 getattr(client_call_details, 'compression', None))
+
+    @classmethod
+    def _get_hedge_executor(cls):
+        with cls._hedge_executor_lock:
+            if cls._hedge_executor is None:
+                cls._hedge_executor = ThreadPoolExecutor(max_workers=cls.hedge_workers,
+                                                         thread_name_prefix='cs3api4lab-hedge')
+            return cls._hedge_executor
+
+
+class AsyncRpcPolicyInterceptor(grpc.aio.UnaryUnaryClientInterceptor):
+    """
+    RpcPolicyInterceptor for grpc.aio channels, the losing call of a hedged pair is cancelled
+    """
+
+    def __init__(self, log, config):
+        self.log = log
+        self.policy = RpcPolicy(config)
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        idempotent = self.policy.is_idempotent(client_call_details.method)
+        if client_call_details.timeout is None:
+            client_call_details = self._with_timeout(client_call_details, self.policy.get_timeout(idempotent))
+        if not idempotent:
+            return await continuation(client_call_details, request)
+
+        deadline = self.policy.get_deadline(client_call_details.timeout)
+        attempt = 0
+        while True:
+            call = await self._call(continuation, client_call_details, request, deadline)
+            code = await call.code()
+            if code == grpc.StatusCode.OK:
+                return call
+            backoff = self.policy.get_backoff(attempt)
+            if not self.policy.is_retried(code, attempt, backoff, deadline):
+                return call
+            self.log.info('msg="Retrying gateway call" method="%s" code="%s" attempt="%d" backoffms="%.1f"' % (
+                client_call_details.method, code, attempt + 1, backoff * 1000))
+            await asyncio.sleep(backoff)
+            attempt += 1
+            client_call_details = self._with_timeout(client_call_details, self.policy.get_time_left(deadline))
+
+    async def _call(self, continuation, client_call_details, request, deadline):
+        call = await continuation(client_call_details, request)
+        if self.policy.hedge_delay is None:
+            return call
+
+        calls = {asyncio.ensure_future(call.code()): call}
+        done, _ = await asyncio.wait(calls, timeout=self.policy.hedge_delay)
+        if not done:
+            hedge_call_details = self._with_timeout(client_call_details, self.policy.get_time_left(deadline))
+            hedge = await continuation(hedge_call_details, request)
+            calls[asyncio.ensure_future(hedge.code())] = hedge
+
+        pending = set(calls)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in done:
+                call = calls[waiter]
+                if waiter.result() == grpc.StatusCode.OK:
+                    for other in pending:
+                        calls[other].cancel()
+                    return call
+        return call
+
+    @staticmethod
+    def _with_timeout(client_call_details, timeout):
+        if timeout is None:
+            return client_call_details
+        return client_call_details._replace(timeout=timeout)
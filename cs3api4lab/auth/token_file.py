@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+
+class TokenFile:
+    """
+    A file holding a token, which may be replaced at any time (e.g. rotated by a sidecar).
+    The file is read again only when its modification time, size or inode change, and it can be
+    watched by polling them, so that a new token is picked up before the old one expires.
+    """
+
+    def __init__(self, path, log=None):
+        self.path = path
+        self.log = log
+        self._version = None
+        self._content = None
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def read(self):
+        version = self._get_version()
+        with self._lock:
+            if version != self._version:
+                try:
+                    with open(self.path, "r") as file:
+                        self._content = file.read()
+                except IOError as e:
+                    raise IOError(f"Error opening token file {self.path} exception: {e}")
+                self._version = version
+            return self._content
+
+    def has_changed(self):
+        try:
+            return self._get_version() != self._version
+        except IOError:
+            return False  # the file is being replaced, the change is seen on the next poll
+
+    def watch(self, on_change, interval):
+        """
+        Calls on_change (from a daemon thread) whenever the file changes after it was last read
+        """
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._poll, args=(on_change, interval),
+                                             name='cs3api4lab-token-file', daemon=True)
+        self._watcher.start()
+
+    def _poll(self, on_change, interval):
+        while True:
+            time.sleep(interval)
+            if not self.has_changed():
+                continue
+            try:
+                on_change()
+            except Exception as e:
+                if self.log is not None:
+                    self.log.error('msg="Failed to reload token file" path="%s" reason="%s"' % (self.path, e))
+
+    def _get_version(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            raise IOError(f"Error opening token file {self.path} exception: {e}")
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
@@ -14,3 +14,12 @@ class Grantee:
     USER = 'user'
     GROUP = 'group'
     INVALID = 'invalid'
+
+
+class Checksum:
+    # algorithms of the checksum types the storage can return in the resource info
+    ALGORITHMS = {
+        'RESOURCE_CHECKSUM_TYPE_ADLER32': 'adler32',
+        'RESOURCE_CHECKSUM_TYPE_MD5': 'md5',
+        'RESOURCE_CHECKSUM_TYPE_SHA1': 'sha1',
+    }
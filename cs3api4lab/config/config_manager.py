@@ -62,6 +62,69 @@ class Config(LoggingConfigurable):
     tus_enabled = Bool(
         config=True, help="""Flag to enable TUS"""
     )
+    tus_chunk_size = CInt(
+        config=True, help="""Size of the fragment sent in one TUS PATCH request"""
+    )
+    tus_max_retries = CInt(
+        config=True, help="""Number of times a failed TUS request is resumed before the upload fails"""
+    )
+    tus_parallel_uploads = CInt(
+        config=True, help="""Number of parts uploaded concurrently when the server supports the TUS concatenation extension"""
+    )
+    download_parallelism = CInt(
+        config=True, help="""Number of byte ranges of a large file downloaded concurrently"""
+    )
+    download_range_size = CInt(
+        config=True, help="""Size of the byte range fetched in one request when downloading in parallel"""
+    )
+    stat_cache_ttl = CInt(
+        config=True, help="""Number of seconds a stat result is reused before the storage is asked again, 0 disables the cache"""
+    )
+    stat_cache_size = CInt(
+        config=True, help="""Maximum number of stat results kept in the cache"""
+    )
+    user_cache_ttl = CInt(
+        config=True, help="""Number of seconds a user record is reused before the user provider is asked again, 0 disables the cache"""
+    )
+    user_negative_cache_ttl = CInt(
+        config=True, help="""Number of seconds a user that was not found (e.g. an OCM user whose invitation is not accepted yet) is not looked up again, 0 disables it"""
+    )
+    user_cache_size = CInt(
+        config=True, help="""Maximum number of user records kept in the cache"""
+    )
+    share_lookup_workers = CInt(
+        config=True, help="""Number of owner and resource lookups run concurrently when listing shares"""
+    )
+    open_file_workers = CInt(
+        config=True, help="""Number of lock, share and download lookups run concurrently when opening files"""
+    )
+    dir_cache_size = CInt(
+        config=True, help="""Maximum number of directory models kept, a model is served again while the etag of the directory is unchanged"""
+    )
+    http_pool_size = CInt(
+        config=True, help="""Maximum number of kept-alive connections per data gateway host"""
+    )
+    rpc_timeout = CInt(
+        config=True, help="""Deadline in seconds of a call to the gateway, 0 disables it"""
+    )
+    rpc_read_timeout = CInt(
+        config=True, help="""Deadline in seconds of an idempotent call to the gateway (e.g. a stat or a listing), shared by its retries, 0 uses rpc_timeout"""
+    )
+    rpc_max_retries = CInt(
+        config=True, help="""Number of times an idempotent call to the gateway is retried after a transient error (unavailable or deadline exceeded)"""
+    )
+    rpc_hedge_delay = CInt(
+        config=True, help="""Milliseconds after which an idempotent call still pending is sent a second time and the first response is used, 0 disables hedging"""
+    )
+    circuit_breaker_threshold = CInt(
+        config=True, help="""Percentage of calls of an RPC family failing with a transient error that opens the circuit to the gateway, the calls of that family then fail fast, 0 disables the circuit breaker"""
+    )
+    circuit_breaker_reset_time = CInt(
+        config=True, help="""Number of seconds the circuit stays open before a single probe call is let through to the gateway"""
+    )
+    http_keep_alive = Bool(
+        config=True, help="""Flag to keep the data gateway connections alive between transfers"""
+    )
     eos_file = Unicode(
         config=True, allow_none=True, help="""EOS file location"""
     )
@@ -159,6 +222,90 @@ class Config(LoggingConfigurable):
     def _tus_enabled_default(self):
         return self._get_config_value("tus_enabled") in ["true", True]
 
+    @default("tus_chunk_size")
+    def _tus_chunk_size_default(self):
+        return self._get_config_value("tus_chunk_size")
+
+    @default("tus_max_retries")
+    def _tus_max_retries_default(self):
+        return self._get_config_value("tus_max_retries")
+
+    @default("tus_parallel_uploads")
+    def _tus_parallel_uploads_default(self):
+        return self._get_config_value("tus_parallel_uploads")
+
+    @default("download_parallelism")
+    def _download_parallelism_default(self):
+        return self._get_config_value("download_parallelism")
+
+    @default("download_range_size")
+    def _download_range_size_default(self):
+        return self._get_config_value("download_range_size")
+
+    @default("stat_cache_ttl")
+    def _stat_cache_ttl_default(self):
+        return self._get_config_value("stat_cache_ttl")
+
+    @default("stat_cache_size")
+    def _stat_cache_size_default(self):
+        return self._get_config_value("stat_cache_size")
+
+    @default("user_cache_ttl")
+    def _user_cache_ttl_default(self):
+        return self._get_config_value("user_cache_ttl")
+
+    @default("user_negative_cache_ttl")
+    def _user_negative_cache_ttl_default(self):
+        return self._get_config_value("user_negative_cache_ttl")
+
+    @default("user_cache_size")
+    def _user_cache_size_default(self):
+        return self._get_config_value("user_cache_size")
+
+    @default("share_lookup_workers")
+    def _share_lookup_workers_default(self):
+        return self._get_config_value("share_lookup_workers")
+
+    @default("open_file_workers")
+    def _open_file_workers_default(self):
+        return self._get_config_value("open_file_workers")
+
+    @default("dir_cache_size")
+    def _dir_cache_size_default(self):
+        return self._get_config_value("dir_cache_size")
+
+    @default("http_pool_size")
+    def _http_pool_size_default(self):
+        return self._get_config_value("http_pool_size")
+
+    @default("rpc_timeout")
+    def _rpc_timeout_default(self):
+        return self._get_config_value("rpc_timeout")
+
+    @default("rpc_read_timeout")
+    def _rpc_read_timeout_default(self):
+        return self._get_config_value("rpc_read_timeout")
+
+    @default("rpc_max_retries")
+    def _rpc_max_retries_default(self):
+        return self._get_config_value("rpc_max_retries")
+
+    @default("rpc_hedge_delay")
+    def _rpc_hedge_delay_default(self):
+        return self._get_config_value("rpc_hedge_delay")
+
+    @default("circuit_breaker_threshold")
+    def _circuit_breaker_threshold_default(self):
+        return self._get_config_value("circuit_breaker_threshold")
+
+    @default("circuit_breaker_reset_time")
+    def _circuit_breaker_reset_time_default(self):
+        return self._get_config_value("circuit_breaker_reset_time")
+
+    @default("http_keep_alive")
+    def _http_keep_alive_default(self):
+        return self._get_config_value("http_keep_alive") in ["true", True]
+
     @default("enable_ocm")
     def _enable_ocm_default(self):
         return self._get_config_value("enable_ocm") in ["true", True]
@@ -244,6 +391,27 @@ class Config(LoggingConfigurable):
         "client_cert": None,
         "ca_cert": None,
         "tus_enabled": False,
+        "tus_chunk_size": "16777216",
+        "tus_max_retries": 5,
+        "tus_parallel_uploads": 1,
+        "download_parallelism": 1,
+        "download_range_size": "16777216",
+        "stat_cache_ttl": 5,
+        "stat_cache_size": 1024,
+        "user_cache_ttl": 600,
+        "user_negative_cache_ttl": 30,
+        "user_cache_size": 1024,
+        "share_lookup_workers": 8,
+        "open_file_workers": 16,
+        "dir_cache_size": 256,
+        "http_pool_size": 10,
+        "http_keep_alive": True,
+        "rpc_timeout": 30,
+        "rpc_read_timeout": 10,
+        "rpc_max_retries": 2,
+        "rpc_hedge_delay": 0,
+        "circuit_breaker_threshold": 50,
+        "circuit_breaker_reset_time": 30,
         "enable_ocm": False,
         "kernel_path": "/",
         "eos_file": None,
@@ -60,6 +60,15 @@ class FileLockedError(IOError):
         return self.__class__.__name__ + ": " + self.message
 
 
+class FileConflictError(IOError):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self):
+        return self.__class__.__name__ + ": " + self.message
+
+
 class OCMDisabledError(Exception):
     def __init__(self, message):
         self.message = message
@@ -83,5 +92,14 @@ class ParamError(Exception):
         self.message = "Missing argument: " + str(key_error)
         super().__init__(self.message)
 
+    def __str__(self):
+        return self.__class__.__name__ + ": " + self.message
+
+
+class GatewayUnavailableError(IOError):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
     def __str__(self):
         return self.__class__.__name__ + ": " + self.message
\ No newline at end of file
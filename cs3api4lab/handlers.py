@@ -1,21 +1,30 @@
+import inspect
 import json
 
 from jupyter_server.base.handlers import APIHandler
 from tornado import gen, web
 from grpc._channel import _InactiveRpcError
+from grpc.aio import AioRpcError
 from cs3api4lab.exception.exceptions import ParamError, ShareAlreadyExistsError, LockNotFoundError, OCMDisabledError, \
-    InvalidTypeError, ShareNotFoundError
-from cs3api4lab.api.share_api_facade import ShareAPIFacade
-from cs3api4lab.api.cs3_public_share_api import Cs3PublicShareApi
-from cs3api4lab.api.cs3_user_api import Cs3UserApi
-from cs3api4lab.api.cs3_file_api import Cs3FileApi
+    InvalidTypeError, ShareNotFoundError, FileConflictError, GatewayUnavailableError
+from cs3api4lab.api.services import ServiceRegistry
 from jupyter_server.utils import url_path_join
 from cs3api4lab.utils.asyncify import get_or_create_eventloop
 
-class ShareHandler(APIHandler):
+
+class ServicesHandler(APIHandler):
+    """
+    Base handler that gets the shared API objects injected by setup_handlers
+    """
+
+    def initialize(self, services):
+        self.services = services
+
+
+class ShareHandler(ServicesHandler):
     @property
     def share_api(self):
-        return ShareAPIFacade(self.log)
+        return self.services.share_facade
 
     @web.authenticated
     @gen.coroutine
@@ -53,29 +62,29 @@ class ShareHandler(APIHandler):
             RequestHandler.handle_error(self, ParamError(err))
 
 
-class ListSharesHandler(APIHandler):
+class ListSharesHandler(ServicesHandler):
     @property
     def share_api(self):
-        return ShareAPIFacade(self.log)
+        return self.services.share_facade
 
     @web.authenticated
     @gen.coroutine
     def get(self):
-        yield RequestHandler.async_handle_request(self, self.share_api.list_shares, 200,
-                                                  self.get_query_argument('filter_duplicates', default='false') in ['true', '1'])
+        yield RequestHandler.async_handle_conditional_request(self, self.share_api.list_shares_with_etag,
+                                                              self.get_query_argument('filter_duplicates', default='false') in ['true', '1'])
 
 
-class ListReceivedSharesHandler(APIHandler):
+class ListReceivedSharesHandler(ServicesHandler):
     @property
     def share_api(self):
-        return ShareAPIFacade(self.log)
+        return self.services.share_facade
 
     @web.authenticated
     @gen.coroutine
     def get(self):
         status = self.get_query_argument('status', default=None)
 
-        yield RequestHandler.async_handle_request(self, self.share_api.list_received, 200, status)
+        yield RequestHandler.async_handle_conditional_request(self, self.share_api.list_received_with_etag, status)
 
     @web.authenticated
     @gen.coroutine
@@ -84,10 +93,10 @@ class ListReceivedSharesHandler(APIHandler):
         yield RequestHandler.async_handle_request(self, self.share_api.update_received, 200, body["share_id"], body["state"])
 
 
-class ListSharesForFile(APIHandler):
+class ListSharesForFile(ServicesHandler):
     @property
     def share_api(self):
-        return ShareAPIFacade(self.log)
+        return self.services.share_facade
 
     @web.authenticated
     @gen.coroutine
@@ -96,17 +105,17 @@ class ListSharesForFile(APIHandler):
         type = self.get_query_argument('type')
         yield RequestHandler.async_handle_request(self, self.share_api.list_grantees_for_file, 200, file_path, type)
 
-class HomeDirHandler(APIHandler):
+class HomeDirHandler(ServicesHandler):
     @property
     def file_api(self):
-        return Cs3FileApi(self.log)
+        return self.services.file_api
 
     @web.authenticated
     @gen.coroutine
     def get(self):
         yield RequestHandler.async_handle_request(self, self.file_api.get_home_dir, 200)
 
-class LockHandler(APIHandler):
+class LockHandler(ServicesHandler):
 
     @property
     def contents_manager(self):
@@ -118,10 +127,10 @@ class LockHandler(APIHandler):
         request = self.get_json_body()
         yield RequestHandler.async_handle_request(self, self.contents_manager.create_clone_file, 200, request['file_path'])
 
-class PublicSharesHandler(APIHandler):
+class PublicSharesHandler(ServicesHandler):
     @property
     def public_share_api(self):
-        return Cs3PublicShareApi(self.log)
+        return self.services.public_share_api
 
     @web.authenticated
     @gen.coroutine
@@ -161,10 +170,10 @@ class PublicSharesHandler(APIHandler):
                                                   request['field_value'])
 
 
-class GetPublicShareByTokenHandler(APIHandler):
+class GetPublicShareByTokenHandler(ServicesHandler):
     @property
     def public_share_api(self):
-        return Cs3PublicShareApi(self.log)
+        return self.services.public_share_api
 
     @web.authenticated
     @gen.coroutine
@@ -174,10 +183,10 @@ class GetPublicShareByTokenHandler(APIHandler):
         yield RequestHandler.async_handle_request(self, self.public_share_api.get_public_share_by_token, 200, token, password)
 
 
-class ListPublicSharesHandler(APIHandler):
+class ListPublicSharesHandler(ServicesHandler):
     @property
     def public_share_api(self):
-        return Cs3PublicShareApi(self.log)
+        return self.services.public_share_api
 
     @web.authenticated
     @gen.coroutine
@@ -185,10 +194,10 @@ class ListPublicSharesHandler(APIHandler):
         yield RequestHandler.async_handle_request(self, self.public_share_api.list_public_shares, 200)
 
 
-class UserInfoHandler(APIHandler):
+class UserInfoHandler(ServicesHandler):
     @property
     def user_api(self):
-        return Cs3UserApi(self.log)
+        return self.services.user_api
 
     @web.authenticated
     @gen.coroutine
@@ -197,10 +206,10 @@ class UserInfoHandler(APIHandler):
         opaque_id = self.get_query_argument('opaque_id')
         yield RequestHandler.async_handle_request(self, self.user_api.get_user, 200, idp, opaque_id)
 
-class UserInfoClaimHandler(APIHandler):
+class UserInfoClaimHandler(ServicesHandler):
     @property
     def user_api(self):
-        return Cs3UserApi(self.log)
+        return self.services.user_api
 
     @web.authenticated
     @gen.coroutine
@@ -209,10 +218,10 @@ class UserInfoClaimHandler(APIHandler):
         value = self.get_query_argument('value')
         yield RequestHandler.async_handle_request(self, self.user_api.get_user_info_by_claim, 200, claim, value)
 
-class UserQueryHandler(APIHandler):
+class UserQueryHandler(ServicesHandler):
     @property
     def user_api(self):
-        return Cs3UserApi(self.log)
+        return self.services.user_api
 
     @web.authenticated
     @gen.coroutine
@@ -220,7 +229,10 @@ class UserQueryHandler(APIHandler):
         query = self.get_query_argument('query')
         yield RequestHandler.async_handle_request(self, self.user_api.find_users_by_query, 200, query)
 
-def setup_handlers(web_app, url_path):
+def setup_handlers(web_app, url_path, services=None):
+    if services is None:
+        services = ServiceRegistry.get_services()
+
     handlers = [
         (r"/api/cs3/shares", ShareHandler),
         (r"/api/cs3/shares/list", ListSharesHandler),
@@ -238,7 +250,7 @@ def setup_handlers(web_app, url_path):
 
     for handler in handlers:
         pattern = url_path_join(web_app.settings['base_url'], handler[0])
-        new_handler = tuple([pattern] + list(handler[1:]))
+        new_handler = tuple([pattern] + list(handler[1:]) + [{'services': services}])
         web_app.add_handlers('.*$', [new_handler])
 
 class RequestHandler(APIHandler):
@@ -256,14 +268,38 @@ class RequestHandler(APIHandler):
     @staticmethod
     async def async_handle_request(self, api_function, success_code, *args):
         try:
-            loop = get_or_create_eventloop()
-            response = await loop.run_in_executor(None, api_function, *args)
+            if inspect.iscoroutinefunction(api_function):
+                response = await api_function(*args)
+            else:
+                loop = get_or_create_eventloop()
+                response = await loop.run_in_executor(None, api_function, *args)
         except Exception as err:
             self.log.error(err)
             RequestHandler.handle_error(self, err)
         else:
             RequestHandler.handle_response(self, response, success_code)
 
+    @staticmethod
+    async def async_handle_conditional_request(self, api_function, *args):
+        """
+        Serves a model with its ETag, api_function returns the etag and the model. A request
+        with the etag in If-None-Match gets a 304 response without the model.
+        """
+        try:
+            loop = get_or_create_eventloop()
+            etag, response = await loop.run_in_executor(None, api_function, *args)
+        except Exception as err:
+            self.log.error(err)
+            RequestHandler.handle_error(self, err)
+        else:
+            if etag:
+                self.set_header('Etag', '"%s"' % etag)
+            if etag and self.check_etag_header():
+                self.set_status(304)
+                self.finish()
+            else:
+                RequestHandler.handle_response(self, response, 200)
+
     @staticmethod
     def handle_error(self, err):
         status = RequestHandler.get_response_code(err)
@@ -285,7 +321,7 @@ class RequestHandler(APIHandler):
 
     @staticmethod
     def get_response_code(err):
-        if isinstance(err, ShareAlreadyExistsError):
+        if isinstance(err, (ShareAlreadyExistsError, FileConflictError)):
             return 409
         if isinstance(err, (ShareNotFoundError, LockNotFoundError)):
             return 404
@@ -293,6 +329,6 @@ class RequestHandler(APIHandler):
             return 400
         if isinstance(err, OCMDisabledError):
             return 501
-        if isinstance(err, _InactiveRpcError):
+        if isinstance(err, (_InactiveRpcError, AioRpcError, GatewayUnavailableError)):
             return 503
         return 500
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import grpc
+import time
 import datetime
 import cs3.gateway.v1beta1.gateway_api_pb2 as cs3gw
 import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
@@ -8,12 +9,15 @@ import cs3.rpc.v1beta1.code_pb2 as cs3code
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.auth.channel_connector import ChannelConnector
-from cs3api4lab.api.storage_api import StorageApi
+from cs3api4lab.auth.async_channel_connector import AsyncChannelConnector
+from cs3api4lab.api.storage_api import StorageApi, AsyncStorageApi
+from cs3api4lab.utils.cache import TTLCache
 
 
 class LockBase(ABC):
 
-    def __init__(self, log, config):
+    def __init__(self, log, config, storage_api=None):
+        self.log = log
         self.user = None
         self.config = config
         self.auth = Auth.get_authenticator(config=config, log=log)
@@ -21,8 +25,10 @@ class LockBase(ABC):
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
         intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
-        self.storage_api = StorageApi(log)
+        self.storage_api = storage_api or StorageApi(log)
         self.lock_name = 'cs3apis4lab_lock'
+        # time of the last set or refresh of the locks held by this server, an entry expires with its lock
+        self.held_locks = TTLCache(config.stat_cache_size, config.locks_expiration_time)
 
     @abstractmethod
     def set_lock(self, stat):
@@ -36,6 +42,69 @@ class LockBase(ABC):
     def get_lock(self, ref):
         pass
 
+    @abstractmethod
+    def get_lock_state(self, stat):
+        """
+        Returns the lock of the file (None if there is none), to be passed to
+        is_locked_by_other and acquire_lock so the lock is fetched only once
+        """
+        pass
+
+    @abstractmethod
+    def is_locked_by_other(self, lock):
+        pass
+
+    @abstractmethod
+    def acquire_lock(self, stat, lock):
+        pass
+
+    @abstractmethod
+    def _renew_lock(self, stat):
+        """
+        Extends the lock held on the file without fetching it first
+        """
+        pass
+
+    def keep_lock(self, stat):
+        """
+        Keeps the lock this server holds on the file: a lock set or refreshed less than half of its
+        lifetime ago is left as it is, an older one is renewed with a single request.
+        Returns False if the lock is not held, it has to be acquired with set_lock then.
+        """
+        key = self._get_held_lock_key(stat)
+        locked_at = self.held_locks.get(key)
+        if locked_at is None:
+            return False
+        if self._is_lock_fresh(locked_at):
+            return True
+        try:
+            self._renew_lock(stat)
+        except Exception as e:
+            return self._forget_lock(stat, e)
+        self._remember_lock(stat)
+        return True
+
+    def holds_lock(self, stat):
+        """
+        Whether this server acquired a lock on the file which has not expired yet, no request is made
+        """
+        return self.held_locks.get(self._get_held_lock_key(stat)) is not None
+
+    def _is_lock_fresh(self, locked_at):
+        return time.monotonic() - locked_at < self.config.locks_expiration_time / 2
+
+    def _remember_lock(self, stat):
+        self.held_locks.set(self._get_held_lock_key(stat), time.monotonic())
+
+    def _forget_lock(self, stat, error):
+        self.held_locks.invalidate(self._get_held_lock_key(stat))
+        self.log.info('msg="Unable to renew lock" filepath="%s" reason="%s"' % (stat['filepath'], error))
+        return False
+
+    @staticmethod
+    def _get_held_lock_key(stat):
+        return stat['inode']['storage_id'], stat['inode']['opaque_id']
+
     def get_current_user(self):
         if self.user is None:
             self.user = self.cs3_api.WhoAmI(request=cs3gw.WhoAmIRequest(token=self.auth.authenticate()),
@@ -51,15 +120,62 @@ class LockBase(ABC):
         pass
 
     def _resolve_directory(self, dir_path, endpoint):  # right now it's possible to write in somone else's directory without it being shared
-        stat = self.storage_api.stat(dir_path, endpoint)
+        return self._get_resolved_directory(dir_path, self.storage_api.stat(dir_path, endpoint))
+
+    def _get_resolved_directory(self, dir_path, stat):
         if stat.status.code == cs3code.CODE_OK:
             return dir_path
         else:
             return self.config.mount_dir + '/'
 
     def _get_conflict_filename(self, file_name):
+        return self._get_conflict_name(file_name, self.get_current_user())
+
+    @staticmethod
+    def _get_conflict_name(file_name, user):
         file_extension = file_name.split('.')[-1]
         name = '.'.join(file_name.split('.')[0:-1])
-        return name + '-' + self.get_current_user().username + '.' + datetime.datetime.now().strftime(
+        return name + '-' + user.username + '.' + datetime.datetime.now().strftime(
             "%Y-%m-%d_%H_%M_%S") + '-conflict.' + file_extension
 
+
+
+class AsyncLockBase(LockBase):
+    """
+    Base of the lock APIs on a grpc.aio channel, combined with a lock API: class AsyncCs3(AsyncLockBase, Cs3)
+    """
+
+    def __init__(self, log, config, storage_api=None):
+        super().__init__(log, config, storage_api or AsyncStorageApi(log))
+        self.cs3_api = cs3gw_grpc.GatewayAPIStub(AsyncChannelConnector.get_channel(log))
+
+    async def keep_lock(self, stat):
+        key = self._get_held_lock_key(stat)
+        locked_at = self.held_locks.get(key)
+        if locked_at is None:
+            return False
+        if self._is_lock_fresh(locked_at):
+            return True
+        try:
+            await self._renew_lock(stat)
+        except Exception as e:
+            return self._forget_lock(stat, e)
+        self._remember_lock(stat)
+        return True
+
+    async def get_current_user(self):
+        if self.user is None:
+            token = await self.auth.async_authenticate()
+            self.user = await self.cs3_api.WhoAmI(request=cs3gw.WhoAmIRequest(token=token),
+                                                  metadata=[('x-access-token', token)])
+        return self.user.user
+
+    async def resolve_file_path(self, path):
+        file_name = path.split('/')[-1]
+        return await self._get_conflict_filename(file_name)
+
+    async def _resolve_directory(self, dir_path, endpoint):
+        return self._get_resolved_directory(dir_path, await self.storage_api.stat(dir_path, endpoint))
+
+    async def _get_conflict_filename(self, file_name):
+        return self._get_conflict_name(file_name, await self.get_current_user())
@@ -1,6 +1,6 @@
 import time
 
-from cs3api4lab.locks.base import LockBase
+from cs3api4lab.locks.base import LockBase, AsyncLockBase
 from cs3api4lab.utils.file_utils import FileUtils
 from cs3api4lab.exception.exceptions import FileLockedError
 
@@ -15,12 +15,14 @@ import google.protobuf.json_format as json_format
 
 class Cs3(LockBase):
 
-    def __init__(self, log, config):
-        super().__init__(log, config)
+    def __init__(self, log, config, storage_api=None):
+        super().__init__(log, config, storage_api)
 
     def set_lock(self, stat):
-        ref = FileUtils.get_reference(stat['inode']['opaque_id'], stat['inode']['storage_id'])
-        lock = self.get_lock(ref)
+        self.acquire_lock(stat, self.get_lock_state(stat))
+
+    def acquire_lock(self, stat, lock):
+        ref = self._get_stat_reference(stat)
         '''
         this if statement should be replaced with self.is_file_locked()  and set_lock
         function after the bug with setting/refreshing locks is resolved 
@@ -31,69 +33,136 @@ class Cs3(LockBase):
             self._refresh_lock(ref)
         else:
             raise FileLockedError("File %s is locked" % stat['filepath'])
+        self._remember_lock(stat)
+
+    def _renew_lock(self, stat):
+        self._refresh_lock(self._get_stat_reference(stat))
 
     def is_file_locked(self, stat):
-        file_is_locked = True
+        return self.is_locked_by_other(self.get_lock_state(stat))
 
-        ref = FileUtils.get_reference(stat['inode']['opaque_id'], stat['inode']['storage_id'])
-        lock = self.get_lock(ref)
-        if not lock:
-           file_is_locked = False
-        elif self._is_lock_mine(lock):
-            file_is_locked = False
+    def get_lock_state(self, stat):
+        return self.get_lock(self._get_stat_reference(stat))
 
-        return file_is_locked
+    def is_locked_by_other(self, lock):
+        return bool(lock) and not self._is_lock_mine(lock)
 
     def is_valid_external_lock(self, stat):
-        ref = FileUtils.get_reference(stat['inode']['opaque_id'], stat['inode']['storage_id'])
-        lock = self.get_lock(ref)
+        lock = self.get_lock(self._get_stat_reference(stat))
         return lock and not self._is_lock_mine(lock)
 
     def _is_lock_mine(self, lock):
-        user = self.get_current_user()
-        return lock['user']['idp'] == user.id.idp and lock['user']['opaqueId'] == user.id.opaque_id
+        return self._is_users_lock(lock, self.get_current_user())
 
     def get_lock(self, ref):
         request = storage_api.GetLockRequest(ref=ref)
         lock_response = self.cs3_api.GetLock(request=request, metadata=[('x-access-token', self.auth.authenticate())])
-        if lock_response.status.code == cs3code.CODE_OK:
-            return json_format.MessageToDict(lock_response.lock)
-        elif lock_response.status.code == cs3code.CODE_NOT_FOUND:
-            return None
-        else:
-            raise IOError("Unable to get lock: %s" % str(lock_response))
+        return self._get_lock_from_response(lock_response)
 
     def _unlock(self, ref, lock):
         request = storage_api.UnlockRequest(ref=ref, lock=lock)
         unlock_response = self.cs3_api.Unlock(request=request, metadata=[('x-access-token', self.auth.authenticate())])
-        if unlock_response.status.code != cs3code.CODE_OK:
-            raise IOError("Unable to unlock: %s" % str(unlock_response))
+        self._check_lock_response(ref, unlock_response, "unlock")
 
     def _set_lock(self, ref):
-        user = self.get_current_user()
-        lock = storage_resources.Lock(
-            lock_id=self.lock_name,
-            type=storage_resources.LOCK_TYPE_WRITE,
-            user=id_res.UserId(idp=user.id.idp, opaque_id=user.id.opaque_id, type=user.id.type),
-            expiration=cs3_types.Timestamp(seconds=int(time.time() + self.config.locks_expiration_time))
-        )
-        request = storage_api.SetLockRequest(ref=ref, lock=lock)
+        request = storage_api.SetLockRequest(ref=ref, lock=self._get_new_lock(self.get_current_user()))
         lock_response = self.cs3_api.SetLock(request=request, metadata=[('x-access-token', self.auth.authenticate())])
-        if lock_response.status.code != cs3code.CODE_OK:
-            raise IOError("Unable to set lock: %s" % str(lock_response))
+        self._check_lock_response(ref, lock_response, "set lock")
 
     def _refresh_lock(self, ref):
-        user = self.get_current_user()
-        lock = storage_resources.Lock(
+        request = storage_api.RefreshLockRequest(ref=ref, lock=self._get_new_lock(self.get_current_user()))
+        refresh_response = self.cs3_api.RefreshLock(request=request,
+                                                    metadata=[('x-access-token', self.auth.authenticate())])
+        self._check_lock_response(ref, refresh_response, "refresh lock")
+
+    @staticmethod
+    def _get_stat_reference(stat):
+        return FileUtils.get_reference(stat['inode']['opaque_id'], stat['inode']['storage_id'])
+
+    @staticmethod
+    def _is_users_lock(lock, user):
+        return lock['user']['idp'] == user.id.idp and lock['user']['opaqueId'] == user.id.opaque_id
+
+    def _get_new_lock(self, user):
+        return storage_resources.Lock(
             lock_id=self.lock_name,
             type=storage_resources.LOCK_TYPE_WRITE,
-            user=id_res.UserId(idp=user.id.idp, opaque_id=user.id.opaque_id, type=user.type),
+            user=id_res.UserId(idp=user.id.idp, opaque_id=user.id.opaque_id, type=user.id.type),
             expiration=cs3_types.Timestamp(seconds=int(time.time() + self.config.locks_expiration_time))
         )
-        request = storage_api.RefreshLockRequest(ref=ref, lock=lock)
-        refresh_response = self.cs3_api.RefreshLock(request=request,
-                                                    metadata=[('x-access-token', self.auth.authenticate())])
-        if refresh_response.status.code != cs3code.CODE_OK:
-            raise IOError("Unable to refresh lock: %s" % str(refresh_response))
 
+    @staticmethod
+    def _get_lock_from_response(lock_response):
+        if lock_response.status.code == cs3code.CODE_OK:
+            return json_format.MessageToDict(lock_response.lock)
+        elif lock_response.status.code == cs3code.CODE_NOT_FOUND:
+            return None
+        else:
+            raise IOError("Unable to get lock: %s" % str(lock_response))
+
+    def _check_lock_response(self, ref, response, action):
+        # the lock changes the etag of the file
+        self.storage_api.invalidate_stat_ref(ref)
+        if response.status.code != cs3code.CODE_OK:
+            raise IOError("Unable to %s: %s" % (action, str(response)))
+
+
+class AsyncCs3(AsyncLockBase, Cs3):
+
+    def __init__(self, log, config, storage_api=None):
+        super().__init__(log, config, storage_api)
+
+    async def set_lock(self, stat):
+        await self.acquire_lock(stat, await self.get_lock_state(stat))
+
+    async def acquire_lock(self, stat, lock):
+        ref = self._get_stat_reference(stat)
+        if not lock:
+            await self._set_lock(ref)
+        elif await self._is_lock_mine(lock):
+            await self._refresh_lock(ref)
+        else:
+            raise FileLockedError("File %s is locked" % stat['filepath'])
+        self._remember_lock(stat)
+
+    async def _renew_lock(self, stat):
+        await self._refresh_lock(self._get_stat_reference(stat))
+
+    async def is_file_locked(self, stat):
+        return await self.is_locked_by_other(await self.get_lock_state(stat))
+
+    async def get_lock_state(self, stat):
+        return await self.get_lock(self._get_stat_reference(stat))
+
+    async def is_locked_by_other(self, lock):
+        return bool(lock) and not await self._is_lock_mine(lock)
+
+    async def is_valid_external_lock(self, stat):
+        lock = await self.get_lock(self._get_stat_reference(stat))
+        return lock and not await self._is_lock_mine(lock)
+
+    async def _is_lock_mine(self, lock):
+        return self._is_users_lock(lock, await self.get_current_user())
+
+    async def get_lock(self, ref):
+        request = storage_api.GetLockRequest(ref=ref)
+        lock_response = await self.cs3_api.GetLock(request=request, metadata=await self._get_token())
+        return self._get_lock_from_response(lock_response)
+
+    async def _unlock(self, ref, lock):
+        request = storage_api.UnlockRequest(ref=ref, lock=lock)
+        unlock_response = await self.cs3_api.Unlock(request=request, metadata=await self._get_token())
+        self._check_lock_response(ref, unlock_response, "unlock")
+
+    async def _set_lock(self, ref):
+        request = storage_api.SetLockRequest(ref=ref, lock=self._get_new_lock(await self.get_current_user()))
+        lock_response = await self.cs3_api.SetLock(request=request, metadata=await self._get_token())
+        self._check_lock_response(ref, lock_response, "set lock")
+
+    async def _refresh_lock(self, ref):
+        request = storage_api.RefreshLockRequest(ref=ref, lock=self._get_new_lock(await self.get_current_user()))
+        refresh_response = await self.cs3_api.RefreshLock(request=request, metadata=await self._get_token())
+        self._check_lock_response(ref, refresh_response, "refresh lock")
 
+    async def _get_token(self):
+        return [('x-access-token', await self.auth.async_authenticate())]
@@ -1,14 +1,23 @@
-from cs3api4lab.locks.metadata import Metadata
-from cs3api4lab.locks.cs3 import Cs3
+from cs3api4lab.locks.metadata import Metadata, AsyncMetadata
+from cs3api4lab.locks.cs3 import Cs3, AsyncCs3
 
 
 class LockApiFactory:
 
     @staticmethod
-    def create(log, config):
+    def create(log, config, storage_api=None):
         if config.locks_api == 'metadata':
-            return Metadata(log, config)
+            return Metadata(log, config, storage_api)
         elif config.locks_api == 'cs3':
-            return Cs3(log, config)
+            return Cs3(log, config, storage_api)
+        else:
+            raise NotImplementedError("Lock API implementation not found")
+
+    @staticmethod
+    def create_async(log, config, storage_api=None):
+        if config.locks_api == 'metadata':
+            return AsyncMetadata(log, config, storage_api)
+        elif config.locks_api == 'cs3':
+            return AsyncCs3(log, config, storage_api)
         else:
             raise NotImplementedError("Lock API implementation not found")
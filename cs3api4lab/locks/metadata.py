@@ -3,36 +3,44 @@ import time
 import datetime
 import urllib.parse
 
-from cs3api4lab.locks.base import LockBase
+from cs3api4lab.locks.base import LockBase, AsyncLockBase
 from cs3api4lab.exception.exceptions import FileLockedError
 
 
 class Metadata(LockBase):
 
-    def __init__(self, log, config):
-        super().__init__(log, config)
-        self.log = log
+    def __init__(self, log, config, storage_api=None):
+        super().__init__(log, config, storage_api)
         self.locks_expiration_time = self.config.locks_expiration_time
 
     def set_lock(self, stat):
-        if not self.is_file_locked(stat):
+        self.acquire_lock(stat, self.get_lock_state(stat))
+
+    def acquire_lock(self, stat, lock):
+        if not self.is_locked_by_other(lock):
             self.storage_api.set_metadata(self.lock_name, self._generate_lock_entry(), stat)
+            self._remember_lock(stat)
         else:
             raise FileLockedError("File %s is locked" % stat['filepath'])
 
+    def _renew_lock(self, stat):
+        self.storage_api.set_metadata(self.lock_name, self._generate_lock_entry(), stat)
+
     def is_file_locked(self, stat):
-        file_is_locked = True
+        return self.is_locked_by_other(self.get_lock_state(stat))
 
-        lock = self.get_lock(stat)
-        if not lock:
-            file_is_locked = False
-        elif self._is_lock_mine(lock) or self._is_lock_expired(lock):
-            file_is_locked = False
+    def get_lock_state(self, stat):
+        # the lock is kept in the metadata of the stat, no request is needed
+        return self.get_lock(stat)
 
-        return file_is_locked
+    def is_locked_by_other(self, lock):
+        return bool(lock) and not (self._is_lock_mine(lock) or self._is_lock_expired(lock))
 
     def _generate_lock_entry(self):
-        user = self.get_current_user()
+        return self._get_lock_entry(self.get_current_user())
+
+    @staticmethod
+    def _get_lock_entry(user):
         return urllib.parse.quote(json.dumps({
             "username": user.username,
             "idp": user.id.idp,
@@ -47,7 +55,10 @@ class Metadata(LockBase):
         return lock and not is_mine and not self._is_lock_expired(lock)
 
     def _is_lock_mine(self, lock):
-        user = self.get_current_user()
+        return self._is_users_lock(lock, self.get_current_user())
+
+    @staticmethod
+    def _is_users_lock(lock, user):
         if lock:
             return lock['username'] == user.username and lock['idp'] == user.id.idp and lock[
                 'opaque_id'] == user.id.opaque_id
@@ -66,4 +77,43 @@ class Metadata(LockBase):
             return None
 
         lock = stat['arbitrary_metadata']['metadata'].get(self.lock_name)
-        return json.loads(urllib.parse.unquote(lock))
\ No newline at end of file
+        return json.loads(urllib.parse.unquote(lock))
+
+
+class AsyncMetadata(AsyncLockBase, Metadata):
+
+    def __init__(self, log, config, storage_api=None):
+        super().__init__(log, config, storage_api)
+
+    async def set_lock(self, stat):
+        await self.acquire_lock(stat, await self.get_lock_state(stat))
+
+    async def acquire_lock(self, stat, lock):
+        if not await self.is_locked_by_other(lock):
+            await self.storage_api.set_metadata(self.lock_name, await self._generate_lock_entry(), stat)
+            self._remember_lock(stat)
+        else:
+            raise FileLockedError("File %s is locked" % stat['filepath'])
+
+    async def _renew_lock(self, stat):
+        await self.storage_api.set_metadata(self.lock_name, await self._generate_lock_entry(), stat)
+
+    async def is_file_locked(self, stat):
+        return await self.is_locked_by_other(await self.get_lock_state(stat))
+
+    async def get_lock_state(self, stat):
+        return self.get_lock(stat)
+
+    async def is_locked_by_other(self, lock):
+        return bool(lock) and not (await self._is_lock_mine(lock) or self._is_lock_expired(lock))
+
+    async def _generate_lock_entry(self):
+        return self._get_lock_entry(await self.get_current_user())
+
+    async def is_valid_external_lock(self, stat):
+        lock = self.get_lock(stat)
+        is_mine = await self._is_lock_mine(lock)
+        return lock and not is_mine and not self._is_lock_expired(lock)
+
+    async def _is_lock_mine(self, lock):
+        return self._is_users_lock(lock, await self.get_current_user())
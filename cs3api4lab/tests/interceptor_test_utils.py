@@ -0,0 +1,25 @@
+from collections import namedtuple
+from concurrent.futures import Future
+
+import grpc
+
+CallDetails = namedtuple('CallDetails', ['method', 'timeout', 'metadata', 'credentials', 'wait_for_ready',
+                                         'compression'])
+
+
+class RpcFailure(grpc.RpcError, grpc.Call):
+    """
+    The error of a failed call, as raised by the future returned by the continuation of an interceptor
+    """
+
+    def __init__(self, code):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+
+def done(result):
+    future = Future()
+    future.set_result(result)
+    return future
@@ -46,6 +46,7 @@ class ShareTestBase:
             "client_id": "marie",
             "client_secret": "radioactivity",
             "locks_expiration_time": 10,
+            "stat_cache_size": 1024,
             "tus_enabled": True,
             "enable_ocm": False,
             "dev_env": True
@@ -67,6 +68,7 @@ class ShareTestBase:
             "client_id": "richard",
             "client_secret": "superfluidity",
             "locks_expiration_time": 10,
+            "stat_cache_size": 1024,
             "tus_enabled": True,
             "enable_ocm": False,
             "dev_env": True
@@ -0,0 +1,58 @@
+import asyncio
+from unittest import TestCase
+
+import grpc
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.auth.async_channel_connector import AsyncChannelConnector
+
+
+class TestAsyncChannelConnector(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.loops = []
+
+    def tearDown(self):
+        AsyncChannelConnector.close()
+        for loop in self.loops:
+            loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_channel_per_loop(self):
+        first_loop = self._set_loop()
+        first_channel = AsyncChannelConnector.get_channel(self.log)
+        self.assertIs(AsyncChannelConnector.get_channel(self.log), first_channel)
+
+        self._set_loop()
+        second_channel = AsyncChannelConnector.get_channel(self.log)
+        self.assertIsNot(second_channel, first_channel)
+
+        # the channel of a loop still open is kept
+        asyncio.set_event_loop(first_loop)
+        self.assertIs(AsyncChannelConnector.get_channel(self.log), first_channel)
+
+    def test_channel_of_closed_loop_dropped(self):
+        first_loop = self._set_loop()
+        first_channel = AsyncChannelConnector.get_channel(self.log)
+        first_loop.run_until_complete(first_channel.close())
+        first_loop.close()
+
+        self._set_loop()
+        AsyncChannelConnector.get_channel(self.log)
+        self.assertNotIn(first_channel, AsyncChannelConnector._AsyncChannelConnector__channels.values())
+
+    def test_close(self):
+        loop = self._set_loop()
+        channel = AsyncChannelConnector.get_channel(self.log)
+        AsyncChannelConnector.close()
+
+        with self.assertRaisesRegex(grpc.aio.UsageError, 'closed'):
+            loop.run_until_complete(channel.unary_unary('/Stat')(b''))
+        self.assertIsNot(AsyncChannelConnector.get_channel(self.log), channel)
+
+    def _set_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loops.append(loop)
+        return loop
@@ -0,0 +1,53 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.api.cs3_file_api import AsyncCs3FileApi
+from traitlets.config import LoggingConfigurable
+from cs3api4lab.exception.exceptions import ResourceNotFoundError
+
+
+class TestAsyncCs3FileApi(IsolatedAsyncioTestCase):
+    client_id = None
+    endpoint = None
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        config = Cs3ConfigManager.get_config()
+        self.client_id = config.client_id
+        self.endpoint = config.endpoint
+
+    async def asyncSetUp(self):
+        self.storage = AsyncCs3FileApi(self.log)
+
+    async def test_write_and_read_file(self):
+        content_to_write = b'bla_async\n'
+        file_path = "/test_async_read.txt"
+        try:
+            await self.storage.write_file(file_path, content_to_write, self.endpoint)
+            stat = await self.storage.stat_info(file_path, self.endpoint)
+            self.assertEqual(stat['size'], len(content_to_write))
+            chunks = [chunk async for chunk in self.storage.read_file(stat, self.endpoint)]
+            self.assertEqual(b''.join(chunks), content_to_write)
+        finally:
+            await self.storage.remove(file_path, self.endpoint)
+
+    async def test_concurrent_stat(self):
+        file_paths = ["/test_async_stat_%d.txt" % i for i in range(5)]
+        try:
+            for file_path in file_paths:
+                await self.storage.write_file(file_path, file_path, self.endpoint)
+            stats = await asyncio.gather(*[self.storage.stat_info(file_path, self.endpoint)
+                                           for file_path in file_paths])
+            self.assertEqual([stat['size'] for stat in stats], [len(file_path) for file_path in file_paths])
+        finally:
+            for file_path in file_paths:
+                await self.storage.remove(file_path, self.endpoint)
+
+    async def test_stat_no_file(self):
+        with self.assertRaises(FileNotFoundError):
+            await self.storage.stat_info('/hopefullynotexisting', self.endpoint)
+
+    async def test_read_directory_no_dir(self):
+        with self.assertRaises(ResourceNotFoundError) as cm:
+            await self.storage.read_directory('/no_such_dir', self.endpoint)
+        self.assertEqual(cm.exception.args[0], 'directory /no_such_dir not found')
@@ -0,0 +1,93 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from nbformat.v4 import new_notebook, new_code_cell
+from tornado import web
+
+from cs3api4lab.api.async_cs3apismanager import AsyncCS3APIsManager
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.exception.exceptions import GatewayUnavailableError
+from traitlets.config import LoggingConfigurable
+
+
+class TestAsyncCS3APIsManager(IsolatedAsyncioTestCase):
+    endpoint = None
+    contents_manager = None
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.config = Cs3ConfigManager.get_config()
+        self.endpoint = self.config.endpoint
+
+    async def asyncSetUp(self):
+        self.contents_manager = AsyncCS3APIsManager(None, self.log)
+
+    async def test_get_text_file(self):
+        file_id = "/home/test_async_get_text_file.txt"
+        message = "Lorem ipsum dolor sit amet..."
+        try:
+            await self.contents_manager.save({'type': 'file', 'format': 'text', 'content': message}, file_id)
+            model = await self.contents_manager.get(file_id, True, 'file')
+            self.assertEqual(model["name"], "test_async_get_text_file.txt")
+            self.assertEqual(model["content"], message)
+            self.assertEqual(model["format"], "text")
+            self.assertEqual(model["size"], 29)
+            self.assertEqual(model["writable"], True)
+            self.assertEqual(model["type"], "file")
+        finally:
+            await self.contents_manager.delete_file(file_id)
+
+    async def test_save_and_get_notebook(self):
+        file_id = "/home/test_async_notebook.ipynb"
+        nb = new_notebook(cells=[new_code_cell("print('Hello async')")])
+        try:
+            model = await self.contents_manager.save({'type': 'notebook', 'format': 'json', 'content': nb}, file_id)
+            self.assertEqual(model["type"], "notebook")
+            self.assertIsNone(model["content"])
+
+            model = await self.contents_manager.get(file_id, True, 'notebook')
+            self.assertEqual(model["format"], "json")
+            self.assertEqual(model["content"].cells[0].source, "print('Hello async')")
+        finally:
+            await self.contents_manager.delete_file(file_id)
+
+    async def test_save_unchanged_with_hash(self):
+        file_id = "/home/test_async_save_unchanged_with_hash.txt"
+        model = {'type': 'file', 'format': 'text', 'content': "Lorem ipsum dolor sit amet..."}
+        try:
+            for _ in range(2):
+                save_model = await self.contents_manager.save(model, file_id)
+                get_model = await self.contents_manager.get(file_id, False, 'file', require_hash=True)
+                self.assertEqual(get_model["hash"], save_model["hash"])
+                self.assertEqual(get_model["hash_algorithm"], save_model["hash_algorithm"])
+        finally:
+            await self.contents_manager.delete_file(file_id)
+
+    async def test_get_not_existing(self):
+        with self.assertRaises(web.HTTPError) as cm:
+            await self.contents_manager.get("/home/test_async_not_existing.txt", True, 'file')
+        self.assertEqual(cm.exception.status_code, 404)
+
+    async def test_dir_exists(self):
+        self.assertTrue(await self.contents_manager.dir_exists("/"))
+        self.assertFalse(await self.contents_manager.dir_exists("/home/test_async_no_such_dir"))
+
+    async def test_gateway_unavailable(self):
+        file_path = "/home/test_async_gateway_unavailable.txt"
+        model = {'type': 'file', 'format': 'text', 'content': "Lorem ipsum dolor sit amet..."}
+        error = GatewayUnavailableError("gateway calls of storage are failing, retry in a while")
+        file_api = self.contents_manager.file_api
+        with patch.object(file_api, 'write_file', side_effect=error), \
+                patch.object(file_api, 'remove', side_effect=error), \
+                patch.object(file_api, 'move', side_effect=error):
+            await self.contents_manager.save(dict(model, chunk=1), file_path)
+            calls = [lambda: self.contents_manager.save(model, file_path),
+                     lambda: self.contents_manager.save(dict(model, chunk=-1), file_path),
+                     lambda: self.contents_manager.save({'type': 'notebook', 'format': 'json', 'content': new_notebook()},
+                                                        file_path + ".ipynb"),
+                     lambda: self.contents_manager.delete_file(file_path),
+                     lambda: self.contents_manager.rename_file(file_path, file_path + ".renamed")]
+            for call in calls:
+                with self.assertRaises(web.HTTPError) as context:
+                    await call()
+                self.assertEqual(context.exception.status_code, 503)
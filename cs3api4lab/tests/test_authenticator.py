@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
+import tempfile
+import time
 from pathlib import Path
 from unittest import TestCase, skip
 from collections import namedtuple
@@ -8,7 +11,8 @@ import jwt
 from tornado import web
 from traitlets.config import LoggingConfigurable
 
-from cs3api4lab.auth.authenticator import Auth
+from cs3api4lab.auth.authenticator import Auth, Authenticator
+from cs3api4lab.auth.token_file import TokenFile
 from cs3api4lab.auth.reva_password import RevaPassword
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 
@@ -126,6 +130,40 @@ class TestAuthenticator(TestCase):
             token_authenticator = Auth.get_authenticator(token_config, log=self.log)
             token_authenticator.authenticate()
 
+    def test_concurrent_refresh(self):
+        authenticator = CountingAuthenticator(config=Cs3ConfigManager.get_config(), log=self.log)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tokens = list(executor.map(lambda _: authenticator.authenticate(), range(8)))
+        self.assertEqual(authenticator.refreshes, 1)
+        self.assertEqual(set(tokens), {authenticator.token})
+
+    def test_refresh_before_expiry(self):
+        authenticator = CountingAuthenticator(config=Cs3ConfigManager.get_config(), log=self.log)
+        expiring_token = CountingAuthenticator.create_token(2)
+        authenticator.token = expiring_token
+        time.sleep(1.1)  # the token is refreshed in the second half of its lifetime
+        self.assertEqual(authenticator.authenticate(), expiring_token)
+        authenticator._refresh_future.result()
+        self.assertEqual(authenticator.refreshes, 1)
+        self.assertNotEqual(authenticator.authenticate(), expiring_token)
+
+    def test_token_file_watch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'token.txt')
+            with open(path, 'w') as file:
+                file.write('first')
+            token_file = TokenFile(path, self.log)
+            self.assertEqual(token_file.read(), 'first')
+            self.assertFalse(token_file.has_changed())
+
+            changes = []
+            token_file.watch(lambda: changes.append(token_file.read()), 0.05)
+            with open(path + '.new', 'w') as file:
+                file.write('second')
+            os.replace(path + '.new', path)
+            time.sleep(0.3)
+            self.assertEqual(changes, ['second'])
+
     @staticmethod
     def _create_oauth_token():
         now = datetime.timestamp(datetime.now())
@@ -145,3 +183,16 @@ class TestAuthenticator(TestCase):
 
         token = jwt.encode(payload=payload, key="Pive-Fumkiu4")
         return token.decode("utf-8")
+
+
+class CountingAuthenticator(Authenticator):
+    refreshes = 0
+
+    def refresh_token(self):
+        time.sleep(0.1)
+        self.refreshes += 1
+        self.token = self.create_token(3600, self.refreshes)
+
+    @staticmethod
+    def create_token(lifetime, jti=0):
+        return jwt.encode(payload={'exp': time.time() + lifetime, 'jti': jti}, key="Pive-Fumkiu4")
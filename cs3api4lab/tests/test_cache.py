@@ -0,0 +1,47 @@
+from unittest import TestCase
+from time import sleep
+
+from cs3api4lab.utils.cache import TTLCache
+
+
+class TestTTLCache(TestCase):
+
+    def test_get_and_expire(self):
+        cache = TTLCache(10, 0.1)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        sleep(0.2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get_stale('a'), 1)
+
+    def test_entry_ttl(self):
+        cache = TTLCache(10, 10)
+        cache.set('a', 1, 0.1)
+        cache.set('b', 2)
+        sleep(0.2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(2, 10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get_stale('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_invalidate(self):
+        cache = TTLCache(10, 10)
+        for key in ['/a', '/a/b', '/c']:
+            cache.set(key, key)
+        cache.invalidate('/c')
+        self.assertIsNone(cache.get('/c'))
+        cache.invalidate_if(lambda key, value: key.startswith('/a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_disabled(self):
+        cache = TTLCache(10, 0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
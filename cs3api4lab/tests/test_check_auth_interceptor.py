@@ -0,0 +1,65 @@
+from concurrent.futures import Future
+from unittest import TestCase
+
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+from tornado import web
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.auth.check_auth_interceptor import CheckAuthInterceptor
+from cs3api4lab.tests.interceptor_test_utils import CallDetails, done
+
+
+class TokenAuthenticator:
+    def __init__(self, token):
+        self.token = token
+        self.renewals = 0
+
+    def renew_token(self, rejected_token):
+        self.renewals += 1
+        self.token = 'new-token'
+        return self.token
+
+    def raise_401_error(self):
+        raise web.HTTPError(401)
+
+
+class TestCheckAuthInterceptor(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.call_details = CallDetails('/Stat', None, [('x-access-token', 'old-token')], None, None, None)
+
+    def test_retry_with_new_token(self):
+        authenticator = TokenAuthenticator('old-token')
+        interceptor = CheckAuthInterceptor(self.log, authenticator)
+        tokens = []
+
+        def continuation(call_details, request):
+            token = dict(call_details.metadata)['x-access-token']
+            tokens.append(token)
+            code = cs3code.CODE_OK if token == 'new-token' else cs3code.CODE_UNAUTHENTICATED
+            return done(cs3sp.StatResponse(status={'code': code}))
+
+        response = interceptor.intercept_unary_unary(continuation, self.call_details, cs3sp.StatRequest())
+        self.assertEqual(response.result().status.code, cs3code.CODE_OK)
+        self.assertEqual(tokens, ['old-token', 'new-token'])
+        self.assertEqual(authenticator.renewals, 1)
+
+    def test_rejected_after_retry(self):
+        interceptor = CheckAuthInterceptor(self.log, TokenAuthenticator('old-token'))
+
+        def continuation(call_details, request):
+            return done(cs3sp.StatResponse(status={'code': cs3code.CODE_UNAUTHENTICATED}))
+
+        with self.assertRaises(web.HTTPError) as cm:
+            interceptor.intercept_unary_unary(continuation, self.call_details, cs3sp.StatRequest())
+        self.assertEqual(cm.exception.status_code, 401)
+
+    def test_future_not_waited_for(self):
+        interceptor = CheckAuthInterceptor(self.log, TokenAuthenticator('old-token'))
+        pending = Future()
+        response = interceptor.intercept_unary_unary(lambda call_details, request: pending,
+                                                     self.call_details, cs3sp.StatRequest())
+        self.assertIs(response, pending)
+        self.assertFalse(response.done())
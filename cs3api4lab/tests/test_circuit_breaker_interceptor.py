@@ -0,0 +1,86 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest import TestCase
+
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+import grpc
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.auth.circuit_breaker_interceptor import CircuitBreaker, CircuitBreakerInterceptor
+from cs3api4lab.exception.exceptions import GatewayUnavailableError
+from cs3api4lab.tests.interceptor_test_utils import CallDetails, RpcFailure
+
+
+class TestCircuitBreakerInterceptor(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.calls = 0
+
+    def test_open_after_failures(self):
+        interceptor = self._interceptor(reset_time=60)
+        for _ in range(CircuitBreaker.min_calls):
+            self._stat(interceptor, grpc.StatusCode.UNAVAILABLE)
+        self.assertEqual(interceptor.circuit_breaker.get_state('storage'), CircuitBreaker.OPEN)
+
+        with self.assertRaises(GatewayUnavailableError):
+            self._stat(interceptor)
+        self.assertEqual(self.calls, CircuitBreaker.min_calls)
+        # the other families are not affected
+        self._call(interceptor, '/cs3.gateway.v1beta1.GatewayAPI/ListReceivedShares')
+        self.assertEqual(interceptor.circuit_breaker.get_state('shares'), CircuitBreaker.CLOSED)
+
+    def test_not_open_below_threshold(self):
+        interceptor = self._interceptor(reset_time=60)
+        for i in range(CircuitBreaker.min_calls * 2):
+            self._stat(interceptor, grpc.StatusCode.DEADLINE_EXCEEDED if i % 3 == 0 else None)
+        # errors returned by the gateway itself are not transient
+        for _ in range(CircuitBreaker.min_calls):
+            self._stat(interceptor, grpc.StatusCode.PERMISSION_DENIED)
+        self.assertEqual(interceptor.circuit_breaker.get_state('storage'), CircuitBreaker.CLOSED)
+
+    def test_half_open_probe(self):
+        interceptor = self._interceptor(reset_time=0)
+        for _ in range(CircuitBreaker.min_calls):
+            self._stat(interceptor, grpc.StatusCode.UNAVAILABLE)
+
+        self._stat(interceptor, grpc.StatusCode.UNAVAILABLE)
+        self.assertEqual(interceptor.circuit_breaker.get_state('storage'), CircuitBreaker.OPEN)
+
+        pending = Future()
+        interceptor.intercept_unary_unary(lambda call_details, request: pending,
+                                          CallDetails('/Stat', None, [], None, None, None), cs3sp.StatRequest())
+        self.assertEqual(interceptor.circuit_breaker.get_state('storage'), CircuitBreaker.HALF_OPEN)
+        # only the probe goes through
+        with self.assertRaises(GatewayUnavailableError):
+            self._stat(interceptor)
+
+        pending.set_result(cs3sp.StatResponse(status={'code': cs3code.CODE_OK}))
+        self.assertEqual(interceptor.circuit_breaker.get_state('storage'), CircuitBreaker.CLOSED)
+
+    def test_disabled(self):
+        interceptor = self._interceptor(reset_time=60, threshold=0)
+        for _ in range(CircuitBreaker.min_calls * 2):
+            self._stat(interceptor, grpc.StatusCode.UNAVAILABLE)
+        self.assertEqual(interceptor.circuit_breaker.get_state('storage'), CircuitBreaker.CLOSED)
+
+    def _interceptor(self, reset_time, threshold=50):
+        config = SimpleNamespace(circuit_breaker_threshold=threshold, circuit_breaker_reset_time=reset_time)
+        return CircuitBreakerInterceptor(CircuitBreaker(self.log, config))
+
+    def _stat(self, interceptor, code=None):
+        return self._call(interceptor, '/cs3.gateway.v1beta1.GatewayAPI/Stat', code)
+
+    def _call(self, interceptor, method, code=None):
+        def continuation(call_details, request):
+            self.calls += 1
+            future = Future()
+            if code is None:
+                future.set_result(cs3sp.StatResponse(status={'code': cs3code.CODE_OK}))
+            else:
+                future.set_exception(RpcFailure(code))
+            return future
+
+        return interceptor.intercept_unary_unary(continuation, CallDetails(method, None, [], None, None, None),
+                                                 cs3sp.StatRequest())
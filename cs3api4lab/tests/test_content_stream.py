@@ -0,0 +1,53 @@
+import base64
+import hashlib
+import io
+import zlib
+from unittest import TestCase
+
+from cs3api4lab.utils.content_stream import ContentStream
+
+
+class TestContentStream(TestCase):
+
+    def test_from_bytes(self):
+        stream = ContentStream.from_content(b'0123456789', 4)
+        self.assertEqual(len(stream), 10)
+        self.assertEqual([bytes(chunk) for chunk in stream], [b'0123', b'4567', b'89'])
+        self.assertEqual(b''.join(stream), b'0123456789')
+
+    def test_from_text(self):
+        text = 'zażółć gęślą jaźń'
+        stream = ContentStream.from_content(text, 5)
+        self.assertEqual(len(stream), len(text.encode('utf-8')))
+        self.assertEqual(b''.join(stream), text.encode('utf-8'))
+
+    def test_from_base64(self):
+        for size in [0, 1, 2, 3, 10, 100]:
+            data = bytes(range(size))
+            stream = ContentStream.from_base64(base64.b64encode(data).decode('ascii'), 6)
+            self.assertEqual(len(stream), size)
+            self.assertEqual(b''.join(stream), data)
+
+    def test_from_file(self):
+        file = io.BytesIO(b'abcdefgh')
+        file.seek(2)
+        stream = ContentStream.from_content(file, 4)
+        self.assertEqual(len(stream), 6)
+        self.assertEqual(b''.join(stream), b'cdefgh')
+        self.assertEqual(b''.join(stream), b'cdefgh')
+
+    def test_from_iterator_requires_length(self):
+        with self.assertRaises(ValueError):
+            ContentStream.from_content(iter([b'a']), 4)
+        stream = ContentStream.from_content(iter([b'a', b'bc']), 4, length=3)
+        self.assertEqual(len(stream), 3)
+        self.assertEqual(b''.join(stream), b'abc')
+
+    def test_checksum(self):
+        data = b'Lorem ipsum dolor sit amet' * 100
+        stream = ContentStream.from_content(data, 7)
+        self.assertEqual(stream.checksum('md5'), hashlib.md5(data).hexdigest())
+        self.assertEqual(stream.checksum('sha1'), hashlib.sha1(data).hexdigest())
+        self.assertEqual(stream.checksum('adler32'), '%08x' % zlib.adler32(data))
+        self.assertTrue(stream.repeatable)
+        self.assertFalse(ContentStream.from_content(iter([data]), 7, length=len(data)).repeatable)
@@ -3,7 +3,7 @@ from unittest import TestCase
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 from cs3api4lab.api.cs3_file_api import Cs3FileApi
 from traitlets.config import LoggingConfigurable
-from cs3api4lab.exception.exceptions import ResourceNotFoundError
+from cs3api4lab.exception.exceptions import ResourceNotFoundError, FileConflictError
 
 
 class TestCs3FileApi(TestCase):
@@ -29,6 +29,18 @@ class TestCs3FileApi(TestCase):
         finally:
             self.storage.remove(file_id, self.endpoint)
 
+    def test_stat_after_write(self):
+        file_id = "/test_stat_after_write.txt"
+        try:
+            self.storage.write_file(file_id, "short", self.endpoint)
+            self.assertEqual(self.storage.stat_info(file_id, self.endpoint)['size'], 5)
+            self.storage.write_file(file_id, "a bit longer", self.endpoint)
+            self.assertEqual(self.storage.stat_info(file_id, self.endpoint)['size'], 12)
+        finally:
+            self.storage.remove(file_id, self.endpoint)
+        with self.assertRaises(FileNotFoundError):
+            self.storage.stat_info(file_id, self.endpoint)
+
     def test_stat_no_file(self):
         with self.assertRaises(FileNotFoundError) as cm:
             self.storage.stat_info('/hopefullynotexisting', self.endpoint)
@@ -51,6 +63,37 @@ class TestCs3FileApi(TestCase):
         finally:
             self.storage.remove(file_path, self.endpoint)
 
+    def test_read_file_in_chunks(self):
+        content_to_write = 'zażółć gęślą jaźń\n'.encode('utf-8') * 10
+        file_path = "/test_read_chunks.txt"
+        chunk_size = self.storage.config.chunk_size
+        try:
+            self.storage.config.chunk_size = 7
+            self.storage.write_file(file_path, content_to_write, self.endpoint)
+            stat = self.storage.stat_info(file_path, self.endpoint)
+            chunks = list(self.storage.read_file(stat, self.endpoint))
+            self.assertTrue(all(len(chunk) <= 7 for chunk in chunks))
+            self.assertEqual(b''.join(chunks), content_to_write)
+        finally:
+            self.storage.config.chunk_size = chunk_size
+            self.storage.remove(file_path, self.endpoint)
+
+    def test_read_file_in_ranges(self):
+        content_to_write = bytes(range(256)) * 100
+        file_path = "/test_read_ranges.txt"
+        download_parallelism = self.storage.config.download_parallelism
+        download_range_size = self.storage.config.download_range_size
+        try:
+            self.storage.config.download_parallelism = 3
+            self.storage.config.download_range_size = 1000
+            self.storage.write_file(file_path, content_to_write, self.endpoint)
+            stat = self.storage.stat_info(file_path, self.endpoint)
+            self.assertEqual(b''.join(self.storage.read_file(stat, self.endpoint)), content_to_write)
+        finally:
+            self.storage.config.download_parallelism = download_parallelism
+            self.storage.config.download_range_size = download_range_size
+            self.storage.remove(file_path, self.endpoint)
+
     def test_read_file_by_id(self):
         content_to_write = b'bla_by_id\n'
         content_to_check = 'bla_by_id\n'
@@ -98,6 +141,45 @@ class TestCs3FileApi(TestCase):
         finally:
             self.storage.remove(file_id, self.endpoint)
 
+    def test_write_file_returns_stat(self):
+        file_id = "/test_write_file_returns_stat.txt"
+        try:
+            for buffer in (b"first version", b"second, longer version"):
+                stat_info = self.storage.write_file(file_id, buffer, self.endpoint)
+                self.assertEqual(stat_info['size'], len(buffer))
+                self.assertEqual(stat_info['inode'], self.storage.stat_info(file_id, self.endpoint)['inode'])
+        finally:
+            self.storage.remove(file_id, self.endpoint)
+
+    def test_write_file_changed_by_another_writer(self):
+        file_id = "/test_write_file_changed_by_another_writer.txt"
+        try:
+            for buffer in (b"new file", b"first version"):
+                self.storage.write_file(file_id, buffer, self.endpoint)
+            Cs3FileApi(self.log).write_file(file_id, b"second, longer version", self.endpoint)
+            # the same content as the last write of this api is not skipped, the file has changed since
+            with self.assertRaises(FileConflictError):
+                self.storage.write_file(file_id, b"first version", self.endpoint)
+        finally:
+            self.storage.remove(file_id, self.endpoint)
+
+    def test_write_file_tus(self):
+        buffer = b"Testu form cs3 Api with tus" * 100
+        file_id = "/testfile_tus.txt"
+        tus_enabled = self.storage.config.tus_enabled
+        tus_chunk_size = self.storage.config.tus_chunk_size
+        try:
+            self.storage.config.tus_enabled = True
+            self.storage.config.tus_chunk_size = 1000
+            self.storage.write_file(file_id, buffer, self.endpoint)
+            stat_info = self.storage.stat_info(file_id, self.endpoint)
+            self.assertEqual(stat_info['size'], len(buffer))
+            self.assertEqual(b''.join(self.storage.read_file(stat_info, self.endpoint)), buffer)
+        finally:
+            self.storage.config.tus_enabled = tus_enabled
+            self.storage.config.tus_chunk_size = tus_chunk_size
+            self.storage.remove(file_id, self.endpoint)
+
     def test_write_empty_file(self):
         buffer = b""
         file_id = "/zero_test_file.txt"
@@ -1,3 +1,4 @@
+from time import sleep
 from unittest import TestCase
 
 from cs3api4lab.api.cs3_user_api import Cs3UserApi
@@ -96,3 +97,34 @@ class TestCs3UserApi(TestCase):
 
         user_info = user[0]
         self.assertDictEqual(user_info, expected_info)
+
+    def test_get_user_info_cached(self):
+        opaque_id = "4c510ada-c86b-4815-8820-42cdf82c3d51"
+        idp = "cernbox.cern.ch"
+
+        Cs3UserApi.flush_cache()
+        user_info = self.user_api.get_user_info(idp, opaque_id)
+        self.assertTrue(self.user_api.user_cache.get(('id', idp, opaque_id)))
+
+        user_info['display_name'] = 'changed by the caller'
+        self.assertEqual(self.user_api.get_user_info(idp, opaque_id)['display_name'], 'Albert Einstein')
+
+        Cs3UserApi.flush_cache()
+        self.assertIsNone(self.user_api.user_cache.get(('id', idp, opaque_id)))
+
+    def test_user_not_found_cached(self):
+        opaque_id = "non-existing"
+        idp = "cernbox.cern.ch"
+        negative_cache_ttl = self.user_api.config.user_negative_cache_ttl
+
+        try:
+            self.user_api.config.user_negative_cache_ttl = 1
+            Cs3UserApi.flush_cache()
+            self.assertEqual(self.user_api.get_user_info(idp, opaque_id), {})
+            self.assertEqual(self.user_api.user_cache.get(('id', idp, opaque_id)), {})
+
+            # the user is looked up again sooner than a user that was found
+            sleep(1.1)
+            self.assertIsNone(self.user_api.user_cache.get(('id', idp, opaque_id)))
+        finally:
+            self.user_api.config.user_negative_cache_ttl = negative_cache_ttl
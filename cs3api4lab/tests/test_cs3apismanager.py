@@ -1,10 +1,13 @@
+import base64
 from unittest import TestCase
+from unittest.mock import patch
 
 from tornado import web
 
 from cs3api4lab.api.cs3apismanager import CS3APIsManager
 from cs3api4lab.api.cs3_file_api import Cs3FileApi
 from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.exception.exceptions import GatewayUnavailableError
 from traitlets.config import LoggingConfigurable
 
 from cs3api4lab.tests.share_test_base import ShareTestBase
@@ -126,6 +129,20 @@ class TestCS3APIsManager(ShareTestBase,TestCase):
         finally:
             self.file_api.remove(file_id, self.endpoint)
 
+    def test_reopen_notebook_file(self):
+        file_id = "/home/test_reopen_notebook_file.ipynb"
+        buffer = b'{"cells": [], "metadata": {}, "nbformat": 4, "nbformat_minor": 4}'
+        try:
+            self.file_api.write_file(file_id, buffer, self.endpoint)
+            first = self.contents_manager.get(file_id, True, "notebook")
+            second = self.contents_manager.get(file_id, True, "notebook")
+            for model in (first, second):
+                self.assertEqual(model["writable"], True)
+                self.assertEqual(model["locked"], False)
+                self.assertEqual(model["content"].nbformat, 4)
+        finally:
+            self.file_api.remove(file_id, self.endpoint)
+
     def test_save_text_model(self):
         file_id = "/home/test_save_text_model.txt"
         model = {
@@ -146,6 +163,69 @@ class TestCS3APIsManager(ShareTestBase,TestCase):
         finally:
             self.file_api.remove(file_id, self.endpoint)
 
+    def test_get_with_hash(self):
+        file_id = "/home/test_get_with_hash.txt"
+        model = {
+            "type": "file",
+            "format": "text",
+            "content": "Test content",
+        }
+        try:
+            save_model = self.contents_manager.save(model, file_id)
+            get_model = self.contents_manager.get(file_id, False, 'file', require_hash=True)
+            self.assertEqual(get_model["hash"], save_model["hash"])
+            self.assertEqual(get_model["hash_algorithm"], save_model["hash_algorithm"])
+            self.assertNotIn("hash", self.contents_manager.get(file_id, False, 'file'))
+        finally:
+            self.file_api.remove(file_id, self.endpoint)
+
+    def test_save_unchanged_with_hash(self):
+        file_id = "/home/test_save_unchanged_with_hash.txt"
+        model = {
+            "type": "file",
+            "format": "text",
+            "content": "Test content",
+        }
+        try:
+            # the second save is skipped, its hash is still the one of the storage
+            for _ in range(2):
+                save_model = self.contents_manager.save(model, file_id)
+                get_model = self.contents_manager.get(file_id, False, 'file', require_hash=True)
+                self.assertEqual(get_model["hash"], save_model["hash"])
+                self.assertEqual(get_model["hash_algorithm"], save_model["hash_algorithm"])
+        finally:
+            self.file_api.remove(file_id, self.endpoint)
+
+    def test_save_chunked_model(self):
+        file_id = "/home/test_save_chunked_model.txt"
+        chunks = [b"first chunk, ", b"second chunk, ", b"last chunk"]
+        try:
+            for number, chunk in enumerate(chunks, start=1):
+                model = {
+                    "type": "file",
+                    "format": "base64",
+                    "chunk": -1 if number == len(chunks) else number,
+                    "content": base64.b64encode(chunk).decode('ascii'),
+                }
+                save_model = self.contents_manager.save(model, file_id)
+
+            self.assertEqual(save_model["path"], "/reva/einstein/test_save_chunked_model.txt")
+            self.assertEqual(save_model["size"], len(b"".join(chunks)))
+            model = self.contents_manager.get(file_id, True, 'file')
+            self.assertEqual(model["content"], b"".join(chunks).decode('utf-8'))
+        finally:
+            self.file_api.remove(file_id, self.endpoint)
+
+    def test_save_chunk_without_first_chunk(self):
+        model = {
+            "type": "file",
+            "format": "base64",
+            "chunk": 2,
+            "content": base64.b64encode(b"content").decode('ascii'),
+        }
+        with self.assertRaises(web.HTTPError):
+            self.contents_manager.save(model, "/home/test_save_chunk_without_first_chunk.txt")
+
     def test_save_notebook_model(self):
         file_id = "/home/test_save_notebook_model.ipynb"
         model = self._create_notebook_model()
@@ -280,6 +360,25 @@ class TestCS3APIsManager(ShareTestBase,TestCase):
         with self.assertRaises(web.HTTPError):
             self.contents_manager.rename_file(file_path, file_dest)
 
+    def test_gateway_unavailable(self):
+        file_path = "/home/test_gateway_unavailable.txt"
+        model = {"type": "file", "format": "text", "content": "Test content"}
+        error = GatewayUnavailableError("gateway calls of storage are failing, retry in a while")
+        file_api = self.contents_manager.file_api
+        with patch.object(file_api, 'write_file', side_effect=error), \
+                patch.object(file_api, 'remove', side_effect=error), \
+                patch.object(file_api, 'move', side_effect=error):
+            self.contents_manager.save(dict(model, chunk=1), file_path)
+            calls = [lambda: self.contents_manager.save(model, file_path),
+                     lambda: self.contents_manager.save(dict(model, chunk=-1), file_path),
+                     lambda: self.contents_manager.save(self._create_notebook_model(), file_path + ".ipynb"),
+                     lambda: self.contents_manager.delete_file(file_path),
+                     lambda: self.contents_manager.rename_file(file_path, file_path + ".renamed")]
+            for call in calls:
+                with self.assertRaises(web.HTTPError) as context:
+                    call()
+                self.assertEqual(context.exception.status_code, 503)
+
     def test_rename_file_already_exits(self):
         try:
             file_path = "/test_rename_file.txt"
@@ -411,6 +510,28 @@ class TestCS3APIsManager(ShareTestBase,TestCase):
         finally:
             self.contents_manager.delete(dir_path)
 
+    def test_get_directory_after_save(self):
+        dir_path = "/home"
+        file_path = "/home/test_get_directory_after_save.txt"
+        model = {"type": "file", "format": "text", "content": "Test content"}
+        try:
+            self.contents_manager.get(dir_path, True, 'directory')
+            self.assertIsNotNone(self.contents_manager._dir_models.get(dir_path))
+
+            # the listing of the parent is not served again once the server has written in it
+            self.contents_manager.save(model, file_path)
+            self.assertIsNone(self.contents_manager._dir_models.get(dir_path))
+            dir_model = self.contents_manager.get(dir_path, True, 'directory')
+            self.assertIn("test_get_directory_after_save.txt", [item["name"] for item in dir_model["content"]])
+
+            self.contents_manager.delete_file(file_path)
+            self.assertIsNone(self.contents_manager._dir_models.get(dir_path))
+        finally:
+            try:
+                self.file_api.remove(file_path, self.endpoint)
+            except Exception as e:
+                self.log.warn("Cannot remove %s:%s" % (file_path, e))
+
     def test_get_directory_without_type(self):
         try:
             dir_path = "/test_get_directory_no_type"
@@ -0,0 +1,79 @@
+import threading
+from types import SimpleNamespace
+from unittest import TestCase
+
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.range_downloader import RangeDownloader
+
+
+class RangeResponse:
+    def __init__(self, storage, data, byte_range, status_code=206):
+        self.storage = storage
+        self.data = data
+        self.byte_range = byte_range
+        self.status_code = status_code
+        self.reason = ''
+        self.headers = {'Content-Range': 'bytes %d-%d/%d' % (byte_range + (len(data),))} if status_code == 206 else {}
+
+    @property
+    def content(self):
+        self.storage.read(self.byte_range)
+        start, end = self.byte_range
+        return self.data[start:end + 1]
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class RangeStorage:
+    def __init__(self, data, ranges=True):
+        self.data = data
+        self.ranges = ranges
+        self.requested = []
+        # the ranges requested when the body of each range was read
+        self.requested_before_read = {}
+        self._requested = threading.Condition()
+
+    def read(self, byte_range, timeout=2):
+        with self._requested:
+            # the other ranges are requested by the workers, they are given time to arrive
+            self._requested.wait_for(lambda: len(self.requested) >= 3, timeout)
+            self.requested_before_read[byte_range] = list(self.requested)
+
+    def download_content(self, init_file_download, stream=False, byte_range=None):
+        with self._requested:
+            self.requested.append(byte_range)
+            self._requested.notify_all()
+        if not self.ranges:
+            return RangeResponse(self, self.data, (0, len(self.data) - 1), status_code=200)
+        return RangeResponse(self, self.data, byte_range)
+
+
+class TestRangeDownloader(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.config = SimpleNamespace(download_range_size=4, download_parallelism=3, chunk_size=3)
+        self.data = bytes(range(18))
+
+    def test_download(self):
+        storage = RangeStorage(self.data)
+        content = b''.join(RangeDownloader(self.log, self.config, storage).download(None, len(self.data)))
+        self.assertEqual(content, self.data)
+
+    def test_ranges_requested_before_first_read(self):
+        storage = RangeStorage(self.data)
+        downloader = RangeDownloader(self.log, self.config, storage)
+        next(downloader.download(None, len(self.data)))
+        self.assertEqual(sorted(storage.requested_before_read[(0, 3)]), [(0, 3), (4, 7), (8, 11)])
+
+    def test_range_not_supported(self):
+        storage = RangeStorage(self.data, ranges=False)
+        content = b''.join(RangeDownloader(self.log, self.config, storage).download(None, len(self.data)))
+        self.assertEqual(content, self.data)
+        self.assertEqual(len(storage.requested), 1)
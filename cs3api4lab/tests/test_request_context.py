@@ -0,0 +1,57 @@
+import asyncio
+from unittest import TestCase
+
+from cs3api4lab.utils.asyncify import asyncify
+from cs3api4lab.utils.request_context import RequestContext, request_scope
+
+
+class TestRequestContext(TestCase):
+
+    def test_outside_of_request(self):
+        RequestContext.set('stat', 'key', 1)
+        self.assertIs(RequestContext.get('stat', 'key'), RequestContext.NOT_SET)
+
+    def test_request_scope(self):
+        @request_scope
+        def serve():
+            RequestContext.set('stat', 'key', None)
+            return nested()
+
+        @request_scope
+        def nested():
+            return RequestContext.get('stat', 'key')
+
+        self.assertIsNone(serve())
+        self.assertIs(nested(), RequestContext.NOT_SET)
+
+    def test_invalidate(self):
+        @request_scope
+        def serve():
+            RequestContext.set('stat', 'key', 1)
+            RequestContext.invalidate()
+            return RequestContext.get('stat', 'key')
+
+        self.assertIs(serve(), RequestContext.NOT_SET)
+
+    def test_async_request_scope(self):
+        @request_scope
+        async def serve():
+            await asyncio.gather(lookup('a'), lookup('b'))
+            return RequestContext.get('lock', 'a'), RequestContext.get('lock', 'b')
+
+        async def lookup(key):
+            RequestContext.set('lock', key, key.upper())
+
+        self.assertEqual(asyncio.run(serve()), ('A', 'B'))
+
+    def test_asyncify_copies_context(self):
+        @asyncify
+        def lookup():
+            return RequestContext.get('role', 'key')
+
+        @request_scope
+        def serve():
+            RequestContext.set('role', 'key', 'editor')
+            return lookup()
+
+        self.assertEqual(serve(), 'editor')
@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest import TestCase
+
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+import grpc
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.auth.rpc_policy_interceptor import RpcPolicyInterceptor
+from cs3api4lab.tests.interceptor_test_utils import CallDetails, RpcFailure, done
+
+
+class TestRpcPolicyInterceptor(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.config = SimpleNamespace(rpc_timeout=30, rpc_read_timeout=10, rpc_max_retries=2,
+                                      rpc_hedge_delay=0)
+        self.codes = []
+        self.timeouts = []
+
+    def test_deadline(self):
+        interceptor = RpcPolicyInterceptor(self.log, self.config)
+        interceptor.intercept_unary_unary(self._continuation(), self._details('/Delete'), cs3sp.DeleteRequest())
+        interceptor.intercept_unary_unary(self._continuation(), self._details('/Stat'), cs3sp.StatRequest())
+        interceptor.intercept_unary_unary(self._continuation(), self._details('/Stat', timeout=5), cs3sp.StatRequest())
+        self.assertEqual(self.timeouts, [30, 10, 5])
+
+    def test_retry_idempotent_call(self):
+        interceptor = RpcPolicyInterceptor(self.log, self.config)
+        self.codes = [grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED]
+        response = interceptor.intercept_unary_unary(self._continuation(), self._details('/Stat'),
+                                                     cs3sp.StatRequest())
+        self.assertEqual(response.result().status.code, cs3code.CODE_OK)
+        self.assertEqual(len(self.timeouts), 3)
+
+    def test_no_retry(self):
+        interceptor = RpcPolicyInterceptor(self.log, self.config)
+        self.codes = [grpc.StatusCode.UNAVAILABLE]
+        response = interceptor.intercept_unary_unary(self._continuation(), self._details('/Delete'),
+                                                     cs3sp.DeleteRequest())
+        self.assertEqual(response.exception().code(), grpc.StatusCode.UNAVAILABLE)
+
+        self.codes = [grpc.StatusCode.PERMISSION_DENIED]
+        response = interceptor.intercept_unary_unary(self._continuation(), self._details('/Stat'),
+                                                     cs3sp.StatRequest())
+        self.assertEqual(response.exception().code(), grpc.StatusCode.PERMISSION_DENIED)
+        self.assertEqual(len(self.timeouts), 2)
+
+    def test_retries_exhausted(self):
+        interceptor = RpcPolicyInterceptor(self.log, self.config)
+        self.codes = [grpc.StatusCode.UNAVAILABLE] * 5
+        response = interceptor.intercept_unary_unary(self._continuation(), self._details('/Stat'),
+                                                     cs3sp.StatRequest())
+        self.assertEqual(response.exception().code(), grpc.StatusCode.UNAVAILABLE)
+        self.assertEqual(len(self.timeouts), 3)
+
+    def test_retry_budget(self):
+        interceptor = RpcPolicyInterceptor(self.log, self.config)
+        self.codes = [grpc.StatusCode.UNAVAILABLE]
+        interceptor.intercept_unary_unary(self._continuation(), self._details('/Stat'), cs3sp.StatRequest())
+        # the retry only gets the time left of the deadline of the call
+        self.assertEqual(self.timeouts[0], 10)
+        self.assertLess(self.timeouts[1], 10)
+
+        self.timeouts = []
+        self.codes = [grpc.StatusCode.DEADLINE_EXCEEDED] * 3
+
+        def continuation(call_details, request):
+            time.sleep(0.05)
+            return self._continuation()(call_details, request)
+
+        response = interceptor.intercept_unary_unary(continuation, self._details('/Stat', timeout=0.05),
+                                                     cs3sp.StatRequest())
+        self.assertEqual(response.exception().code(), grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.assertEqual(len(self.timeouts), 1)
+
+    def test_hedged_call(self):
+        self.config.rpc_hedge_delay = 10
+        interceptor = RpcPolicyInterceptor(self.log, self.config)
+        stalled = Future()
+
+        def continuation(call_details, request):
+            self.timeouts.append(call_details.timeout)
+            if len(self.timeouts) == 1:
+                stalled.result(timeout=5)
+            return done(cs3sp.StatResponse(status={'code': cs3code.CODE_OK}))
+
+        response = interceptor.intercept_unary_unary(continuation, self._details('/Stat'), cs3sp.StatRequest())
+        self.assertEqual(response.result().status.code, cs3code.CODE_OK)
+        self.assertEqual(len(self.timeouts), 2)
+        stalled.set_result(None)
+
+    def _continuation(self):
+        def continuation(call_details, request):
+            self.timeouts.append(call_details.timeout)
+            future = Future()
+            if self.codes:
+                future.set_exception(RpcFailure(self.codes.pop(0)))
+            else:
+                future.set_result(cs3sp.StatResponse(status={'code': cs3code.CODE_OK}))
+            return future
+        return continuation
+
+    @staticmethod
+    def _details(method, timeout=None):
+        return CallDetails(method, timeout, [('x-access-token', 'token')], None, None, None)
@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+import cs3.sharing.collaboration.v1beta1.resources_pb2 as sharing_res
+
+from cs3api4lab.api.share_index import ShareIndex
+
+
+class TestShareIndex(TestCase):
+
+    def setUp(self):
+        self.index = ShareIndex()
+
+    def _share(self, share_id, resource_id):
+        share = sharing_res.Share()
+        share.id.opaque_id = share_id
+        share.resource_id.storage_id = 'storage'
+        share.resource_id.opaque_id = resource_id
+        return share
+
+    def test_add_and_get(self):
+        share = self._share('share_1', 'file_1')
+        self.index.add('einstein', ShareIndex.REGULAR, share)
+        self.assertEqual(self.index.get('einstein', 'share_1'), share)
+        self.assertEqual(self.index.get_kinds('einstein', 'share_1'), {ShareIndex.REGULAR})
+        self.assertIsNone(self.index.get('marie', 'share_1'))
+        self.assertEqual(self.index.find_by_resource('einstein', 'storage', 'file_1'), [share])
+
+    def test_received_share(self):
+        received_share = sharing_res.ReceivedShare(share=self._share('share_1', 'file_1'))
+        self.index.add('marie', ShareIndex.RECEIVED, received_share)
+        self.assertEqual(self.index.get('marie', 'share_1', ShareIndex.RECEIVED), received_share)
+        self.assertIsNone(self.index.get('marie', 'share_1', ShareIndex.OCM_RECEIVED))
+
+    def test_replace_all_and_remove(self):
+        self.index.add('einstein', ShareIndex.REGULAR, self._share('share_1', 'file_1'))
+        self.index.add('einstein', ShareIndex.OCM, self._share('share_2', 'file_1'))
+        self.index.replace_all('einstein', ShareIndex.REGULAR, [self._share('share_3', 'file_1')])
+        self.assertIsNone(self.index.get('einstein', 'share_1'))
+        self.assertEqual(len(self.index.find_by_resource('einstein', 'storage', 'file_1')), 2)
+
+        self.index.remove('einstein', 'share_2')
+        self.assertEqual(self.index.get_kinds('einstein', 'share_2'), set())
+        self.assertEqual([share.id.opaque_id for share in self.index.find_by_resource('einstein', 'storage', 'file_1')],
+                         ['share_3'])
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.tus_uploader import TusUploader
+from cs3api4lab.utils.content_stream import ContentStream
+
+
+class TestTusUploader(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.config = SimpleNamespace(tus_chunk_size=4, tus_max_retries=2, tus_parallel_uploads=1)
+        self.uploader = TusUploader(self.log, self.config, 'http://localhost/upload', {})
+        self.stored = 0
+        self.patches = 0
+
+    def test_upload(self):
+        response = self._upload(self._store)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.stored, 10)
+        self.assertEqual(self.patches, 3)
+
+    def test_no_progress(self):
+        with self.assertRaisesRegex(IOError, 'No bytes stored'):
+            self._upload(lambda offset, data: offset)
+        self.assertEqual(self.patches, self.config.tus_max_retries + 1)
+
+    def test_unexpected_offset(self):
+        with self.assertRaisesRegex(IOError, 'Unexpected upload offset 100'):
+            self._upload(lambda offset, data: 100)
+        self.assertEqual(self.patches, 1)
+
+    def _upload(self, store):
+        def request(method, url, headers=None, data=None):
+            if method == 'PATCH':
+                self.patches += 1
+                self.stored = store(int(headers['Upload-Offset']), data)
+            return SimpleNamespace(status_code=204, reason='', headers={'Upload-Offset': str(self.stored)})
+
+        with patch.object(self.uploader, '_request', side_effect=request), patch('time.sleep'):
+            return self.uploader.upload(ContentStream.from_content(b'0123456789', 4))
+
+    @staticmethod
+    def _store(offset, data):
+        return offset + len(data)
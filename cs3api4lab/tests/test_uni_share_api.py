@@ -122,6 +122,27 @@ class TestCs3UniShareApi(ShareTestBase, TestCase):
             if self.file_name:
                 self.remove_test_file('richard', self.file_name)
 
+    def test_list_received_etag(self):
+        try:
+            etag, _ = self.uni_api.list_received_with_etag()
+            self.assertEqual(self.uni_api.list_received_with_etag()[0], etag)
+            # a model mapped again without any change keeps its etag
+            self.uni_api.share_models.clear()
+            self.assertEqual(self.uni_api.list_received_with_etag()[0], etag)
+
+            self.file_name = self.file_path + self.get_random_suffix()
+            created_share = self.create_share('richard', self.einstein_id, self.einstein_idp, self.file_name)
+            self.share_id = created_share['opaque_id']
+            self.uni_api.update_received(self.share_id, 'accepted')
+            changed_etag, share_list = self.uni_api.list_received_with_etag()
+            self.assertNotEqual(changed_etag, etag)
+            self.assertIn(self.file_name.split('/')[-1], [share['name'] for share in share_list['content']])
+        finally:
+            if self.share_id:
+                self.remove_test_share('richard', self.share_id)
+            if self.file_name:
+                self.remove_test_file('richard', self.file_name)
+
     def test_list_received_not_accepted(self):
         try:
             self.file_name = self.file_path + self.get_random_suffix()
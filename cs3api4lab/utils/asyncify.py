@@ -1,4 +1,5 @@
 import asyncio
+import contextvars
 from functools import wraps, partial
 
 
@@ -18,9 +19,35 @@ def asyncify(func):
         loop = get_or_create_eventloop()
 
         async def run_async(loop, *args, executor=None, **kwargs):
-            pfunc = partial(func, *args, **kwargs)
+            # the executor thread runs in a copy of the caller's context, e.g. to see its request context
+            pfunc = partial(contextvars.copy_context().run, func, *args, **kwargs)
             return await loop.run_in_executor(executor, pfunc)
 
         return loop.run_until_complete(run_async(loop, *args, **kwargs))
 
     return run
+
+
+def run_on_loop(loop, coro):
+    """
+    Runs the coroutine on the given loop, which does not have to be the loop of the calling thread:
+    it is scheduled on a running loop and run to completion on an idle one. When another loop runs
+    in the calling thread, the idle loop runs the coroutine on its next iteration.
+    A closed loop can't run it anymore, the coroutine is discarded then.
+    """
+    if loop.is_closed():
+        coro.close()
+        return
+    try:
+        current_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        current_loop = None
+
+    if loop is current_loop:
+        loop.create_task(coro)
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(coro, loop)
+    elif current_loop is None:
+        loop.run_until_complete(coro)
+    else:
+        loop.call_soon_threadsafe(loop.create_task, coro)
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after ttl seconds.
+
+    Expired entries are not returned by get(), but they are kept until they are evicted or
+    invalidated, so get_stale() can still serve them when the server cannot be reached.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def get_stale(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            return default if entry is None else entry[1]
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores the value for ttl seconds, by default the ttl of the cache
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if self.maxsize <= 0 or self.ttl <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def items(self):
+        """
+        Returns a snapshot of the (key, value) pairs, including the expired ones
+        """
+        with self._lock:
+            return [(key, entry[1]) for key, entry in self._entries.items()]
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_if(self, predicate):
+        """
+        Drops the entries for which predicate(key, value) is true
+        """
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if predicate(key, entry[1])]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
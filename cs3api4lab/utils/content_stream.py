@@ -0,0 +1,162 @@
+import os
+import zlib
+import hashlib
+import binascii
+
+
+class ContentStream:
+    """
+    Upload body with a known length that is produced chunk by chunk.
+
+    Requests sends any iterable that has a length with a Content-Length header instead of
+    chunked transfer encoding, so the data gateway gets the size up front while only one
+    chunk is kept in memory at a time. Iterating the stream again starts from the beginning,
+    unless it was created from a one-shot iterator.
+    """
+
+    def __init__(self, chunk_factory, length, range_factory=None, repeatable=True):
+        self._chunk_factory = chunk_factory
+        self._length = length
+        self._range_factory = range_factory
+        self._repeatable = repeatable
+
+    def __iter__(self):
+        return iter(self._chunk_factory())
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def supports_ranges(self):
+        """
+        Whether any byte range can be read independently (and concurrently) with iter_range()
+        """
+        return self._range_factory is not None
+
+    @property
+    def repeatable(self):
+        """
+        Whether iterating the stream again starts from the beginning
+        """
+        return self._repeatable
+
+    def iter_range(self, start, end):
+        return iter(self._range_factory(start, end))
+
+    def checksum(self, algorithm):
+        """
+        Hex digest of the content, algorithm is 'adler32' or the name of a hashlib algorithm
+        """
+        if algorithm == 'adler32':
+            value = 1
+            for chunk in self:
+                value = zlib.adler32(chunk, value)
+            return '%08x' % value
+
+        digest = hashlib.new(algorithm)
+        for chunk in self:
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def from_content(content, chunk_size, length=None):
+        """
+        Wraps bytes, str, a file-like object or an iterator of bytes (which requires the length)
+        """
+        if isinstance(content, ContentStream):
+            return content
+        if isinstance(content, str):
+            return ContentStream.from_text(content, chunk_size)
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return ContentStream.from_bytes(content, chunk_size)
+        if hasattr(content, 'read'):
+            return ContentStream.from_file(content, chunk_size, length)
+        if length is None:
+            raise ValueError('The length of the content iterator has to be known')
+        return ContentStream.from_iterator(content, length)
+
+    @staticmethod
+    def from_bytes(content, chunk_size):
+        view = memoryview(content)
+
+        def byte_range(start, end):
+            for i in range(start, end, chunk_size):
+                yield view[i:min(i + chunk_size, end)]
+
+        return ContentStream(lambda: byte_range(0, len(view)), len(view), byte_range)
+
+    @staticmethod
+    def from_text(content, chunk_size):
+        # slices are encoded one by one, so the encoded copy of the whole text never exists
+        def chunks():
+            for i in range(0, len(content), chunk_size):
+                yield content[i:i + chunk_size].encode('utf-8')
+
+        if content.isascii():
+            length = len(content)
+        else:
+            length = sum(len(chunk) for chunk in chunks())
+
+        return ContentStream(chunks, length)
+
+    @staticmethod
+    def from_base64(content, chunk_size):
+        """
+        Decodes base64 text lazily, one block of whole quantums at a time
+        """
+        if any(c in content for c in ' \t\r\n'):
+            content = ''.join(content.split())
+
+        if len(content) % 4 != 0:
+            raise binascii.Error('Incorrect padding')
+
+        padding = 2 if content.endswith('==') else 1 if content.endswith('=') else 0
+        block_size = max(chunk_size // 3, 1) * 4
+
+        def chunks():
+            for i in range(0, len(content), block_size):
+                yield binascii.a2b_base64(content[i:i + block_size])
+
+        return ContentStream(chunks, len(content) // 4 * 3 - padding)
+
+    @staticmethod
+    def from_file(file, chunk_size, length=None):
+        start = file.tell() if file.seekable() else None
+        if length is None:
+            if start is None:
+                raise ValueError('The length of a non-seekable file has to be known')
+            length = file.seek(0, os.SEEK_END) - start
+
+        def chunks():
+            if start is not None:
+                file.seek(start)
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+        def byte_range(range_start, range_end):
+            # positional reads do not move the file offset, so ranges can be read from several threads
+            file_descriptor = file.fileno()
+            for i in range(range_start, range_end, chunk_size):
+                yield os.pread(file_descriptor, min(chunk_size, range_end - i), start + i)
+
+        has_descriptor = start is not None and hasattr(os, 'pread') and ContentStream._has_fileno(file)
+        if has_descriptor and file.writable():
+            # buffered writes are not visible to positional reads until flushed
+            file.flush()
+        return ContentStream(chunks, length, byte_range if has_descriptor else None, repeatable=start is not None)
+
+    @staticmethod
+    def from_iterator(iterator, length):
+        iterator = iter(iterator)
+        return ContentStream(lambda: iterator, length, repeatable=False)
+
+    @staticmethod
+    def _has_fileno(file):
+        try:
+            file.fileno()
+            return True
+        except (AttributeError, OSError):
+            return False
@@ -33,8 +33,9 @@ class FileUtils:
 
     @staticmethod
     def calculate_content_size(content, format=None):
-        if format == "text":
-            content_len = len(content.decode('utf-8'))
+        # the upload length is the number of bytes, whatever the format of the content
+        if isinstance(content, str):
+            content_len = len(content.encode('utf-8'))
         else:
             content_len = len(content)
 
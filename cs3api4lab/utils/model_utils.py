@@ -4,6 +4,7 @@ from tornado import web
 from datetime import datetime
 from IPython.utils import tz
 from cs3api4lab.utils.share_utils import ShareUtils
+from cs3api4lab.common.strings import Checksum
 
 
 class ModelUtils:
@@ -79,7 +80,11 @@ class ModelUtils:
 
     @staticmethod
     def convert_container_to_base_model(path, cs3_container):
-        created, last_modified, size, writable = ModelUtils.get_info_from_container(cs3_container, path)
+        return ModelUtils.convert_cs3_model_to_base_model(path, ModelUtils.find_in_container(cs3_container, path))
+
+    @staticmethod
+    def convert_cs3_model_to_base_model(path, cs3_model):
+        created, last_modified, size, writable = ModelUtils.get_info_from_cs3_model(cs3_model)
 
         model = {}
         model['name'] = path.rsplit('/', 1)[-1]
@@ -115,8 +120,10 @@ class ModelUtils:
 
     @staticmethod
     def convert_container_to_directory_model(path, cs3_container, content=True):
+        # entries are looked up by path, the container is indexed once instead of being scanned for every entry
+        index = ModelUtils.index_container(cs3_container)
 
-        model = ModelUtils.convert_container_to_base_model(path, cs3_container)
+        model = ModelUtils.convert_container_to_base_model(path, index)
         model['size'] = None
         model['type'] = 'directory'
 
@@ -126,19 +133,18 @@ class ModelUtils:
 
             for cs3_model in cs3_container:
                 if cs3_model.type == resource_types.RESOURCE_TYPE_CONTAINER:
-                    sub_model = ModelUtils.convert_container_to_base_model(cs3_model.path, cs3_container)
+                    sub_model = ModelUtils.convert_cs3_model_to_base_model(cs3_model.path, index[cs3_model.path])
                     sub_model['size'] = None
                     sub_model['type'] = 'directory'
                     contents.append(sub_model)
                 elif cs3_model.type == resource_types.RESOURCE_TYPE_FILE:
+                    sub_model = ModelUtils.convert_cs3_model_to_base_model(cs3_model.path, index[cs3_model.path])
                     if type == 'notebook' or (type is None and path.endswith('.ipynb')):
-                        contents.append(
-                            ModelUtils.convert_container_to_notebook_model(cs3_model, cs3_container)
-                        )
+                        sub_model['type'] = 'notebook'
                     else:
-                        contents.append(
-                            ModelUtils.convert_container_to_file_model(cs3_model, cs3_container)
-                        )
+                        sub_model['type'] = 'file'
+                    sub_model['mimetype'] = mimetypes.guess_type(cs3_model.path)[0]
+                    contents.append(sub_model)
                 else: #(TODO check why this wasnt here)
                     raise web.HTTPError(500, u'Unexpected type: %s %s' % (cs3_model.path, cs3_model.type))
 
@@ -158,22 +164,38 @@ class ModelUtils:
         return model, cs3_model
 
     @staticmethod
-    def get_info_from_container(cs3_container, path):
-        size = None
-        writable = False
-        created = ModelUtils.parse_date(0)
-        last_modified = ModelUtils.parse_date(0)
+    def index_container(cs3_container):
+        """
+        Maps the paths to the entries of the container, the last entry wins if a path is repeated
+        """
+        return {cs3_model.path: cs3_model for cs3_model in cs3_container}
 
+    @staticmethod
+    def find_in_container(cs3_container, path):
+        """
+        Looks up an entry in a container or in a container index built by index_container()
+        """
+        if isinstance(cs3_container, dict):
+            return cs3_container.get(path)
+
+        found = None
         for cs3_model in cs3_container:
             if cs3_model.path == path:
-                size = cs3_model.size
-                created = ModelUtils.parse_date(cs3_model.mtime.seconds)
-                last_modified = ModelUtils.parse_date(cs3_model.mtime.seconds)
+                found = cs3_model
+        return found
 
-                if ShareUtils.map_permissions_to_role(cs3_model.permission_set) == "editor":
-                    writable = True
+    @staticmethod
+    def get_info_from_container(cs3_container, path):
+        return ModelUtils.get_info_from_cs3_model(ModelUtils.find_in_container(cs3_container, path))
 
-        return created, last_modified, size, writable
+    @staticmethod
+    def get_info_from_cs3_model(cs3_model):
+        if cs3_model is None:
+            return ModelUtils.parse_date(0), ModelUtils.parse_date(0), None, False
+
+        date = ModelUtils.parse_date(cs3_model.mtime.seconds)
+        writable = ShareUtils.map_permissions_to_role(cs3_model.permission_set) == "editor"
+        return date, date, cs3_model.size, writable
 
     @staticmethod
     def create_empty_file_model(path):
@@ -202,3 +224,15 @@ class ModelUtils:
         model['created'] = datetime.fromtimestamp(stat['mtime']).strftime(ModelUtils.date_fmt)
 
         return model
+
+    @staticmethod
+    def update_hash(model, stat):
+        """
+        Sets the hash of the file content from the checksum the storage keeps for the resource,
+        None if the storage has no checksum of a supported type
+        """
+        algorithm = Checksum.ALGORITHMS.get(stat['checksum'].get('type'))
+        model['hash'] = stat['checksum']['sum'].lower() if algorithm else None
+        model['hash_algorithm'] = algorithm
+
+        return model
@@ -0,0 +1,65 @@
+import contextvars
+import inspect
+from functools import wraps
+
+_request_facts = contextvars.ContextVar('cs3api4lab_request_facts', default=None)
+
+
+class RequestContext:
+    """
+    Facts looked up while one request is served (stats, lock states, share roles), so that every
+    entry point of the contents manager fetches each of them once. The facts live in a context
+    variable for the duration of the request only, nothing is shared between requests, and any
+    change made through the APIs drops them.
+    """
+    NOT_SET = object()
+
+    @staticmethod
+    def get(kind, key):
+        facts = _request_facts.get()
+        if facts is None:
+            return RequestContext.NOT_SET
+        return facts.get((kind, key), RequestContext.NOT_SET)
+
+    @staticmethod
+    def set(kind, key, value):
+        facts = _request_facts.get()
+        if facts is not None:
+            facts[(kind, key)] = value
+
+    @staticmethod
+    def invalidate():
+        facts = _request_facts.get()
+        if facts is not None:
+            facts.clear()
+
+
+def request_scope(func):
+    """
+    Serves the decorated entry point within a request context, an entry point called
+    from another one shares the context of the outer call
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def run_async(*args, **kwargs):
+            if _request_facts.get() is not None:
+                return await func(*args, **kwargs)
+            token = _request_facts.set({})
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _request_facts.reset(token)
+
+        return run_async
+
+    @wraps(func)
+    def run(*args, **kwargs):
+        if _request_facts.get() is not None:
+            return func(*args, **kwargs)
+        token = _request_facts.set({})
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _request_facts.reset(token)
+
+    return run